@@ -36,7 +36,7 @@ bl_info = {
     "category": "Add Mesh"
 }
 
-modules = ("util", "properties", "events", "operators", "ui")
+modules = ("log", "util", "generator", "catalog", "cache", "materials", "profiler", "bake", "events", "scheduler", "prefetch", "scatter", "properties", "operators", "ui")
 if "bpy" in locals():
     import imp
     for mod in modules:
@@ -87,11 +87,17 @@ def menu_func(self, context):
 def register():
 	properties.register()
 	ui.register()
+	bake.register()
 	events.register()
+	scheduler.register()
+	prefetch.register()
 	operators.register()
 
 def unregister():
 	properties.unregister()
 	ui.unregister()
+	bake.unregister()
 	events.unregister()
+	scheduler.unregister()
+	prefetch.unregister()
 	operators.unregister()
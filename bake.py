@@ -0,0 +1,284 @@
+# AddOn AnimSpacGen (c) 2016 Michael Davies, Atom
+# Animated Spaceship Generator 1.0.1
+# Manages and animates generated geometry.
+# https://github.com/a1studmuffin/SpaceshipGenerator/blob/master/README.md
+# Last Revision 06-27-2016
+
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+import bpy, os, json, struct, logging
+import numpy as np
+from bpy.app.handlers import persistent
+
+from .util import returnManagedObjectNames
+from .util import fillMeshFromArrays
+
+from .cache import mesh_cache
+from .cache import mesh_pool
+from .cache import returnEntryKey
+from .cache import CACHE_KEY_PROPERTY
+from .cache import showControllerMesh
+from .materials import linkMaterials
+
+from .kernel import MeshArrays
+
+# Custom property holding the (blend relative) path of a controller's bake file.
+BAKE_PROPERTY = "asg_bake"
+BAKE_EXTENSION = ".asgbake"
+
+log = logging.getLogger(__name__)
+
+############################################################################
+# Bake file format.
+############################################################################
+# A bake file holds one mesh per distinct parameter state of a controller
+# and maps every baked frame onto one of them:
+#   8 bytes     BAKE_MAGIC
+#   4 bytes     little endian size of the JSON header
+#   header      {"version", "frames": {frame: state}, "keys": [entry key
+#               per state], "counts": [[verts, faces, loops] per state],
+#               "arrays": {name: [offset, dtype, shape]}}
+#   arrays      verts (float32 x 3), loops (int32, indices local to their
+#               state), totals (int32 loops per face) and materials
+#               (uint8), all states back to back, each array starting at a
+#               BAKE_ALIGN aligned offset from the end of the header.
+BAKE_MAGIC = b"ASGBAKE\0"
+BAKE_VERSION = 1
+BAKE_ALIGN = 16
+
+def alignOffset(offset):
+    return (offset + BAKE_ALIGN - 1) // BAKE_ALIGN * BAKE_ALIGN
+
+# Writes frames ({frame: state index}) and states (kernel.MeshArrays, with
+# their entry keys) to path, replacing any older bake atomically.
+def writeBakeFile(path, frames, keys, states):
+    arrays = (("verts", np.concatenate([s.verts for s in states]).astype("<f4")),
+              ("loops", np.concatenate([s.loops for s in states]).astype("<i4")),
+              ("totals", np.concatenate([s.loop_totals for s in states]).astype("<i4")),
+              ("materials", np.concatenate([s.materials for s in states]).astype("u1")))
+    layout = {}
+    offset = 0
+    for name, data in arrays:
+        layout[name] = [offset, data.dtype.str, list(data.shape)]
+        offset = alignOffset(offset + data.nbytes)
+    header = json.dumps({"version": BAKE_VERSION,
+                         "frames": dict((str(frame), state) for frame, state in frames.items()),
+                         "keys": list(keys),
+                         "counts": [[s.num_verts, s.num_faces, len(s.loops)] for s in states],
+                         "arrays": layout}, sort_keys=True).encode("utf-8")
+    data_start = alignOffset(len(BAKE_MAGIC) + 4 + len(header))
+    temp_path = path + ".tmp"
+    with open(temp_path, "wb") as f:
+        f.write(BAKE_MAGIC)
+        f.write(struct.pack("<I", len(header)))
+        f.write(header)
+        for name, data in arrays:
+            f.seek(data_start + layout[name][0])
+            f.write(data.tobytes())
+    os.replace(temp_path, path)
+
+class BakeFile:
+    # Read side of a bake file. The arrays are views into one read only
+    # memory map, so only the pages of the frames played get loaded.
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            if f.read(len(BAKE_MAGIC)) != BAKE_MAGIC:
+                raise ValueError("Not an AnimSpacGen bake file: %s" % path)
+            size = struct.unpack("<I", f.read(4))[0]
+            header = json.loads(f.read(size).decode("utf-8"))
+        if header["version"] != BAKE_VERSION:
+            raise ValueError("Unsupported bake file version %s: %s" % (header["version"], path))
+        self.path = path
+        self.mtime = os.path.getmtime(path)
+        self.frames = dict((int(frame), state) for frame, state in header["frames"].items())
+        self.keys = header["keys"]
+        data_start = alignOffset(len(BAKE_MAGIC) + 4 + size)
+        raw = np.memmap(path, dtype=np.uint8, mode="r")
+        self.arrays = {}
+        for name, (offset, dtype, shape) in header["arrays"].items():
+            dtype = np.dtype(dtype)
+            count = int(np.prod(shape))
+            start = data_start + offset
+            self.arrays[name] = raw[start:start + count * dtype.itemsize].view(dtype).reshape(shape)
+        # Where every state starts in each array.
+        counts = np.array(header["counts"], dtype=np.int64).reshape(-1, 3)
+        self.starts = np.zeros_like(counts)
+        self.starts[1:] = np.cumsum(counts, axis=0)[:-1]
+        self.counts = counts
+        self.first_frame = min(self.frames)
+        self.last_frame = max(self.frames)
+
+    def stateAt(self, frame):
+        # Frames outside the baked range hold the nearest baked one.
+        frame = min(max(int(frame), self.first_frame), self.last_frame)
+        while frame not in self.frames:
+            frame -= 1
+        return self.frames[frame]
+
+    def meshArrays(self, state):
+        vert_start, face_start, loop_start = self.starts[state].tolist()
+        num_verts, num_faces, num_loops = self.counts[state].tolist()
+        totals = self.arrays["totals"][face_start:face_start + num_faces]
+        starts = np.zeros(num_faces, dtype=np.int32)
+        if num_faces > 1:
+            starts[1:] = np.cumsum(totals)[:-1]
+        return MeshArrays(self.arrays["verts"][vert_start:vert_start + num_verts],
+                          self.arrays["loops"][loop_start:loop_start + num_loops],
+                          starts,
+                          totals,
+                          self.arrays["materials"][face_start:face_start + num_faces])
+
+############################################################################
+# Baking.
+############################################################################
+# Bake files are opened once and kept until they change on disk.
+bake_files = {}
+
+def returnBakeFile(path):
+    bake = bake_files.get(path)
+    try:
+        if bake == None or bake.mtime != os.path.getmtime(path):
+            bake = bake_files[path] = BakeFile(path)
+    except (OSError, ValueError) as e:
+        bake_files.pop(path, None)
+        log.warning("Can not read bake file [%s]: %s", path, e)
+        return None
+    return bake
+
+def returnBakePath(ob):
+    # Next to the .blend, relative to it so render nodes find it too.
+    blend_name = os.path.splitext(bpy.path.basename(bpy.data.filepath))[0]
+    return "//%s_%s%s" % (blend_name, bpy.path.clean_name(ob.name), BAKE_EXTENSION)
+
+def returnBakeRange(ob, scene):
+    # The controller's keyframed range, or the scene's when not animated.
+    animation_data = ob.animation_data
+    if animation_data != None and animation_data.action != None:
+        first, last = animation_data.action.frame_range
+        return int(first), int(last)
+    return scene.frame_start, scene.frame_end
+
+isBaking = False
+
+# Generates the ship of every frame in the controller's animated range and
+# writes them to its bake file. Frames with the same parameters share one
+# mesh. build(entry) returns kernel.MeshArrays of the entry's ship, see
+# events.generateSpaceshipArrays. Returns the number of frames and of
+# distinct meshes baked.
+def bakeAnimSpacGen(ob, scene, build):
+    global isBaking
+    entry = ob.AnimSpacGen_List[0]
+    path = returnBakePath(ob)
+    first, last = returnBakeRange(ob, scene)
+    frames = {}
+    keys = []
+    states = []
+    state_of_key = {}
+    frame_current = scene.frame_current
+    isBaking = True
+    try:
+        for frame in range(first, last + 1):
+            scene.frame_set(frame)
+            key = returnEntryKey(entry)
+            if key not in state_of_key:
+                state_of_key[key] = len(states)
+                keys.append(key)
+                states.append(build(entry))
+            frames[frame] = state_of_key[key]
+    finally:
+        scene.frame_set(frame_current)
+        isBaking = False
+    abs_path = bpy.path.abspath(path)
+    bake_files.pop(abs_path, None)
+    writeBakeFile(abs_path, frames, keys, states)
+    ob[BAKE_PROPERTY] = path
+    log.info("Baked %i frames, %i distinct meshes, of [%s] to [%s].", len(frames), len(states), ob.name, abs_path)
+    return len(frames), len(states)
+
+def clearBake(ob):
+    path = ob.get(BAKE_PROPERTY)
+    if path != None:
+        # Drop the baked meshes from the cache, the ones no object shows
+        # any more go back to the pool.
+        bake = returnBakeFile(bpy.path.abspath(path))
+        if bake != None:
+            for key in bake.keys:
+                if returnBakeKey(key) in mesh_cache.entries:
+                    mesh_cache.evict(returnBakeKey(key))
+        del ob[BAKE_PROPERTY]
+        bake_files.pop(bpy.path.abspath(path), None)
+
+def isBaked(ob):
+    return ob.get(BAKE_PROPERTY) != None
+
+############################################################################
+# Playback.
+############################################################################
+# Baked meshes are cached apart from generated ones. A bake may be older
+# than the generator or builder in use, and its meshes must not turn up
+# once it is cleared.
+def returnBakeKey(key):
+    return "%s:bake" % key
+
+def meshFromBake(bake, state):
+    return fillMeshFromArrays(mesh_pool.acquire(), bake.meshArrays(state))
+
+# Shows the baked mesh of frame on the controller. Returns True if the
+# object's mesh changed.
+def loadBakedFrame(ob, frame):
+    bake = returnBakeFile(bpy.path.abspath(ob[BAKE_PROPERTY]))
+    if bake == None:
+        return False
+    state = bake.stateAt(frame)
+    key = returnBakeKey(bake.keys[state])
+    old_mesh = ob.data
+    if old_mesh != None and old_mesh.get(CACHE_KEY_PROPERTY) == key:
+        return False
+    me_new = mesh_cache.get(key)
+    if me_new == None:
+        me_new = meshFromBake(bake, state)
+        mesh_cache.put(key, me_new)
+    me = showControllerMesh(ob, me_new, key)
+    if len(ob.AnimSpacGen_List) > 0:
+        linkMaterials(me, ob.AnimSpacGen_List[0].assign_materials)
+    return True
+
+@persistent
+def frame_change_post_bake(scene):
+    if scene == None or isBaking:
+        return
+    for name in returnManagedObjectNames(scene):
+        ob = bpy.data.objects.get(name)
+        if ob != None and isBaked(ob):
+            loadBakedFrame(ob, scene.frame_current)
+
+@persistent
+def load_post_bake(dummy):
+    bake_files.clear()
+
+def register():
+    bpy.app.handlers.frame_change_post.append(frame_change_post_bake)
+    bpy.app.handlers.load_post.append(load_post_bake)
+
+def unregister():
+    if frame_change_post_bake in bpy.app.handlers.frame_change_post:
+        bpy.app.handlers.frame_change_post.remove(frame_change_post_bake)
+    if load_post_bake in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.remove(load_post_bake)
+    bake_files.clear()
@@ -0,0 +1,314 @@
+# AddOn AnimSpacGen (c) 2016 Michael Davies, Atom
+# Animated Spaceship Generator 1.0.1
+# Manages and animates generated geometry.
+# https://github.com/a1studmuffin/SpaceshipGenerator/blob/master/README.md
+# Last Revision 06-27-2016
+
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# Generation benchmark. Builds a fixed corpus of seeds crossed with a grid
+# of parameter settings and compares the results against a stored baseline:
+#
+#   python benchmark.py --update-baseline          # record a baseline
+#   python benchmark.py                            # compare, exit 1 on regression
+#   blender -b --python benchmark.py -- --builder bmesh
+#
+# Every case records its best wall time over --repeat runs, the peak memory
+# traced while building it once more, vertex/face counts and the time spent
+# in each generation stage. Timings only compare on the machine the
+# baseline was recorded on; count changes mean the output itself changed.
+#
+# Inside Blender the run also times writing every ship into a mesh: the
+# bmesh ship with bm.to_mesh and through flat arrays, and the array kernel
+# ship with from_pydata and with the bulk foreach_set path.
+
+import os, sys, json, time, platform, argparse, itertools, tracemalloc
+
+# Blender's --python does not put the script's folder on the path.
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from fleet import importAddonModule
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baseline.json")
+
+# Seeds -420..420 every SEED_STRIDE, crossed with every combination below.
+SEED_RANGE = (-420, 420)
+SEED_STRIDE = 40
+PARAMETER_GRID = (
+    ("num_hull_segments", ((3, 6), (6, 12))),
+    ("num_asymmetry_segments", ((1, 5), (4, 10))),
+    ("create_face_detail", (True, False)),
+)
+
+############################################################################
+# Corpus.
+############################################################################
+def returnSeeds(stride=SEED_STRIDE):
+    return list(range(SEED_RANGE[0], SEED_RANGE[1] + 1, stride))
+
+def returnConfigs():
+    # Each config is a (name, parameters) pair, name being stable across runs.
+    configs = []
+    names = [name for name, values in PARAMETER_GRID]
+    for values in itertools.product(*[values for name, values in PARAMETER_GRID]):
+        parameters = {}
+        label = []
+        for name, value in zip(names, values):
+            if isinstance(value, tuple):
+                parameters[name + "_min"], parameters[name + "_max"] = value
+                label.append("%s=%i-%i" % (name, value[0], value[1]))
+            else:
+                parameters[name] = value
+                label.append("%s=%s" % (name, value))
+        configs.append((",".join(label), parameters))
+    return configs
+
+############################################################################
+# Running.
+############################################################################
+def returnBuilderFactory(name):
+    if name == "array":
+        kernel = importAddonModule("kernel")
+        return kernel.ArrayBuilder, None
+    # Only available inside Blender.
+    import bpy
+    events = importAddonModule("events")
+    def discard(me):
+        bpy.data.meshes.remove(me)
+    return events.BMeshBuilder, discard
+
+def returnResultCounts(result):
+    # Vertex/face counts of the finished ship, so vertices the array kernel
+    # orphans while building (dropped by its finish()) are not counted.
+    if hasattr(result, "loop_starts"):
+        return result.num_verts, result.num_faces
+    return len(result.vertices), len(result.polygons)
+
+def runCase(generator, new_builder, discard, seed, parameters, repeat):
+    entry = generator.Parameters(**parameters)
+    entry.random_seed = seed
+    best = None
+    stages = None
+    for i in range(repeat):
+        builder = new_builder()
+        profile = generator.GenerationProfile(builder)
+        start = time.perf_counter()
+        result = generator.buildSpaceship(entry, builder, profile)
+        seconds = time.perf_counter() - start
+        counts = returnResultCounts(result)
+        if discard != None:
+            discard(result)
+        if best == None or seconds < best:
+            best = seconds
+            stages = dict((stage["stage"], stage["seconds"]) for stage in profile.stages)
+
+    # A separate pass for memory, tracing slows the build down.
+    tracemalloc.start()
+    result = generator.buildSpaceship(entry, new_builder())
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    if discard != None:
+        discard(result)
+
+    return {"seconds": best,
+            "peak_memory": peak,
+            "verts": counts[0],
+            "faces": counts[1],
+            "stages": stages}
+
+def timeBest(function, repeat):
+    best = None
+    for i in range(repeat):
+        start = time.perf_counter()
+        function()
+        seconds = time.perf_counter() - start
+        if best == None or seconds < best:
+            best = seconds
+    return best
+
+def runMeshWrite(generator, seed, parameters, repeat):
+    # Times each way of turning one ship into a mesh datablock, best of
+    # repeat, including the edge calculation each one needs.
+    import bpy
+    kernel = importAddonModule("kernel")
+    events = importAddonModule("events")
+    util = importAddonModule("util")
+    entry = generator.Parameters(**parameters)
+    entry.random_seed = seed
+
+    class KeepBMesh(events.BMeshBuilder):
+        def finish(self):
+            return self.bm
+    bm = generator.buildSpaceship(entry, KeepBMesh())
+    arrays = generator.buildSpaceship(entry, kernel.ArrayBuilder())
+
+    def write(fill):
+        me = bpy.data.meshes.new("AnimSpacGen_Benchmark")
+        fill(me)
+        bpy.data.meshes.remove(me)
+
+    def from_pydata(me):
+        me.from_pydata(arrays.verts.tolist(), [], arrays.face_lists())
+        me.polygons.foreach_set("material_index", arrays.materials)
+        me.update(calc_edges=True)
+
+    result = {"bmesh_to_mesh": timeBest(lambda: write(bm.to_mesh), repeat),
+              "bmesh_bulk": timeBest(lambda: write(lambda me: util.fillMeshFromArrays(me, events.arraysFromBMesh(bm))), repeat),
+              "arrays_from_pydata": timeBest(lambda: write(from_pydata), repeat),
+              "arrays_bulk": timeBest(lambda: write(lambda me: util.fillMeshFromArrays(me, arrays)), repeat)}
+    bm.free()
+    return result
+
+def runBenchmark(builder_name="array", stride=SEED_STRIDE, repeat=3, log=print):
+    generator = importAddonModule("generator")
+    new_builder, discard = returnBuilderFactory(builder_name)
+    cases = {}
+    seeds = returnSeeds(stride)
+    configs = returnConfigs()
+    start = time.perf_counter()
+    for config_name, parameters in configs:
+        for seed in seeds:
+            cases["%s|seed=%i" % (config_name, seed)] = runCase(
+                generator, new_builder, discard, seed, parameters, repeat)
+        log("  %-70s done" % config_name)
+    wall_seconds = time.perf_counter() - start
+
+    mesh_write = None
+    if "bpy" in sys.modules:
+        mesh_write = {}
+        for config_name, parameters in configs:
+            for seed in seeds:
+                for method, seconds in runMeshWrite(generator, seed, parameters, repeat).items():
+                    mesh_write[method] = mesh_write.get(method, 0.0) + seconds
+        log("  %-70s done" % "mesh write")
+    return {"builder": builder_name,
+            "stride": stride,
+            "repeat": repeat,
+            "machine": "%s %s, Python %s" % (platform.node(), platform.machine(), platform.python_version()),
+            "time": time.time(),
+            "wall_seconds": wall_seconds,
+            "cases": cases,
+            "mesh_write": mesh_write}
+
+############################################################################
+# Comparison.
+############################################################################
+def summarize(results):
+    cases = results["cases"].values()
+    stages = {}
+    for case in cases:
+        for stage, seconds in case["stages"].items():
+            stages[stage] = stages.get(stage, 0.0) + seconds
+    return {"cases": len(results["cases"]),
+            "seconds": sum(case["seconds"] for case in cases),
+            "peak_memory": max([case["peak_memory"] for case in cases] or [0]),
+            "verts": sum(case["verts"] for case in cases),
+            "faces": sum(case["faces"] for case in cases),
+            "stages": stages}
+
+# Returns a list of failure messages, empty when within threshold.
+def compareResults(results, baseline, threshold, memory_threshold):
+    failures = []
+    if baseline["builder"] != results["builder"] or baseline["stride"] != results["stride"]:
+        failures.append("Baseline was recorded with builder %s, stride %i." % (baseline["builder"], baseline["stride"]))
+        return failures
+
+    changed = []
+    for key, case in sorted(results["cases"].items()):
+        old = baseline["cases"].get(key)
+        if old == None:
+            continue
+        if (case["verts"], case["faces"]) != (old["verts"], old["faces"]):
+            changed.append("%s: %i/%i verts/faces, baseline %i/%i" % (
+                key, case["verts"], case["faces"], old["verts"], old["faces"]))
+    if changed:
+        failures.append("Output changed for %i cases, e.g. %s" % (len(changed), changed[0]))
+
+    now = summarize(results)
+    then = summarize(baseline)
+    if now["seconds"] > then["seconds"] * (1.0 + threshold):
+        failures.append("Total time %.3f s is %.1f%% over the baseline %.3f s." % (
+            now["seconds"], (now["seconds"] / then["seconds"] - 1.0) * 100.0, then["seconds"]))
+    if now["peak_memory"] > then["peak_memory"] * (1.0 + memory_threshold):
+        failures.append("Peak memory %i bytes is %.1f%% over the baseline %i bytes." % (
+            now["peak_memory"], (float(now["peak_memory"]) / then["peak_memory"] - 1.0) * 100.0, then["peak_memory"]))
+    return failures
+
+def printSummary(results, baseline=None):
+    now = summarize(results)
+    then = summarize(baseline) if baseline != None else None
+    print("%i cases, %.3f s total, peak memory %i bytes, %i verts, %i faces." % (
+        now["cases"], now["seconds"], now["peak_memory"], now["verts"], now["faces"]))
+    for stage, seconds in sorted(now["stages"].items(), key=lambda item: -item[1]):
+        line = "  %-12s %9.4f s" % (stage, seconds)
+        if then != None and then["stages"].get(stage):
+            line += "  (%+.1f%%)" % ((seconds / then["stages"][stage] - 1.0) * 100.0)
+        print(line)
+    mesh_write = results.get("mesh_write")
+    if mesh_write:
+        print("Mesh write, all cases:")
+        for method in ("bmesh_to_mesh", "bmesh_bulk", "arrays_from_pydata", "arrays_bulk"):
+            print("  %-20s %9.4f s" % (method, mesh_write[method]))
+
+############################################################################
+# Command line.
+############################################################################
+def main(argv=None):
+    if argv == None:
+        # Inside Blender our arguments follow a "--".
+        argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else sys.argv[1:]
+    parser = argparse.ArgumentParser(description="Benchmark spaceship generation against a baseline.")
+    parser.add_argument("--builder", choices=("array", "bmesh"), default="array",
+                        help="Geometry builder, bmesh needs to run inside Blender.")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="Baseline JSON file.")
+    parser.add_argument("--update-baseline", action="store_true", help="Store this run as the new baseline.")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Allowed total time regression, 0.10 = 10%%.")
+    parser.add_argument("--memory-threshold", type=float, default=0.10, help="Allowed peak memory regression.")
+    parser.add_argument("--stride", type=int, default=SEED_STRIDE, help="Seed spacing within -420..420.")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per case, the best one counts.")
+    parser.add_argument("--out", help="Also write this run's results to a JSON file.")
+    args = parser.parse_args(argv)
+
+    results = runBenchmark(args.builder, args.stride, max(1, args.repeat))
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=1, sort_keys=True)
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=1, sort_keys=True)
+        printSummary(results)
+        print("Baseline written to %s." % args.baseline)
+        return 0
+
+    if not os.path.exists(args.baseline):
+        printSummary(results)
+        print("No baseline at %s, run with --update-baseline first." % args.baseline)
+        return 2
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    printSummary(results, baseline)
+    failures = compareResults(results, baseline, args.threshold, args.memory_threshold)
+    for failure in failures:
+        print("REGRESSION: " + failure)
+    if not failures:
+        print("Within %.0f%% of the baseline." % (args.threshold * 100.0))
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
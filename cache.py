@@ -0,0 +1,300 @@
+# AddOn AnimSpacGen (c) 2016 Michael Davies, Atom
+# Animated Spaceship Generator 1.0.1
+# Manages and animates generated geometry.
+# https://github.com/a1studmuffin/SpaceshipGenerator/blob/master/README.md
+# Last Revision 06-27-2016
+
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+import bpy, hashlib, logging
+from collections import OrderedDict
+
+from .util import removeMeshFromMemory
+from .util import clearMeshGeometry
+from .util import copyMeshGeometry
+from .util import managedObjectNames
+from .util import MESH_CACHE_BUDGET
+from .util import MESH_POOL_SIZE
+
+# Custom property stamped on every cached mesh so a stale name (after undo
+# or a reload) is never mistaken for the mesh we cached.
+CACHE_KEY_PROPERTY = "asg_key"
+
+# Custom property marking an emptied mesh waiting in the mesh pool.
+POOL_PROPERTY = "asg_pooled"
+
+# Entry fields that do not affect the generated mesh. Controllers that only
+# differ in these share one mesh.
+IGNORED_ENTRY_FIELDS = ("rna_type", "name",
+                        "apply_bevel_modifier",
+                        "material", "material_name",
+                        "profile", "profile_name", "profile_size_x", "profile_size_y")
+
+log = logging.getLogger(__name__)
+
+############################################################################
+# Parameter hashing.
+############################################################################
+# Returns the entry's parameters as a sorted list of (identifier, value) pairs.
+def returnEntryParameters(entry):
+    result = []
+    for prop in entry.bl_rna.properties:
+        identifier = prop.identifier
+        if identifier in IGNORED_ENTRY_FIELDS:
+            continue
+        result.append((identifier, getattr(entry, identifier)))
+    result.sort()
+    return result
+
+# Returns a canonical hash of a sorted list of (identifier, value) pairs.
+def returnParametersKey(parameters):
+    canonical = ";".join("%s=%r" % pair for pair in parameters)
+    return hashlib.sha1(canonical.encode("utf-8")).hexdigest()
+
+# Returns a canonical hash of every parameter in the passed cls_AnimSpacGen entry.
+# Two entries with the same key always generate the same spaceship.
+def returnEntryKey(entry):
+    return returnParametersKey(returnEntryParameters(entry))
+
+# Key of one level of detail. Level 0 keeps the plain entry key.
+def returnLodKey(key, level):
+    if level == 0:
+        return key
+    return "%s:lod%i" % (key, level)
+
+# Rough size of a mesh datablock in bytes, used for the cache budget.
+def returnMeshSize(me):
+    return (len(me.vertices) * 32 +
+            len(me.edges) * 16 +
+            len(me.loops) * 16 +
+            len(me.polygons) * 24)
+
+############################################################################
+# LRU mesh cache.
+############################################################################
+class MeshCache:
+    # Maps an entry key to a generated mesh datablock, least recently used first.
+    # Meshes are held by name and re-fetched on every lookup because undo
+    # and file loads invalidate any python reference to a datablock.
+    def __init__(self, budget=MESH_CACHE_BUDGET):
+        self.budget = budget
+        self.entries = OrderedDict()    # key -> [mesh_name, size]
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        item = self.entries.get(key)
+        if item != None:
+            me = bpy.data.meshes.get(item[0])
+            if me != None and me.get(CACHE_KEY_PROPERTY) == key:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return me
+            # The datablock went away or was reused, forget about it.
+            self.discard(key)
+        self.misses += 1
+        return None
+
+    def put(self, key, me):
+        self.discard(key)
+        me[CACHE_KEY_PROPERTY] = key
+        size = returnMeshSize(me)
+        self.entries[key] = [me.name, size]
+        self.size += size
+        self.trim(keep=key)
+
+    def discard(self, key):
+        item = self.entries.pop(key, None)
+        if item != None:
+            self.size -= item[1]
+        return item
+
+    def holds(self, me):
+        # Is the passed mesh the one cached under its own key?
+        key = me.get(CACHE_KEY_PROPERTY)
+        item = self.entries.get(key)
+        return item != None and item[0] == me.name
+
+    def trim(self, keep=None):
+        # Evict least recently used meshes until we are within budget.
+        for key in list(self.entries.keys()):
+            if self.size <= self.budget:
+                break
+            if key == keep:
+                continue
+            self.evict(key)
+
+    def evict(self, key):
+        # Drop the entry and free its mesh unless an object still uses it.
+        mesh_name = self.discard(key)[0]
+        self.evictions += 1
+        me = bpy.data.meshes.get(mesh_name)
+        if me != None and me.users == 0:
+            mesh_pool.release(me)
+
+    def setBudget(self, budget):
+        self.budget = budget
+        self.trim()
+
+    def clear(self):
+        for key in list(self.entries.keys()):
+            self.evict(key)
+
+    def stats(self):
+        return {"entries": len(self.entries),
+                "size": self.size,
+                "budget": self.budget,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions}
+
+############################################################################
+# Mesh datablock pool.
+############################################################################
+class MeshPool:
+    # Transient meshes, the ones generated into, cached or used as scratch,
+    # are emptied in place when dropped and handed out again for the next
+    # generation instead of being removed, so long sessions keep reusing a
+    # few datablocks rather than piling up Mesh.001, Mesh.002... Controllers
+    # own their mesh instead, see returnControllerMesh. Like the cache, the
+    # pool holds names and only takes back meshes nothing else uses.
+    def __init__(self, capacity=MESH_POOL_SIZE):
+        self.capacity = capacity
+        self.names = []
+        self.created = 0
+        self.reused = 0
+        self.leaked = 0
+        self.freed = 0
+
+    def acquire(self):
+        # Returns an empty mesh datablock to generate into.
+        while self.names:
+            me = bpy.data.meshes.get(self.names.pop())
+            if me != None and me.users == 0 and me.get(POOL_PROPERTY) == True:
+                del me[POOL_PROPERTY]
+                self.reused += 1
+                return me
+        self.created += 1
+        return bpy.data.meshes.new('Mesh')
+
+    def release(self, me):
+        # Takes back a mesh the add-on no longer uses. Returns False, and
+        # counts a leak, when something still uses it.
+        if me.users != 0:
+            self.leaked += 1
+            log.debug("Mesh [%s] still has %i users, leaving it alone.", me.name, me.users)
+            return False
+        if me.get(POOL_PROPERTY) == True:
+            return True
+        if len(self.names) >= self.capacity:
+            self.freed += 1
+            removeMeshFromMemory(me.name)
+            return True
+        if CACHE_KEY_PROPERTY in me:
+            del me[CACHE_KEY_PROPERTY]
+        clearMeshGeometry(me)
+        me[POOL_PROPERTY] = True
+        self.names.append(me.name)
+        return True
+
+    def clear(self):
+        # Forget the pooled names, e.g. after loading another file.
+        del self.names[:]
+
+    def stats(self):
+        return {"pooled": len(self.names),
+                "capacity": self.capacity,
+                "created": self.created,
+                "reused": self.reused,
+                "leaked": self.leaked,
+                "freed": self.freed}
+
+mesh_pool = MeshPool()
+mesh_cache = MeshCache()
+
+def reportMeshCache():
+    log.info("Mesh cache: %(entries)i meshes, %(size)i/%(budget)i bytes, "
+             "%(hits)i hits, %(misses)i misses, %(evictions)i evictions.", mesh_cache.stats())
+
+def reportMeshPool():
+    log.info("Mesh pool: %(pooled)i/%(capacity)i pooled, %(created)i created, "
+             "%(reused)i reused, %(leaked)i leaked, %(freed)i freed.", mesh_pool.stats())
+
+############################################################################
+# Controller meshes.
+############################################################################
+# Every controller owns one mesh for its whole life and regeneration
+# refills it in place, so ob.data stays the same datablock. Ships are
+# generated into transient meshes and copied into it. The two properties
+# link controller and mesh both ways, so a duplicate carrying a copy of the
+# object's properties never takes the original's mesh for its own.
+OWNED_MESH_PROPERTY = "asg_mesh"
+MESH_OWNER_PROPERTY = "asg_owner"
+
+def returnOwnedMesh(ob):
+    me = bpy.data.meshes.get(ob.get(OWNED_MESH_PROPERTY, ""))
+    if me != None and me.get(MESH_OWNER_PROPERTY) == ob.name:
+        return me
+    return None
+
+# Controllers sharing ob's own mesh get a copy of their own before it
+# changes, so they keep showing their ship.
+def detachSharingControllers(ob):
+    me = returnOwnedMesh(ob)
+    if me == None or me.users < 2:
+        return
+    for name in list(managedObjectNames):
+        other = bpy.data.objects.get(name)
+        if other != None and other != ob and other.data == me:
+            showControllerMesh(other, me, me.get(CACHE_KEY_PROPERTY))
+
+# Shows me on ob in place of its current mesh.
+def replaceControllerMesh(ob, me):
+    detachSharingControllers(ob)
+    old_mesh = ob.data
+    ob.data = me
+    # A mesh shown by an older version of the add-on goes back to the pool.
+    # Owned meshes wait for their controller to come back to them.
+    if (old_mesh != None and old_mesh.users == 0 and
+            old_mesh.get(MESH_OWNER_PROPERTY) == None and not mesh_cache.holds(old_mesh)):
+        mesh_pool.release(old_mesh)
+
+# Returns the controller's own mesh, shown on it and ready to be refilled,
+# creating it on first use.
+def returnControllerMesh(ob):
+    me = returnOwnedMesh(ob)
+    if me == None:
+        me = bpy.data.meshes.new(ob.name)
+        me[MESH_OWNER_PROPERTY] = ob.name
+        ob[OWNED_MESH_PROPERTY] = me.name
+    if ob.data != me:
+        replaceControllerMesh(ob, me)
+    else:
+        detachSharingControllers(ob)
+    return me
+
+# Refills the controller's own mesh with the geometry of source, a mesh
+# generated or cached for key.
+def showControllerMesh(ob, source, key):
+    me = returnControllerMesh(ob)
+    copyMeshGeometry(source, me)
+    me[CACHE_KEY_PROPERTY] = key
+    return me
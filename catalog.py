@@ -0,0 +1,270 @@
+# AddOn AnimSpacGen (c) 2016 Michael Davies, Atom
+# Animated Spaceship Generator 1.0.1
+# Manages and animates generated geometry.
+# https://github.com/a1studmuffin/SpaceshipGenerator/blob/master/README.md
+# Last Revision 06-27-2016
+
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# Seed catalog. Every seed of a parameter preset is generated once, in a
+# process pool, and what it looks like is recorded in a JSON file:
+#
+#   {"generator_version": "dca34f3c0980d927", "builder": "array",
+#    "presets": {preset key: {"parameters": {...},
+#                             "seeds": {"31": {"length": 4.2, "faces": 9120,
+#                                              "engines": 2, ...}}}}}
+#
+# so seeds can be searched without generating them again. The whole file
+# is dropped when generator.GENERATOR_VERSION or the builder changes.
+# Catalogs are measured on the ships of the builder they are made with:
+# the add-on passes the one it generates with, fleet.py, outside Blender,
+# the array kernel. Only the "bmesh" builder needs bpy, and it is only
+# imported when used.
+
+import os, json, time, hashlib, logging
+import multiprocessing
+
+from .generator import Parameters
+from .generator import GenerationProfile
+from .generator import buildSpaceship
+from .generator import GENERATOR_VERSION
+from .generator import DEFAULT_PARAMETERS
+from .kernel import ArrayBuilder
+
+CATALOG_FILE_NAME = "seed_catalog.json"
+CATALOG_BUILDERS = ("array", "bmesh")
+CATALOG_SEEDS = range(-420, 421)     # The random_seed property's range.
+
+# Parameters that do not change the first level of detail of a seed, or
+# not what the catalog records about it.
+PRESET_IGNORED_PARAMETERS = ("random_seed", "use_lod", "assign_materials",
+                             "apply_bevel_modifier")
+
+# Detail stages counted per ship, see generator.addFaceDetail.
+COUNTED_STAGES = (("engines", "exhaust"),
+                  ("turrets", "weapons"),
+                  ("antennas", "antenna"))
+
+# Query limits: keyword -> (seed statistic, True for a lower bound).
+QUERY_LIMITS = {"min_length": ("length", True),
+                "max_length": ("length", False),
+                "min_width": ("width", True),
+                "max_width": ("width", False),
+                "min_height": ("height", True),
+                "max_height": ("height", False),
+                "max_verts": ("verts", False),
+                "max_faces": ("faces", False),
+                "min_engines": ("engines", True),
+                "min_turrets": ("turrets", True),
+                "min_antennas": ("antennas", True),
+                "max_seconds": ("seconds", False)}
+
+log = logging.getLogger(__name__)
+
+############################################################################
+# Presets.
+############################################################################
+# Returns the generation parameters of a preset as a plain dict, from a
+# dict or a list of (identifier, value) pairs like cache.returnEntryParameters
+# gives. Missing ones take their defaults and floats are rounded, so an
+# entry's single precision values and a preset file's agree on the key.
+def returnPresetParameters(parameters):
+    passed = dict(parameters)
+    result = {}
+    for name, default in DEFAULT_PARAMETERS.items():
+        if name in PRESET_IGNORED_PARAMETERS:
+            continue
+        value = passed.get(name, default)
+        if isinstance(value, float):
+            value = float("%.6g" % value)
+        result[name] = value
+    return result
+
+def returnPresetKey(parameters):
+    canonical = ";".join("%s=%r" % pair for pair in sorted(returnPresetParameters(parameters).items()))
+    return hashlib.sha1(canonical.encode("utf-8")).hexdigest()
+
+# The seed cataloged for seed. The shared random stream seeds random.Random,
+# which takes the absolute value, so seed and -seed build the same ship and
+# only the positive one is cataloged. Independent streams hash the seed as
+# written and tell them apart.
+def returnCatalogSeed(parameters, seed):
+    if dict(parameters).get("independent_streams", False):
+        return seed
+    return abs(seed)
+
+def returnCatalogSeeds(parameters, seeds=CATALOG_SEEDS):
+    return sorted(set(returnCatalogSeed(parameters, seed) for seed in seeds))
+
+############################################################################
+# Statistics.
+############################################################################
+def returnCatalogBuilder(name):
+    if name == "bmesh":
+        from .events import BMeshArraysBuilder
+        return BMeshArraysBuilder()
+    return ArrayBuilder()
+
+# Generates one seed of a preset with the named builder and returns its
+# statistics. The ship is measured along the axes it is built on, X being
+# its length.
+def returnSeedStats(parameters, seed, builder_name="array"):
+    builder = returnCatalogBuilder(builder_name)
+    profile = GenerationProfile(builder)
+    start = time.perf_counter()
+    arrays = buildSpaceship(Parameters(**dict(parameters, random_seed=seed)), builder, profile)
+    seconds = time.perf_counter() - start
+    low = arrays.verts.min(axis=0).tolist()
+    high = arrays.verts.max(axis=0).tolist()
+    result = {"bounds": [low, high],
+              "length": high[0] - low[0],
+              "width": high[1] - low[1],
+              "height": high[2] - low[2],
+              "verts": arrays.num_verts,
+              "faces": arrays.num_faces,
+              "seconds": seconds}
+    # Faces detailed by each counted stage. Symmetry mirrors them afterwards.
+    processed = {}
+    for stage in profile.stages:
+        processed[stage["stage"]] = processed.get(stage["stage"], 0) + stage["processed"]
+    for name, stage in COUNTED_STAGES:
+        result[name] = processed.get(stage, 0)
+    return result
+
+def catalogSeedJob(job):
+    # Runs in a worker, returns (seed, statistics).
+    parameters, seed, builder_name = job
+    return seed, returnSeedStats(parameters, seed, builder_name)
+
+############################################################################
+# Catalog file.
+############################################################################
+class SeedCatalog:
+    # The statistics of every cataloged seed, by preset, measured with the
+    # named builder (see CATALOG_BUILDERS). Loaded once and queried in
+    # memory, written back whenever seeds are added.
+    def __init__(self, path, builder="array"):
+        self.path = path
+        self.builder = builder
+        self.presets = {}
+        self.load()
+
+    def load(self):
+        self.presets = {}
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (IOError, ValueError) as e:
+            log.warning("Unable to read seed catalog [%s]: %s", self.path, e)
+            return
+        if data.get("generator_version") != GENERATOR_VERSION:
+            log.info("Seed catalog [%s] is from generator version %s, starting over.",
+                     self.path, data.get("generator_version"))
+            return
+        if data.get("builder") != self.builder:
+            log.info("Seed catalog [%s] was built with the %s builder, starting over.",
+                     self.path, data.get("builder"))
+            return
+        for key, preset in data.get("presets", {}).items():
+            preset["seeds"] = dict((int(seed), stats) for seed, stats in preset["seeds"].items())
+            self.presets[key] = preset
+
+    def save(self):
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+        data = {"generator_version": GENERATOR_VERSION,
+                "builder": self.builder,
+                "presets": self.presets}
+        # Write aside and swap, an interrupted save keeps the old catalog.
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w") as f:
+            json.dump(data, f, sort_keys=True)
+        os.replace(temp_path, self.path)
+
+    def returnSeeds(self, parameters):
+        # seed -> statistics of the preset, empty when not cataloged.
+        preset = self.presets.get(returnPresetKey(parameters))
+        if preset == None:
+            return {}
+        return preset["seeds"]
+
+    def returnMissingSeeds(self, parameters, seeds=CATALOG_SEEDS):
+        known = self.returnSeeds(parameters)
+        return [seed for seed in returnCatalogSeeds(parameters, seeds) if seed not in known]
+
+    def add(self, parameters, seed_stats):
+        key = returnPresetKey(parameters)
+        preset = self.presets.get(key)
+        if preset == None:
+            preset = self.presets[key] = {"parameters": returnPresetParameters(parameters),
+                                          "seeds": {}}
+        preset["seeds"].update(seed_stats)
+
+    def query(self, parameters, **limits):
+        # Returns the sorted seeds of the preset within every passed limit,
+        # e.g. query(parameters, min_length=6, max_length=8, max_faces=20000,
+        # min_engines=1). See QUERY_LIMITS for the keywords. Only cataloged
+        # seeds are returned, see returnCatalogSeed.
+        checks = []
+        for keyword, value in limits.items():
+            if value == None:
+                continue
+            name, lower = QUERY_LIMITS[keyword]
+            checks.append((name, lower, value))
+        result = []
+        for seed, stats in self.returnSeeds(parameters).items():
+            for name, lower, value in checks:
+                if (stats[name] < value) if lower else (stats[name] > value):
+                    break
+            else:
+                result.append(seed)
+        result.sort()
+        return result
+
+# Catalogs the seeds of the preset the catalog does not know yet, in
+# worker processes (one per core with workers=0), and saves it. Seeds that
+# build the same ship as a cataloged one are skipped. bmesh ships are built
+# in this process, bpy is not usable from workers. Returns the number of
+# seeds added.
+def buildCatalog(catalog, parameters, seeds=CATALOG_SEEDS, workers=0):
+    parameters = returnPresetParameters(parameters)
+    missing = catalog.returnMissingSeeds(parameters, seeds)
+    if not missing:
+        return 0
+    jobs = [(parameters, seed, catalog.builder) for seed in missing]
+    start = time.time()
+    workers = workers or multiprocessing.cpu_count()
+    if catalog.builder == "bmesh":
+        workers = 1
+    if workers > 1:
+        pool = multiprocessing.Pool(workers)
+        try:
+            results = pool.map(catalogSeedJob, jobs, max(1, len(jobs) // (workers * 8)))
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        results = [catalogSeedJob(job) for job in jobs]
+    catalog.add(parameters, dict(results))
+    catalog.save()
+    log.debug("Cataloged %i seeds with %i workers in %.2f s.", len(results), workers, time.time() - start)
+    return len(results)
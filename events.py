@@ -22,14 +22,12 @@
 #
 # ##### END GPL LICENSE BLOCK #####
 
-import bpy, os, time, random, bmesh
+import bpy, bmesh, logging
 from bpy.app.handlers import persistent
 from mathutils import Vector, Matrix
-from math import cos, sin, pi, sqrt, radians
-from mathutils import Vector, Matrix
-from random import random, seed, uniform, randint, randrange
-from enum import IntEnum
-from colorsys import hls_to_rgb
+from math import sqrt, radians
+import multiprocessing
+import numpy as np
 
 #from bpy_extras.object_utils import object_data_add
 #from bpy_extras.image_utils import load_image
@@ -56,20 +54,54 @@ from .util import C_NAME
 from .util import L_NAME
 from .util import T_NAME
 
-from .util import to_console
-from .util import returnObjectNamesLike
+from .util import returnManagedObjectNames
+from .util import managedObjectNames
+from .util import rebuildManagedObjects
+from .util import registerManagedObject
 from .util import removeMeshFromMemory
+from .util import USE_ARRAY_KERNEL
+from .util import LOD_DISTANCES
+from .util import CHECKPOINT_CAPACITY
+from .util import BMESH_BULK_WRITE
+from .util import fillMeshFromArrays
+from .util import DETAIL_WORKERS
+from .util import canStartWorkers
+
+from .cache import mesh_cache
+from .cache import mesh_pool
+from .cache import returnEntryKey
+from .cache import returnLodKey
+from .cache import CACHE_KEY_PROPERTY
+from .cache import showControllerMesh
+from .cache import replaceControllerMesh
+
+from .generator import Material
+from .generator import buildSpaceshipLods
+from .generator import LOD_LEVELS
+from .generator import CheckpointStore
+
+from .profiler import profile_recorder
+from .materials import material_registry
+from .materials import linkMaterials
+
+from . import bake
+from .bake import isBaked
+from .bake import loadBakedFrame
+
+# The array kernel needs numpy, which ships with Blender.
+from .kernel import ArrayBuilder
+from .kernel import FaceMetrics
+from .kernel import MeshArrays
+from .kernel import PrimitiveBatch
+
+log = logging.getLogger(__name__)
 
 ############################################################################
 # Generation code.
 ############################################################################
-class Material(IntEnum):
-    hull = 0            # Plain spaceship hull
-    hull_lights = 1     # Spaceship hull with emissive windows
-    hull_dark = 2       # Plain Spaceship hull, darkened
-    exhaust_burn = 3    # Emissive engine burn material
-    glow_disc = 4       # Emissive landing pad disc material
-    
+# Temporary face layer used by extrude_and_inset_faces.
+CELL_LAYER = "asg_cell"
+
 # Extrudes a face along its normal by translate_forwards units.
 # Returns the new face, and optionally fills out extruded_face_list
 # with all the additional side faces created from the extrusion.
@@ -98,6 +130,29 @@ def ribbed_extrude_face(bm, face, translate_forwards, num_ribs=3, rib_scale=0.9)
         new_face = extrude_face(bm, new_face, translate_forwards_per_rib * 0.25)
     return new_face
 
+# Extrudes all the faces in one extrude_discrete_faces call, then moves
+# each new cap along its normal and scales it about its centre. This is
+# extrude_face followed by a uniform scale_face, without an operator call
+# and matrix inversion per face. Returns the caps in the order of faces.
+def extrude_and_inset_faces(bm, faces, translate_forwards, scale):
+    if not faces:
+        return []
+    # Caps copy the custom data of their face, use that to match them up.
+    # The layer is added when the bmesh is created: adding or removing a
+    # layer can invalidate the faces we are holding.
+    layer = bm.faces.layers.int[CELL_LAYER]
+    for i, face in enumerate(faces):
+        face[layer] = i
+    caps = [None] * len(faces)
+    for cap in bmesh.ops.extrude_discrete_faces(bm, faces=faces)['faces']:
+        caps[cap[layer]] = cap
+    for cap in caps:
+        offset = cap.normal * translate_forwards
+        center = cap.calc_center_bounds()
+        for vert in cap.verts:
+            vert.co = center + offset + (vert.co - center) * scale
+    return caps
+
 # Scales a face in local face space. Ace!
 def scale_face(bm, face, scale_x, scale_y, scale_z):
     face_space = get_face_matrix(face)
@@ -161,62 +216,55 @@ def is_rear_face(face):
 
 # Given a face, splits it into a uniform grid and extrudes each grid face
 # out and back in again, making an exhaust shape.
-def add_exhaust_to_face(bm, face):
+def add_exhaust_to_face(bm, face, rng):
     if not face.is_valid:
         return
     
     # The more square the face is, the more grid divisions it might have
-    num_cuts = randint(1, int(4 - get_aspect_ratio(face)))
+    num_cuts = rng.randint(1, int(4 - get_aspect_ratio(face)))
     result = bmesh.ops.subdivide_edges(bm,
                                     edges=face.edges[:],
                                     cuts=num_cuts,
                                     fractal=0.02,
                                     use_grid_fill=True)
                                     
-    exhaust_length = uniform(0.1, 0.2)
-    scale_outer = 1 / uniform(1.3, 1.6)
-    scale_inner = 1 / uniform(1.05, 1.1)
-    for face in result['geom']:
-        if isinstance(face, bmesh.types.BMFace):
-            if is_rear_face(face):
-                face.material_index = Material.hull_dark
-                face = extrude_face(bm, face, exhaust_length)
-                scale_face(bm, face, scale_outer, scale_outer, scale_outer)
-                extruded_face_list = []
-                face = extrude_face(bm, face, -exhaust_length * 0.9, extruded_face_list)
-                for extruded_face in extruded_face_list:
-                    extruded_face.material_index = Material.exhaust_burn
-                scale_face(bm, face, scale_inner, scale_inner, scale_inner)
+    exhaust_length = rng.uniform(0.1, 0.2)
+    scale_outer = 1 / rng.uniform(1.3, 1.6)
+    scale_inner = 1 / rng.uniform(1.05, 1.1)
+    cells = [face for face in result['geom'] if isinstance(face, bmesh.types.BMFace) and is_rear_face(face)]
+    for face in cells:
+        face.material_index = Material.hull_dark
+    caps = extrude_and_inset_faces(bm, cells, exhaust_length, scale_outer)
+    caps = extrude_and_inset_faces(bm, caps, -exhaust_length * 0.9, scale_inner)
+    for face in caps:
+        face.material_index = Material.exhaust_burn
 
 # Given a face, splits it up into a smaller uniform grid and extrudes each grid cell.
-def add_grid_to_face(bm, face):
+def add_grid_to_face(bm, face, rng):
     if not face.is_valid:
         return
     result = bmesh.ops.subdivide_edges(bm,
                                     edges=face.edges[:],
-                                    cuts=randint(2, 4),
+                                    cuts=rng.randint(2, 4),
                                     fractal=0.02,
                                     use_grid_fill=True,
                                     use_single_edge=False)
-    grid_length = uniform(0.025, 0.15)
+    grid_length = rng.uniform(0.025, 0.15)
     scale = 0.8
-    for face in result['geom']:
-        if isinstance(face, bmesh.types.BMFace):
-            material_index = Material.hull_lights if random() > 0.5 else Material.hull
-            extruded_face_list = []
-            face = extrude_face(bm, face, grid_length, extruded_face_list)
-            for extruded_face in extruded_face_list:
-                if abs(face.normal.z) < 0.707: # side face
-                    extruded_face.material_index = material_index
-            scale_face(bm, face, scale, scale, scale)
+    cells = [face for face in result['geom'] if isinstance(face, bmesh.types.BMFace)]
+    materials = [Material.hull_lights if rng.random() > 0.5 else Material.hull for face in cells]
+    caps = extrude_and_inset_faces(bm, cells, grid_length, scale)
+    for face, material_index in zip(caps, materials):
+        if abs(face.normal.z) < 0.707: # side face
+            face.material_index = material_index
 
 # Given a face, adds some cylinders along it in a grid pattern.
-def add_cylinders_to_face(bm, face):
+def add_cylinders_to_face(primitives, face, rng):
     if not face.is_valid or len(face.verts[:]) < 4:
         return
-    horizontal_step = randint(1, 3)
-    vertical_step = randint(1, 3)
-    num_segments = randint(6, 12)
+    horizontal_step = rng.randint(1, 3)
+    vertical_step = rng.randint(1, 3)
+    num_segments = rng.randint(6, 12)
     face_width, face_height = get_face_width_and_height(face)
     cylinder_depth = 1.3 * min(face_width / (horizontal_step + 2),
                                face_height / (vertical_step + 2))
@@ -230,22 +278,20 @@ def add_cylinders_to_face(bm, face):
             pos = top.lerp(bottom, (v + 1) / float(vertical_step + 1))
             cylinder_matrix = get_face_matrix(face, pos) * \
                 Matrix.Rotation(radians(90), 3, 'X').to_4x4()
-            bmesh.ops.create_cone(bm,
-                                  cap_ends=True,
-                                  cap_tris=False,
-                                  segments=num_segments,
-                                  diameter1=cylinder_size,
-                                  diameter2=cylinder_size,
-                                  depth=cylinder_depth,
-                                  matrix=cylinder_matrix)
+            primitives.add_cone(cap_ends=True,
+                                segments=num_segments,
+                                diameter1=cylinder_size,
+                                diameter2=cylinder_size,
+                                depth=cylinder_depth,
+                                matrix=cylinder_matrix)
 
 # Given a face, adds some weapon turrets to it in a grid pattern.
 # Each turret will have a random orientation.
-def add_weapons_to_face(bm, face):
+def add_weapons_to_face(primitives, face, rng):
     if not face.is_valid or len(face.verts[:]) < 4:
         return
-    horizontal_step = randint(1, 2)
-    vertical_step = randint(1, 2)
+    horizontal_step = rng.randint(1, 2)
+    vertical_step = rng.randint(1, 2)
     num_segments = 16
     face_width, face_height = get_face_width_and_height(face)
     weapon_size = 0.5 * min(face_width / (horizontal_step + 2),
@@ -259,492 +305,604 @@ def add_weapons_to_face(bm, face):
         for v in range(vertical_step):
             pos = top.lerp(bottom, (v + 1) / float(vertical_step + 1))
             face_matrix = get_face_matrix(face, pos + face.normal * weapon_depth * 0.5) * \
-                Matrix.Rotation(radians(uniform(0, 90)), 3, 'Z').to_4x4()
+                Matrix.Rotation(radians(rng.uniform(0, 90)), 3, 'Z').to_4x4()
 
             # Turret foundation
-            bmesh.ops.create_cone(bm,
-                                  cap_ends=True,
-                                  cap_tris=False,
-                                  segments=num_segments,
-                                  diameter1=weapon_size * 0.9,
-                                  diameter2=weapon_size,
-                                  depth=weapon_depth,
-                                  matrix=face_matrix)
+            primitives.add_cone(cap_ends=True,
+                                segments=num_segments,
+                                diameter1=weapon_size * 0.9,
+                                diameter2=weapon_size,
+                                depth=weapon_depth,
+                                matrix=face_matrix)
 
             # Turret left guard
             left_guard_mat = face_matrix * \
                 Matrix.Rotation(radians(90), 3, 'Y').to_4x4() * \
                 Matrix.Translation(Vector((0, 0, weapon_size * 0.6))).to_4x4()
-            bmesh.ops.create_cone(bm,
-                                  cap_ends=True,
-                                  cap_tris=False,
-                                  segments=num_segments,
-                                  diameter1=weapon_size * 0.6,
-                                  diameter2=weapon_size * 0.5,
-                                  depth=weapon_depth * 2,
-                                  matrix=left_guard_mat)
+            primitives.add_cone(cap_ends=True,
+                                segments=num_segments,
+                                diameter1=weapon_size * 0.6,
+                                diameter2=weapon_size * 0.5,
+                                depth=weapon_depth * 2,
+                                matrix=left_guard_mat)
 
             # Turret right guard
             right_guard_mat = face_matrix * \
                 Matrix.Rotation(radians(90), 3, 'Y').to_4x4() * \
                 Matrix.Translation(Vector((0, 0, weapon_size * -0.6))).to_4x4()
-            bmesh.ops.create_cone(bm,
-                                  cap_ends=True,
-                                  cap_tris=False,
-                                  segments=num_segments,
-                                  diameter1=weapon_size * 0.5,
-                                  diameter2=weapon_size * 0.6,
-                                  depth=weapon_depth * 2,
-                                  matrix=right_guard_mat)
+            primitives.add_cone(cap_ends=True,
+                                segments=num_segments,
+                                diameter1=weapon_size * 0.5,
+                                diameter2=weapon_size * 0.6,
+                                depth=weapon_depth * 2,
+                                matrix=right_guard_mat)
 
             # Turret housing
-            upward_angle = uniform(0, 45)
+            upward_angle = rng.uniform(0, 45)
             turret_house_mat = face_matrix * \
                 Matrix.Rotation(radians(upward_angle), 3, 'X').to_4x4() * \
                 Matrix.Translation(Vector((0, weapon_size * -0.4, 0))).to_4x4()
-            bmesh.ops.create_cone(bm,
-                                  cap_ends=True,
-                                  cap_tris=False,
-                                  segments=8,
-                                  diameter1=weapon_size * 0.4,
-                                  diameter2=weapon_size * 0.4,
-                                  depth=weapon_depth * 5,
-                                  matrix=turret_house_mat)
+            primitives.add_cone(cap_ends=True,
+                                segments=8,
+                                diameter1=weapon_size * 0.4,
+                                diameter2=weapon_size * 0.4,
+                                depth=weapon_depth * 5,
+                                matrix=turret_house_mat)
 
             # Turret barrels L + R
-            bmesh.ops.create_cone(bm,
-                                  cap_ends=True,
-                                  cap_tris=False,
-                                  segments=8,
-                                  diameter1=weapon_size * 0.1,
-                                  diameter2=weapon_size * 0.1,
-                                  depth=weapon_depth * 6,
-                                  matrix=turret_house_mat * \
-                                         Matrix.Translation(Vector((weapon_size * 0.2, 0, -weapon_size))).to_4x4())
-            bmesh.ops.create_cone(bm,
-                                  cap_ends=True,
-                                  cap_tris=False,
-                                  segments=8,
-                                  diameter1=weapon_size * 0.1,
-                                  diameter2=weapon_size * 0.1,
-                                  depth=weapon_depth * 6,
-                                  matrix=turret_house_mat * \
-                                         Matrix.Translation(Vector((weapon_size * -0.2, 0, -weapon_size))).to_4x4())
+            primitives.add_cone(cap_ends=True,
+                                segments=8,
+                                diameter1=weapon_size * 0.1,
+                                diameter2=weapon_size * 0.1,
+                                depth=weapon_depth * 6,
+                                matrix=turret_house_mat * \
+                                       Matrix.Translation(Vector((weapon_size * 0.2, 0, -weapon_size))).to_4x4())
+            primitives.add_cone(cap_ends=True,
+                                segments=8,
+                                diameter1=weapon_size * 0.1,
+                                diameter2=weapon_size * 0.1,
+                                depth=weapon_depth * 6,
+                                matrix=turret_house_mat * \
+                                       Matrix.Translation(Vector((weapon_size * -0.2, 0, -weapon_size))).to_4x4())
 
 # Given a face, adds a sphere on the surface, partially inset.
-def add_sphere_to_face(bm, face):
+def add_sphere_to_face(primitives, face, rng):
     if not face.is_valid:
         return
     face_width, face_height = get_face_width_and_height(face)
-    sphere_size = uniform(0.4, 1.0) * min(face_width, face_height)
+    sphere_size = rng.uniform(0.4, 1.0) * min(face_width, face_height)
     sphere_matrix = get_face_matrix(face,
                                     face.calc_center_bounds() - face.normal * \
-                                    uniform(0, sphere_size * 0.5))
-    result = bmesh.ops.create_icosphere(bm,
-                                        subdivisions=3,
-                                        diameter=sphere_size,
-                                        matrix=sphere_matrix)
-    for vert in result['verts']:
-        for face in vert.link_faces:
-            face.material_index = Material.hull
+                                    rng.uniform(0, sphere_size * 0.5))
+    primitives.add_icosphere(subdivisions=3,
+                             diameter=sphere_size,
+                             matrix=sphere_matrix,
+                             material=Material.hull)
 
 # Given a face, adds some pointy intimidating antennas.
-def add_surface_antenna_to_face(bm, face):
+def add_surface_antenna_to_face(primitives, face, rng):
     if not face.is_valid or len(face.verts[:]) < 4:
         return
-    horizontal_step = randint(4, 10)
-    vertical_step = randint(4, 10)
+    horizontal_step = rng.randint(4, 10)
+    vertical_step = rng.randint(4, 10)
     for h in range(horizontal_step):
         top = face.verts[0].co.lerp(
             face.verts[1].co, (h + 1) / float(horizontal_step + 1))
         bottom = face.verts[3].co.lerp(
             face.verts[2].co, (h + 1) / float(horizontal_step + 1))
         for v in range(vertical_step):
-            if random() > 0.9:
+            if rng.random() > 0.9:
                 pos = top.lerp(bottom, (v + 1) / float(vertical_step + 1))
                 face_size = sqrt(face.calc_area())
-                depth = uniform(0.1, 1.5) * face_size
-                depth_short = depth * uniform(0.02, 0.15)
-                base_diameter = uniform(0.005, 0.05)
+                depth = rng.uniform(0.1, 1.5) * face_size
+                depth_short = depth * rng.uniform(0.02, 0.15)
+                base_diameter = rng.uniform(0.005, 0.05)
 
-                material_index = Material.hull if random() > 0.5 else Material.hull_dark
+                material_index = Material.hull if rng.random() > 0.5 else Material.hull_dark
 
                 # Spire
-                num_segments = uniform(3, 6)
-                result = bmesh.ops.create_cone(bm,
-                                               cap_ends=False,
-                                               cap_tris=False,
-                                               segments=num_segments,
-                                               diameter1=0,
-                                               diameter2=base_diameter,
-                                               depth=depth,
-                                               matrix=get_face_matrix(face, pos + face.normal * depth * 0.5))
-                for vert in result['verts']:
-                    for vert_face in vert.link_faces:
-                        vert_face.material_index = material_index
+                num_segments = rng.uniform(3, 6)
+                primitives.add_cone(cap_ends=False,
+                                    segments=num_segments,
+                                    diameter1=0,
+                                    diameter2=base_diameter,
+                                    depth=depth,
+                                    matrix=get_face_matrix(face, pos + face.normal * depth * 0.5),
+                                    material=material_index)
 
                 # Base
-                result = bmesh.ops.create_cone(bm,
-                                               cap_ends=True,
-                                               cap_tris=False,
-                                               segments=num_segments,
-                                               diameter1=base_diameter * uniform(1, 1.5),
-                                               diameter2=base_diameter * uniform(1.5, 2),
-                                               depth=depth_short,
-                                               matrix=get_face_matrix(face, pos + face.normal * depth_short * 0.45))
-                for vert in result['verts']:
-                    for vert_face in vert.link_faces:
-                        vert_face.material_index = material_index
+                primitives.add_cone(cap_ends=True,
+                                    segments=num_segments,
+                                    diameter1=base_diameter * rng.uniform(1, 1.5),
+                                    diameter2=base_diameter * rng.uniform(1.5, 2),
+                                    depth=depth_short,
+                                    matrix=get_face_matrix(face, pos + face.normal * depth_short * 0.45),
+                                    material=material_index)
 
 # Given a face, adds a glowing "landing pad" style disc.
-def add_disc_to_face(bm, face):
+def add_disc_to_face(primitives, face, rng):
     if not face.is_valid:
         return
     face_width, face_height = get_face_width_and_height(face)
     depth = 0.125 * min(face_width, face_height)
-    bmesh.ops.create_cone(bm,
-                          cap_ends=True,
-                          cap_tris=False,
-                          segments=32,
-                          diameter1=depth * 3,
-                          diameter2=depth * 4,
-                          depth=depth,
-                          matrix=get_face_matrix(face, face.calc_center_bounds() + face.normal * depth * 0.5))
-    result = bmesh.ops.create_cone(bm,
-                                   cap_ends=False,
-                                   cap_tris=False,
-                                   segments=32,
-                                   diameter1=depth * 1.25,
-                                   diameter2=depth * 2.25,
-                                   depth=0.0,
-                                   matrix=get_face_matrix(face, face.calc_center_bounds() + face.normal * depth * 1.05))
-    for vert in result['verts']:
-        for face in vert.link_faces:
-            face.material_index = Material.glow_disc
-    
+    primitives.add_cone(cap_ends=True,
+                        segments=32,
+                        diameter1=depth * 3,
+                        diameter2=depth * 4,
+                        depth=depth,
+                        matrix=get_face_matrix(face, face.calc_center_bounds() + face.normal * depth * 0.5))
+    primitives.add_cone(cap_ends=False,
+                        segments=32,
+                        diameter1=depth * 1.25,
+                        diameter2=depth * 2.25,
+                        depth=0.0,
+                        matrix=get_face_matrix(face, face.calc_center_bounds() + face.normal * depth * 1.05),
+                        material=Material.glow_disc)
+
+# Builds the generator recipe (generator.buildSpaceship) into a BMesh
+# using the helpers above.
+class BMeshBuilder:
+    def __init__(self):
+        self.bm = bmesh.new()
+        self.bm.faces.layers.int.new(CELL_LAYER)
+        self.primitives = PrimitiveBatch()
+
+    def create_cube(self, scale):
+        bmesh.ops.create_cube(self.bm, size=1)
+        bmesh.ops.scale(self.bm, vec=Vector(scale), verts=self.bm.verts)
+
+    def faces(self):
+        return self.bm.faces[:]
+
+    def is_valid(self, face):
+        return face.is_valid
+
+    def normal(self, face):
+        return face.normal
+
+    def center(self, face):
+        return face.calc_center_bounds()
+
+    def aspect_ratio(self, face):
+        return get_aspect_ratio(face)
+
+    def neighbourhood(self, face):
+        sizes = [len(other.verts) for edge in face.edges for other in edge.link_faces if other != face]
+        return len(face.verts), sizes
+
+    def face_metrics(self, faces):
+        # Read each face once; everything derived from these is vectorized.
+        normals = []
+        centers = []
+        edge_lengths = []
+        for face in faces:
+            normals.append(face.normal[:])
+            centers.append(face.calc_center_bounds()[:])
+            edges = face.edges
+            edge_lengths.append((edges[0].calc_length(), edges[1].calc_length()))
+        return FaceMetrics(np.array(normals).reshape(-1, 3),
+                           np.array(centers).reshape(-1, 3),
+                           np.array(edge_lengths).reshape(-1, 2))
+
+    def set_material(self, face, index):
+        face.material_index = index
+
+    def extrude(self, face, distance):
+        return extrude_face(self.bm, face, distance)
+
+    def ribbed_extrude(self, face, distance, num_ribs, rib_scale):
+        return ribbed_extrude_face(self.bm, face, distance, num_ribs, rib_scale)
+
+    def scale(self, face, scale_x, scale_y, scale_z):
+        scale_face(self.bm, face, scale_x, scale_y, scale_z)
+
+    def translate(self, face, vec):
+        bmesh.ops.translate(self.bm, vec=Vector(vec), verts=face.verts)
+
+    def rotate_y(self, face, angle):
+        bmesh.ops.rotate(self.bm,
+                         verts=face.verts,
+                         cent=(0, 0, 0),
+                         matrix=Matrix.Rotation(radians(angle), 3, 'Y'))
+
+    def add_exhaust(self, face, rng):
+        add_exhaust_to_face(self.bm, face, rng)
+
+    def add_grid(self, face, rng):
+        add_grid_to_face(self.bm, face, rng)
+
+    def add_surface_antenna(self, face, rng):
+        add_surface_antenna_to_face(self.primitives, face, rng)
+
+    def add_weapons(self, face, rng):
+        add_weapons_to_face(self.primitives, face, rng)
+
+    def add_sphere(self, face, rng):
+        add_sphere_to_face(self.primitives, face, rng)
+
+    def add_disc(self, face, rng):
+        add_disc_to_face(self.primitives, face, rng)
+
+    def add_cylinders(self, face, rng):
+        add_cylinders_to_face(self.primitives, face, rng)
+
+    def add_details(self, stage, faces, seeds):
+        # bmesh can't leave Blender's process, always detail face by face.
+        return False
+
+    def place_primitives(self):
+        # Stamp the queued primitives from the kernel's templates, which
+        # match create_cone/create_icosphere, through a scratch mesh: one
+        # append per stage instead of an operator call per primitive.
+        if len(self.primitives) == 0:
+            return
+        scratch = fillMeshFromArrays(mesh_pool.acquire(), arraysFromFaces(*self.primitives.build()))
+        self.bm.from_mesh(scratch)
+        mesh_pool.release(scratch)
+
+    def symmetrize(self, direction):
+        bm = self.bm
+        bmesh.ops.symmetrize(bm, input=bm.verts[:] + bm.edges[:] + bm.faces[:], direction=direction)
+
+    def fork(self):
+        # An independent builder carrying on from the current bmesh.
+        # bm.copy() keeps the element order, so faces() lines up.
+        other = type(self)()
+        other.bm.free()
+        other.bm = self.bm.copy()
+        return other
+
+    def restore(self, snapshot):
+        # Carries on from a copy of another builder's bmesh.
+        self.bm.free()
+        self.bm = snapshot.bm.copy()
+
+    def set_level(self, level):
+        self.primitives.set_level(level)
+
+    def counts(self):
+        # Includes primitives queued but not yet placed.
+        verts, faces = self.primitives.counts()
+        return len(self.bm.verts) + verts, len(self.bm.faces) + faces
+
+    def finish(self):
+        # Finish up, write the bmesh into a pooled mesh
+        me = mesh_pool.acquire()
+        self.bm.faces.layers.int.remove(self.bm.faces.layers.int[CELL_LAYER])
+        if BMESH_BULK_WRITE:
+            fillMeshFromArrays(me, arraysFromBMesh(self.bm))
+        else:
+            self.bm.to_mesh(me)
+        self.bm.free()
+        return me
+
+# Flattens a bmesh into kernel.MeshArrays for fillMeshFromArrays.
+def arraysFromBMesh(bm):
+    bm.verts.index_update()
+    faces = bm.faces
+    verts = np.array([v.co[:] for v in bm.verts], dtype=np.float32).reshape(-1, 3)
+    loop_totals = np.array([len(f.verts) for f in faces], dtype=np.int32)
+    loops = np.array([v.index for f in faces for v in f.verts], dtype=np.int32)
+    loop_starts = np.zeros(len(loop_totals), dtype=np.int32)
+    if len(loop_totals) > 1:
+        loop_starts[1:] = np.cumsum(loop_totals)[:-1]
+    materials = np.array([f.material_index for f in faces], dtype=np.int32)
+    return MeshArrays(verts, loops, loop_starts, loop_totals, materials)
+
+# Packs (verts, faces, materials) lists into kernel.MeshArrays.
+def arraysFromFaces(verts, faces, materials):
+    loop_totals = np.array([len(face) for face in faces], dtype=np.int32)
+    loops = np.array([i for face in faces for i in face], dtype=np.int32)
+    loop_starts = np.zeros(len(loop_totals), dtype=np.int32)
+    if len(loop_totals) > 1:
+        loop_starts[1:] = np.cumsum(loop_totals)[:-1]
+    return MeshArrays(verts, loops, loop_starts, loop_totals, np.array(materials, dtype=np.int32))
+
+# A BMeshBuilder that finishes into kernel.MeshArrays instead of a mesh.
+class BMeshArraysBuilder(BMeshBuilder):
+    def finish(self):
+        arrays = arraysFromBMesh(self.bm)
+        self.bm.free()
+        return arrays
+
+# Writes the arrays returned by kernel.ArrayBuilder.finish() into a pooled mesh.
+def meshFromArrays(arrays):
+    return fillMeshFromArrays(mesh_pool.acquire(), arrays)
+
+# Hull and asymmetry snapshots, so edits that only touch the later stages
+# do not build the hull again.
+checkpoint_store = CheckpointStore(CHECKPOINT_CAPACITY)
+
+# Worker processes the array kernel hands detail stages to, started on
+# first use. Off by default: it only starts with util.USE_ARRAY_KERNEL,
+# DETAIL_WORKERS > 0 and workers that fork (see util.canStartWorkers), and
+# only details entries with independent random streams. Everything else
+# is detailed in-process.
+detail_pool = None
+
+def returnDetailPool():
+    global detail_pool
+    if detail_pool == None and DETAIL_WORKERS > 0 and canStartWorkers():
+        detail_pool = multiprocessing.Pool(DETAIL_WORKERS)
+    return detail_pool
+
+def closeDetailPool():
+    global detail_pool
+    if detail_pool != None:
+        detail_pool.close()
+        detail_pool.join()
+        detail_pool = None
+
+# Generates one mesh per passed generator.LodLevel in a single pass,
+# most detailed first.
+def generateSpaceshipLods(entry, levels=LOD_LEVELS):
+    if USE_ARRAY_KERNEL:
+        # Build on plain arrays, then convert into meshes in one go.
+        builder = ArrayBuilder(returnDetailPool() if entry.independent_streams else None)
+        profile = profile_recorder.begin(builder)
+        meshes = [meshFromArrays(arrays) for arrays in buildSpaceshipLods(entry, builder, levels, profile, checkpoint_store)]
+        profile.mark("to_mesh", counted=False)
+    else:
+        builder = BMeshBuilder()
+        profile = profile_recorder.begin(builder)
+        meshes = buildSpaceshipLods(entry, builder, levels, profile, checkpoint_store)
+    profile_recorder.record(entry.id_data.name, profile,
+                            seed=entry.random_seed,
+                            kernel="array" if USE_ARRAY_KERNEL else "bmesh",
+                            levels=len(levels))
+    return meshes
+
+# Generates the entry's ship with the builder live generation uses and
+# returns it as kernel.MeshArrays, e.g. for bake files.
+def generateSpaceshipArrays(entry):
+    builder = ArrayBuilder() if USE_ARRAY_KERNEL else BMeshArraysBuilder()
+    return buildSpaceshipLods(entry, builder, LOD_LEVELS[:1])[0]
+
 # Generates a textured spaceship mesh and returns the object.
 # Just uses global cube texture coordinates rather than generating UVs.
 # Takes an optional random seed value to generate a specific spaceship.
 # Allows overriding of some parameters that affect generation.
 def generateSpaceship(entry):
-    seed(entry.random_seed)
-
-    num_hull_segments_min = entry.num_hull_segments_min
-    num_hull_segments_max = entry.num_hull_segments_max
-    num_asymmetry_segments_min = entry.num_asymmetry_segments_min
-    num_asymmetry_segments_max = entry.num_asymmetry_segments_max
-
-    create_asymmetry_segments = entry.create_asymmetry_segments
-    create_face_detail = entry.create_face_detail
-    allow_horizontal_symmetry = entry.allow_horizontal_symmetry
-    allow_vertical_symmetry = entry.allow_vertical_symmetry
-    apply_bevel_modifier = entry.apply_bevel_modifier
-    assign_materials = entry.assign_materials
-
-
-    # Let's start with a unit BMesh cube scaled randomly
-    bm = bmesh.new()
-    bmesh.ops.create_cube(bm, size=1)
-    scale_vector = Vector(
-        (uniform(0.75, 2.0), uniform(0.75, 2.0), uniform(0.75, 2.0)))
-    bmesh.ops.scale(bm, vec=scale_vector, verts=bm.verts)
-
-    # Extrude out the hull along the X axis, adding some semi-random perturbations
-    for face in bm.faces[:]:
-        if abs(face.normal.x) > entry.rnd_normal_chance:
-            hull_segment_length = uniform(0.3, 1)
-            num_hull_segments = randrange(num_hull_segments_min, num_hull_segments_max)
-            hull_segment_range = range(num_hull_segments)
-            for i in hull_segment_range:
-                is_last_hull_segment = i == hull_segment_range[-1]
-                val = random()
-                if val > entry.rnd_extrusion_chance:
-                    # Most of the time, extrude out the face with some random deviations
-                    face = extrude_face(bm, face, hull_segment_length)
-                    if random() > entry.rnd_extrusion_deviation_chance:
-                        face = extrude_face(bm, face, hull_segment_length * 0.25)
-
-                    # Maybe apply some scaling
-                    if random() > entry.rnd_scaling_chance:
-                        sy = uniform(1.2, 1.5)
-                        sz = uniform(1.2, 1.5)
-                        if is_last_hull_segment or random() > 0.5:
-                            sy = 1 / sy
-                            sz = 1 / sz
-                        scale_face(bm, face, 1, sy, sz)
-
-                    # Maybe apply some sideways translation
-                    if random() > entry.rnd_side_trans_chance:
-                        sideways_translation = Vector(
-                            (0, 0, uniform(0.1, 0.4) * scale_vector.z * hull_segment_length))
-                        if random() > 0.5:
-                            sideways_translation = -sideways_translation
-                        bmesh.ops.translate(bm, vec=sideways_translation, verts=face.verts)
-
-                    # Maybe add some rotation around Y axis
-                    if random() > entry.rnd_roty_chance:
-                        angle = 5
-                        if random() > 0.5:
-                            angle = -angle
-                        bmesh.ops.rotate(bm,
-                                         verts=face.verts,
-                                         cent=(0, 0, 0),
-                                         matrix=Matrix.Rotation(radians(angle), 3, 'Y'))
-                else:
-                    # Rarely, create a ribbed section of the hull
-                    rib_scale = uniform(0.75, 0.95)
-                    face = ribbed_extrude_face(bm, face, hull_segment_length, randint(2, 4), rib_scale)
-
-    # Add some large asynmmetrical sections of the hull that stick out
-    if create_asymmetry_segments:
-        for face in bm.faces[:]:
-            # Skip any long thin faces as it'll probably look stupid
-            if get_aspect_ratio(face) > 4:
-                continue
-            if random() > 0.85:
-                hull_piece_length = uniform(0.1, 0.4)
-                for i in range(randrange(num_asymmetry_segments_min, num_asymmetry_segments_max)):
-                    face = extrude_face(bm, face, hull_piece_length)
-
-                    # Maybe apply some scaling
-                    if random() > 0.25:
-                        s = 1 / uniform(1.1, 1.5)
-                        scale_face(bm, face, s, s, s)
-
-    # Now the basic hull shape is built, let's categorize + add detail to all the faces
-    if create_face_detail:
-        engine_faces = []
-        grid_faces = []
-        antenna_faces = []
-        weapon_faces = []
-        sphere_faces = []
-        disc_faces = []
-        cylinder_faces = []
-        for face in bm.faces[:]:
-            # Skip any long thin faces as it'll probably look stupid
-            if get_aspect_ratio(face) > 3:
-                continue
-                
-            # Spin the wheel! Let's categorize + assign some materials
-            val = random()
-            if is_rear_face(face):  # rear face
-                if not engine_faces or val > 0.75:
-                    engine_faces.append(face)
-                elif val > 0.5:
-                    cylinder_faces.append(face)
-                elif val > 0.25:
-                    grid_faces.append(face)
-                else:
-                    face.material_index = Material.hull_lights
-            elif face.normal.x > 0.9:  # front face
-                if face.normal.dot(face.calc_center_bounds()) > 0 and val > 0.7:
-                    antenna_faces.append(face)  # front facing antenna
-                    face.material_index = Material.hull_lights
-                elif val > 0.4:
-                    grid_faces.append(face)
-                else:
-                    face.material_index = Material.hull_lights
-            elif face.normal.z > 0.9:  # top face
-                if face.normal.dot(face.calc_center_bounds()) > 0 and val > 0.7:
-                    antenna_faces.append(face)  # top facing antenna
-                elif val > 0.6:
-                    grid_faces.append(face)
-                elif val > 0.3:
-                    cylinder_faces.append(face)
-            elif face.normal.z < -0.9:  # bottom face
-                if val > 0.75:
-                    disc_faces.append(face)
-                elif val > 0.5:
-                    grid_faces.append(face)
-                elif val > 0.25:
-                    weapon_faces.append(face)
-            elif abs(face.normal.y) > 0.9:  # side face
-                if not weapon_faces or val > 0.75:
-                    weapon_faces.append(face)
-                elif val > 0.6:
-                    grid_faces.append(face)
-                elif val > 0.4:
-                    sphere_faces.append(face)
-                else:
-                    face.material_index = Material.hull_lights
-
-        # Now we've categorized, let's actually add the detail
-        for face in engine_faces:
-            add_exhaust_to_face(bm, face)
-
-        for face in grid_faces:
-            add_grid_to_face(bm, face)
-
-        for face in antenna_faces:
-            add_surface_antenna_to_face(bm, face)
-
-        for face in weapon_faces:
-            add_weapons_to_face(bm, face)
-
-        for face in sphere_faces:
-            add_sphere_to_face(bm, face)
-
-        for face in disc_faces:
-            add_disc_to_face(bm, face)
-
-        for face in cylinder_faces:
-            add_cylinders_to_face(bm, face)
-
-    # Apply horizontal symmetry sometimes
-    if allow_horizontal_symmetry and random() > 0.5:
-        bmesh.ops.symmetrize(bm, input=bm.verts[:] + bm.edges[:] + bm.faces[:], direction=1)
-
-    # Apply vertical symmetry sometimes - this can cause spaceship "islands", so disabled by default
-    if allow_vertical_symmetry and random() > 0.5:
-        bmesh.ops.symmetrize(bm, input=bm.verts[:] + bm.edges[:] + bm.faces[:], direction=2)
-
-    # Finish up, write the bmesh into a new mesh
-    me = bpy.data.meshes.new('Mesh')
-    bm.to_mesh(me)
-    bm.free()
-
-    '''
-    # Add the mesh to the scene
-    scene = bpy.context.scene
-    obj = bpy.data.objects.new('Spaceship', me)
-    scene.objects.link(obj)
-
-    # Select and make active
-    scene.objects.active = obj
-    obj.select = True
-
-    # Recenter the object to its center of mass
-    bpy.ops.object.origin_set(type='ORIGIN_CENTER_OF_MASS')
-    ob = bpy.context.object
-    ob.location = (0, 0, 0)
-
-    # Add a fairly broad bevel modifier to angularize shape
-    if apply_bevel_modifier:
-        bevel_modifier = ob.modifiers.new('Bevel', 'BEVEL')
-        bevel_modifier.width = uniform(5, 20)
-        bevel_modifier.offset_type = 'PERCENT'
-        bevel_modifier.segments = 2
-        bevel_modifier.profile = 0.25
-        bevel_modifier.limit_method = 'NONE'
-
-    # Add materials to the spaceship
-    me = ob.data
-    materials = create_materials()
-    for mat in materials:
-        if assign_materials:
-            me.materials.append(mat)
-        else:
-            me.materials.append(bpy.data.materials.new(name="Material"))
-    '''
+    me = generateSpaceshipLods(entry, LOD_LEVELS[:1])[0]
     return me
 
-############################################################################
-# frameChange code.
-############################################################################
-def frameChangeAnimSpacGen(scene):
-    global isBusy, isRendering, lastFrameUpdated, frameChangeCount
+# Objects whose parameters changed since they were last generated.
+# Maps an object name to the set of its stale entry paths.
+dirtyAnimSpacGen = {}
 
-    if scene != None:
-        if isBusy == False:
-            isBusy = True
-            cf = scene.frame_current
+# Only the first entry in the list drives the generated mesh.
+GENERATING_ENTRY_PATH = "AnimSpacGen_List[0]"
 
-            to_console ("Regenerating spaceship on frame #%f." % cf)
-            if isRendering == False:
-                frameChangeCount = 0
-            else:
-                if frameChangeCount == 2:
-                    reviewAnimSpacGen(scene)
-                    frameChangeCount = 0
-                else:
-                    frameChangeCount = frameChangeCount + 1
-                    to_console("Skipping frame #%f because of count %i." % (cf,frameChangeCount))
-
-            isBusy = False
-        else:
-            to_console ("Still busy.")
+def markAnimSpacGenDirty(ob, entry=None):
+    if entry != None:
+        path = entry.path_from_id()
     else:
-        to_console ("None Scene recieved by frame_change_pre.")
-        
+        path = GENERATING_ENTRY_PATH
+    dirtyAnimSpacGen.setdefault(ob.name, set()).add(path)
+
+# Picks the level of detail for the object from its distance to the
+# scene camera. Always 0 unless the entry asks for levels of detail.
+def returnLodLevel(ob, entry, scene):
+    if entry.use_lod == False or scene == None or scene.camera == None:
+        return 0
+    distance = (ob.matrix_world.translation - scene.camera.matrix_world.translation).length
+    level = 0
+    for limit in LOD_DISTANCES:
+        if distance > limit:
+            level += 1
+    return min(level, len(LOD_LEVELS) - 1)
+
+# Caches the meshes of every level generated for entry_key and returns the
+# one of the passed level. That level goes in last so caching the others
+# can not evict it.
+def cacheLodMeshes(entry_key, meshes, level):
+    for i, me in enumerate(meshes):
+        if i != level:
+            mesh_cache.put(returnLodKey(entry_key, i), me)
+    mesh_cache.put(returnLodKey(entry_key, level), meshes[level])
+    return meshes[level]
+
+# Returns the mesh another controller shows for key, so identical
+# controllers, e.g. the duplicates of a formation, share one mesh.
+def returnSharedMesh(ob, key):
+    for name in managedObjectNames:
+        other = bpy.data.objects.get(name)
+        if other != None and other != ob and other.data != None and other.data.get(CACHE_KEY_PROPERTY) == key:
+            return other.data
+    return None
+
+# Brings the object's mesh up to date with its first entry.
+# Returns True if the object's mesh changed.
+def regenerateAnimSpacGen(ob, scene=None):
+    dirtyAnimSpacGen.pop(ob.name, None)
+    try:
+        l = len(ob.AnimSpacGen_List)
+    except:
+        l = 0
+    if l == 0:
+        log.debug("Entry list length is zero..?")
+        # We must add an entry to make this parametric object active.
+        # Populate the new entry in the collection list.
+        collection = ob.AnimSpacGen_List
+        collection.add()
+        return False
+
+    #Yes we have entries to process.
+    entry = ob.AnimSpacGen_List[0]
+    if scene == None:
+        scene = bpy.context.scene
+    if isBaked(ob):
+        # Baked controllers play back their bake file instead.
+        return loadBakedFrame(ob, scene.frame_current)
+    level = returnLodLevel(ob, entry, scene)
+    entry_key = returnEntryKey(entry)
+    key = returnLodKey(entry_key, level)
+    old_mesh = ob.data
+    if old_mesh != None and old_mesh.get(CACHE_KEY_PROPERTY) == key:
+        # Already showing these parameters, e.g. when linked into several scenes.
+        return False
+
+    # Another controller shows these exact parameters, share its mesh until
+    # one of them is edited.
+    me_shared = returnSharedMesh(ob, key)
+    if me_shared != None:
+        log.debug("[%s] shares the mesh [%s].", ob.name, me_shared.name)
+        replaceControllerMesh(ob, me_shared)
+        linkMaterials(me_shared, entry.assign_materials)
+        return True
+
+    # Reuse a ship we already generated for these exact parameters.
+    me_new = mesh_cache.get(key)
+    if me_new == None:
+        # Generate the ship into new meshes and cache them.
+        if entry.use_lod == True:
+            # All levels come out of one pass, cache them together.
+            meshes = generateSpaceshipLods(entry)
+        else:
+            meshes = [generateSpaceship(entry)]	# Pass the entry with all the properties to the generation code.
+        if meshes[level] == None:
+            log.error("Received None from generateSpaceship")
+            return False
+        me_new = cacheLodMeshes(entry_key, meshes, level)
+
+    me = showControllerMesh(ob, me_new, key)			# Refill the object's own mesh in place.
+    linkMaterials(me, entry.assign_materials)			# Shared materials, created once per file.
+    return True
+
+# Regenerates only the objects marked by markAnimSpacGenDirty,
+# optionally limited to the passed object names.
+def reviewDirtyAnimSpacGen(names=None):
+    if names == None:
+        names = list(dirtyAnimSpacGen.keys())
+    for name in names:
+        paths = dirtyAnimSpacGen.pop(name, None)
+        if paths == None:
+            continue
+        ob = bpy.data.objects.get(name)
+        if ob == None:
+            log.warning("Dirty object [%s] not fetchable..?", name)
+        elif GENERATING_ENTRY_PATH in paths:
+            regenerateAnimSpacGen(ob)
+
 def reviewAnimSpacGen(scene):
-    ob_list = returnObjectNamesLike(scene, OBJECT_PREFIX)
+    ob_list = returnManagedObjectNames(scene)
     if len(ob_list) > 0:
         for name in ob_list:
             ob = bpy.data.objects.get(name)
             if ob !=None:
                 # This is an object that is managed by this script.
-                try:
-                    l = len(ob.AnimSpacGen_List)
-                except:
-                    l = 0
-                if l > 0:
-                    #Yes we have entries to process.
-                    index = 0
-                    entry = ob.AnimSpacGen_List[0]
-
-                    # Generate a new mesh to re-link to this passed object.
-                    me_new = generateSpaceship(entry)					# Pass the entry with all the properties to the generation code.
-                    if me_new != None:
-                        old_mesh = ob.data
-                        ob.data = me_new								# Assign the new mesh to the object.
-                        removeMeshFromMemory (old_mesh.name)			# Remove the old mesh, it is no longer needed.
-                    else:
-                        to_console("Received None from generateSpaceship")
-                    
-                    should_be_linked = True
-                    if should_be_linked == True:
-                        # This mesh should be linked to the scene.
-                        try:
-                            scene.objects.link(ob)
-                        except:
-                            pass
-                    else:
-                        # This mesh should no longer be linked to the scene.
-                        try:
-                            scene.objects.unlink(ob)
-                        except:
-                            pass 
+                regenerateAnimSpacGen(ob, scene)
+
+                should_be_linked = True
+                if should_be_linked == True:
+                    # This mesh should be linked to the scene.
+                    try:
+                        scene.objects.link(ob)
+                    except:
+                        pass
                 else:
-                    to_console ("Entry list length is zero..?")
-                    # We must add an entry to make this parametric object active.
-                    # Populate the new entry in the collection list.
-                    collection = ob.AnimSpacGen_List
-                    collection.add()
+                    # This mesh should no longer be linked to the scene.
+                    try:
+                        scene.objects.unlink(ob)
+                    except:
+                        pass 
             else:
-                to_console ("Object [%s] in list but not fetchable..?" % name)
+                log.warning("Object [%s] in list but not fetchable..?", name)
     else:
-        to_console("No objects named like [%s] detected in scene." % OBJECT_PREFIX)
+        log.debug("No objects named like [%s] detected in scene.", OBJECT_PREFIX)
 
 ###################################################
 # Event logic.
 ###################################################
+# True while a render prefetcher reviews the frames itself, see prefetch.py.
+isPrefetching = False
+
+@persistent
+def frameChangeAnimSpacGen(scene):
+    global isBusy
+
+    # Plays animated parameters back in the viewport and in renders.
+    if scene == None:
+        log.debug("None scene received by frame_change_post.")
+        return
+    if isPrefetching or bake.isBaking:
+        return
+    if isBusy:
+        log.debug("Still busy, skipping frame #%d.", scene.frame_current)
+        return
+    isBusy = True
+    try:
+        reviewAnimSpacGen(scene)
+    finally:
+        isBusy = False
+
 @persistent
 def pre_render (scene):
     global isRendering
 
-    to_console("pre_render")
+    log.debug("pre_render")
     isRendering = True
 
 @persistent
 def post_render (scene):
     global isRendering
 
-    to_console("post_render")
+    log.debug("post_render")
     isRendering = False
 
+# Returns the handler list that runs after every scene/depsgraph update.
+def returnUpdateHandlers():
+    handlers = bpy.app.handlers
+    if hasattr(handlers, "depsgraph_update_post"):
+        return handlers.depsgraph_update_post
+    return handlers.scene_update_post
+
+# Objects a scene update may have brought in. Adding, duplicating and
+# appending leave the new objects selected, newer Blender also lists them
+# among the depsgraph's updates.
+def returnUpdatedObjects(scene, depsgraph=None):
+    if depsgraph != None:
+        return [update.id.original for update in depsgraph.updates if isinstance(update.id, bpy.types.Object)]
+    result = list(getattr(bpy.context, "selected_objects", None) or ())
+    active = getattr(scene.objects, "active", None)
+    if active != None:
+        result.append(active)
+    return result
+
+@persistent
+def scene_update_registry(scene, depsgraph=None):
+    # Controllers are tracked as soon as they exist instead of when the
+    # panel first draws them. Only the updated objects are looked at, never
+    # all of bpy.data.objects. Deleted and renamed controllers are dropped
+    # when returnManagedObjectNames runs into them.
+    for ob in returnUpdatedObjects(scene, depsgraph):
+        if ob.name not in managedObjectNames:
+            registerManagedObject(ob)
+
+@persistent
+def load_post_registry(dummy):
+    # Object names from the previous file mean nothing now, scan the
+    # loaded file once.
+    dirtyAnimSpacGen.clear()
+    profile_recorder.clear()
+    checkpoint_store.clear()
+    mesh_pool.clear()
+    material_registry.clear()
+    rebuildManagedObjects()
+
 @persistent
 def pre_frame_change(scene):
     global isRendering, isBusy
 
     frame_current = scene.frame_current
-    to_console("pre_frame_change #%2d" % frame_current)
+    log.debug("pre_frame_change #%2d", frame_current)
 
 @persistent
 def post_frame_change (scene):
     global isRendering, isBusy
 
     frame_current = scene.frame_current
-    to_console("post_frame_change #%2d" % frame_current)
+    log.debug("post_frame_change #%2d", frame_current)
 
 def register():
     # Handlers space out the tasks we need to do.
@@ -752,5 +910,17 @@ def register():
     #bpy.app.handlers.frame_change_post.append(post_frame_change)
     #bpy.app.handlers.render_pre.append(pre_render)
     #bpy.app.handlers.render_post.append(post_render)
-    pass
+    bpy.app.handlers.frame_change_post.append(frameChangeAnimSpacGen)
+    bpy.app.handlers.load_post.append(load_post_registry)
+    returnUpdateHandlers().append(scene_update_registry)
+    rebuildManagedObjects()
+
+def unregister():
+    if frameChangeAnimSpacGen in bpy.app.handlers.frame_change_post:
+        bpy.app.handlers.frame_change_post.remove(frameChangeAnimSpacGen)
+    if load_post_registry in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.remove(load_post_registry)
+    if scene_update_registry in returnUpdateHandlers():
+        returnUpdateHandlers().remove(scene_update_registry)
+    closeDetailPool()
 
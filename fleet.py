@@ -0,0 +1,193 @@
+# AddOn AnimSpacGen (c) 2016 Michael Davies, Atom
+# Animated Spaceship Generator 1.0.1
+# Manages and animates generated geometry.
+# https://github.com/a1studmuffin/SpaceshipGenerator/blob/master/README.md
+# Last Revision 06-27-2016
+
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# Headless fleet generation. Builds ships with the array kernel in a pool
+# of worker processes, no Blender required:
+#
+#   python fleet.py --seeds -420:420 --preset preset.json --out fleet/
+#   python fleet.py --seeds 3,31,77 --set num_hull_segments_max=12 --out fleet/
+#
+# Each ship is written as an OBJ file and fleet/manifest.json records the
+# seed, file, build time and vertex/face counts of every ship.
+#
+#   python fleet.py --seeds -420:420 --preset preset.json --catalog seed_catalog.json
+#
+# adds the preset's seeds to a seed catalog instead, see catalog.py.
+
+import os, sys, json, time, types, argparse, importlib
+import multiprocessing
+
+# The add-on's __init__ imports bpy, so load the modules we need under a
+# bare package that skips it.
+PACKAGE_NAME = "animspacgen_headless"
+ADDON_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def importAddonModule(name):
+    if PACKAGE_NAME not in sys.modules:
+        package = types.ModuleType(PACKAGE_NAME)
+        package.__path__ = [ADDON_DIR]
+        sys.modules[PACKAGE_NAME] = package
+    return importlib.import_module("%s.%s" % (PACKAGE_NAME, name))
+
+############################################################################
+# Output.
+############################################################################
+def writeObj(arrays, path, material_names):
+    lines = ["# AnimSpacGen fleet ship"]
+    for co in arrays.verts.tolist():
+        lines.append("v %.6f %.6f %.6f" % tuple(co))
+    current = None
+    for face, material in zip(arrays.face_lists(), arrays.materials.tolist()):
+        if material != current:
+            current = material
+            lines.append("usemtl %s" % material_names[material])
+        lines.append("f " + " ".join(str(i + 1) for i in face))
+    with open(path, "w") as f:
+        f.write("\n".join(lines) + "\n")
+
+############################################################################
+# Worker code.
+############################################################################
+def buildShip(job):
+    seed, parameters, out_dir = job
+    generator = importAddonModule("generator")
+    kernel = importAddonModule("kernel")
+
+    start = time.time()
+    entry = generator.Parameters(**parameters)
+    entry.random_seed = seed
+    arrays = generator.buildSpaceship(entry, kernel.ArrayBuilder())
+    seconds = time.time() - start
+
+    file_name = "ship_%+04d.obj" % seed
+    material_names = [m.name for m in sorted(generator.Material, key=int)]
+    writeObj(arrays, os.path.join(out_dir, file_name), material_names)
+    return {"seed": seed,
+            "file": file_name,
+            "seconds": seconds,
+            "verts": arrays.num_verts,
+            "faces": arrays.num_faces}
+
+############################################################################
+# Command line.
+############################################################################
+def parseSeeds(text):
+    # "-420:420" is an inclusive range, "1,5,9" a list. Both can be mixed.
+    seeds = []
+    for part in text.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        split_at = part.find(":", 1)
+        if split_at > 0:
+            first, last = int(part[:split_at]), int(part[split_at + 1:])
+            seeds.extend(range(first, last + 1))
+        else:
+            seeds.append(int(part))
+    return seeds
+
+def parseValue(text):
+    # Settings arrive as strings, read them as JSON where possible.
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+def returnParameters(preset_path, settings):
+    parameters = {}
+    if preset_path:
+        with open(preset_path) as f:
+            parameters.update(json.load(f))
+    for setting in settings:
+        key, _, value = setting.partition("=")
+        parameters[key.strip()] = parseValue(value.strip())
+    parameters.pop("random_seed", None)
+    return parameters
+
+def returnJoinedArguments(argv):
+    # argparse takes a range starting with a minus, like -420:420, for an
+    # option, so join it to --seeds as --seeds=-420:420 first.
+    result = []
+    for arg in argv:
+        if result and result[-1] == "--seeds" and arg.startswith("-") and not arg.startswith("--"):
+            result[-1] = "--seeds=" + arg
+        else:
+            result.append(arg)
+    return result
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a fleet of spaceships without Blender.")
+    parser.add_argument("--seeds", required=True, help="Seed range like -420:420 and/or a list like 1,5,9 (a leading minus is fine).")
+    parser.add_argument("--preset", help="JSON file of cls_AnimSpacGen parameter values.")
+    parser.add_argument("--set", dest="settings", action="append", default=[], metavar="NAME=VALUE",
+                        help="Override one parameter, may be repeated.")
+    parser.add_argument("--out", help="Directory to write ships and manifest.json to.")
+    parser.add_argument("--catalog", help="Seed catalog file to add the seeds to instead of writing ships.")
+    parser.add_argument("--workers", type=int, default=0, help="Worker processes, defaults to one per core.")
+    args = parser.parse_args(returnJoinedArguments(sys.argv[1:] if argv == None else argv))
+    if not args.out and not args.catalog:
+        parser.error("one of --out or --catalog is required")
+
+    seeds = parseSeeds(args.seeds)
+    parameters = returnParameters(args.preset, args.settings)
+    workers = args.workers or multiprocessing.cpu_count()
+
+    # One process per core, so keep numpy from starting threads of its own.
+    for name in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS"):
+        os.environ.setdefault(name, "1")
+
+    if args.catalog:
+        catalog = importAddonModule("catalog")
+        start = time.time()
+        added = catalog.buildCatalog(catalog.SeedCatalog(args.catalog), parameters, seeds, workers)
+        print("Cataloged %i new seeds with %i workers in %.2f s." % (added, workers, time.time() - start))
+        return 0
+
+    if not os.path.isdir(args.out):
+        os.makedirs(args.out)
+
+    jobs = [(seed, parameters, args.out) for seed in seeds]
+    chunksize = max(1, len(jobs) // (workers * 8))
+    start = time.time()
+    pool = multiprocessing.Pool(workers)
+    try:
+        ships = list(pool.imap_unordered(buildShip, jobs, chunksize))
+    finally:
+        pool.close()
+        pool.join()
+    ships.sort(key=lambda ship: ship["seed"])
+    total = time.time() - start
+
+    manifest = {"parameters": parameters,
+                "workers": workers,
+                "seconds": total,
+                "ships": ships}
+    with open(os.path.join(args.out, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    print("Generated %i ships with %i workers in %.2f s (%.1f ships/s)." %
+          (len(ships), workers, total, len(ships) / max(total, 1e-9)))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,682 @@
+# AddOn AnimSpacGen (c) 2016 Michael Davies, Atom
+# Animated Spaceship Generator 1.0.1
+# Manages and animates generated geometry.
+# https://github.com/a1studmuffin/SpaceshipGenerator/blob/master/README.md
+# Last Revision 06-27-2016
+
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# The spaceship recipe, kept free of bpy so it can run outside Blender.
+# All random draws come from a RandomStreams object, either here or inside
+# the builder's add_*_to_face helpers, in the same order for every builder,
+# so a seed gives the same ship whether it is built with bmesh
+# (events.BMeshBuilder) or with the array kernel (kernel.ArrayBuilder).
+#
+# A builder provides:
+#   create_cube(scale), faces(), is_valid(face), normal(face), center(face),
+#   aspect_ratio(face), face_metrics(faces), neighbourhood(face),
+#   set_material(face, index),
+#   extrude(face, distance), ribbed_extrude(face, distance, num_ribs, rib_scale),
+#   scale(face, sx, sy, sz), translate(face, vec), rotate_y(face, degrees),
+#   add_exhaust(face, rng), add_grid(face, rng), add_surface_antenna(face, rng),
+#   add_weapons(face, rng), add_sphere(face, rng), add_disc(face, rng),
+#   add_cylinders(face, rng), add_details(stage, faces, seeds),
+#   place_primitives(), symmetrize(direction), counts(), fork(),
+#   restore(snapshot), set_level(level), finish()
+#
+# rng is the random.Random the add_* helper draws from. The array kernel
+# queues their cones and spheres in a kernel.PrimitiveBatch and
+# place_primitives() writes everything queued into the mesh in one go; the
+# bmesh builder creates them right away with bmesh.ops.
+# counts() returns the current (vertex, face) totals, queued primitives
+# included, for profiling and the detail budget. neighbourhood(face)
+# returns the vertex count of face and a list holding the vertex count of
+# the face across each of its edges, per edge. fork() returns an
+# independent copy whose faces() line up with this one's, restore()
+# replaces the mesh with a copy of such a fork's, and set_level(level)
+# makes the primitives follow a LodLevel.
+#
+# add_details(stage, faces, seeds) may detail a whole stage at once, face i
+# drawing from random.Random(seeds[i]), for example in a process pool. It
+# returns False when the builder can't, and the faces are then detailed
+# one by one. It is only used with independent random streams and no
+# detail budget, where the order faces are detailed in makes no difference.
+
+import os
+import time
+import hashlib
+from collections import OrderedDict
+from random import Random
+from enum import IntEnum
+
+# Hash of the sources that decide the ship a seed generates. Data stored
+# about generated ships, like the seed catalog, is dropped when it differs.
+# The bmesh builder is kept in step with the kernel (test_kernel_parity.py),
+# so the kernel's source stands for both.
+def returnGeneratorVersion():
+    digest = hashlib.sha1()
+    directory = os.path.dirname(os.path.abspath(__file__))
+    for name in ("generator.py", "kernel.py"):
+        with open(os.path.join(directory, name), "rb") as f:
+            # Line endings depend on how the add-on was checked out.
+            digest.update(f.read().replace(b"\r\n", b"\n"))
+    return digest.hexdigest()[:16]
+
+GENERATOR_VERSION = returnGeneratorVersion()
+
+# Orientation classes reported by builder.face_metrics, see kernel.FaceMetrics.
+FACE_OTHER = 0
+FACE_REAR = 1
+FACE_FRONT = 2
+FACE_TOP = 3
+FACE_BOTTOM = 4
+FACE_SIDE = 5
+
+class Material(IntEnum):
+    hull = 0            # Plain spaceship hull
+    hull_lights = 1     # Spaceship hull with emissive windows
+    hull_dark = 2       # Plain Spaceship hull, darkened
+    exhaust_burn = 3    # Emissive engine burn material
+    glow_disc = 4       # Emissive landing pad disc material
+
+# Default values of the cls_AnimSpacGen generation parameters, for use
+# where there is no entry to read them from.
+DEFAULT_PARAMETERS = {
+    "random_seed": 31,
+    "num_hull_segments_min": 3,
+    "num_hull_segments_max": 6,
+    "num_asymmetry_segments_min": 1,
+    "num_asymmetry_segments_max": 5,
+    "create_asymmetry_segments": True,
+    "create_face_detail": True,
+    "allow_horizontal_symmetry": True,
+    "allow_vertical_symmetry": False,
+    "apply_bevel_modifier": True,
+    "assign_materials": True,
+    "rnd_normal_chance": 0.5,
+    "rnd_extrusion_chance": 0.1,
+    "rnd_extrusion_deviation_chance": 0.75,
+    "rnd_scaling_chance": 0.5,
+    "rnd_side_trans_chance": 0.5,
+    "rnd_roty_chance": 0.5,
+    "max_verts": 0,
+    "max_faces": 0,
+    "use_lod": False,
+    "independent_streams": False,
+}
+
+class Parameters:
+    # Stands in for a cls_AnimSpacGen entry outside Blender.
+    def __init__(self, **overrides):
+        self.__dict__.update(DEFAULT_PARAMETERS)
+        self.__dict__.update(overrides)
+
+############################################################################
+# Stage profiling.
+############################################################################
+class GenerationProfile:
+    # Wall time, vertex/face deltas and faces processed for each stage of
+    # one build. mark() closes the stage that has been running since the
+    # previous mark.
+    def __init__(self, builder):
+        self.builder = builder
+        self.stages = []
+        self.verts, self.faces = builder.counts()
+        self.started = self.last = time.perf_counter()
+
+    def mark(self, stage, processed=None, counted=True):
+        # processed defaults to every face the stage started with.
+        # Pass counted=False once the builder has been finished.
+        now = time.perf_counter()
+        if processed == None:
+            processed = self.faces
+        verts, faces = self.builder.counts() if counted else (self.verts, self.faces)
+        self.stages.append({"stage": stage,
+                            "seconds": now - self.last,
+                            "verts": verts - self.verts,
+                            "faces": faces - self.faces,
+                            "processed": processed})
+        self.verts, self.faces = verts, faces
+        self.last = now
+
+    def seconds(self):
+        return self.last - self.started
+
+    def as_dict(self):
+        return {"seconds": self.seconds(),
+                "verts": self.verts,
+                "faces": self.faces,
+                "stages": self.stages}
+
+class NullProfile:
+    # Stands in when profiling is off, so the build only pays for a call.
+    def mark(self, stage, processed=None, counted=True):
+        pass
+
+NO_PROFILE = NullProfile()
+
+############################################################################
+# Detail budget.
+############################################################################
+# Upper bound of the (verts, faces) a single face can add in each detail
+# stage, from the largest random draws its add_*_to_face helper can make.
+DETAIL_STAGE_COST = {
+    "antenna": (2400, 1400),    # 10x10 spires and bases of 6 segments
+    "weapons": (576, 336),      # 2x2 turrets of six capped cones
+    "sphere": (162, 320),       # one subdivisions=3 icosphere
+    "disc": (128, 66),          # two 32 segment cones
+    "cylinders": (216, 126),    # 3x3 capped cylinders of 12 segments
+}
+
+# Exhaust and grid cut the face into a grid and extrude the cells. The cuts
+# also land in the faces across its edges, which get extruded along with
+# the cells, so what they add depends on the faces around, see
+# returnGridCost. Most cuts and extrusions per cell of each.
+GRID_STAGE_CUTS = {
+    "exhaust": (3, 2),
+    "grid": (4, 1),
+}
+
+# The same for one segment of the hull and asymmetry passes.
+HULL_SEGMENT_COST = (8, 8)      # a quad extruded twice
+RIBBED_SEGMENT_COST = (96, 96)  # four ribs of six extrusions
+ASYMMETRY_SEGMENT_COST = (4, 4) # a quad extruded once
+
+def returnGridCost(builder, face, stage):
+    # Worst case (verts, faces) an exhaust or grid adds to face. Only quads
+    # are filled with a grid, other faces just get their edges cut.
+    cuts, extrusions = GRID_STAGE_CUTS[stage]
+    size, neighbours = builder.neighbourhood(face)
+    if size == 4:
+        verts = 4 * cuts + cuts * cuts
+        faces = (cuts + 1) * (cuts + 1) - 1
+        extruded = 4 * (faces + 1)
+    else:
+        verts = size * cuts
+        faces = 0
+        extruded = size * (cuts + 1)
+    extruded += sum(neighbours) + len(neighbours) * cuts
+    return verts + extrusions * extruded, faces + extrusions * extruded
+
+def returnDetailCost(builder, face, stage):
+    if stage in GRID_STAGE_CUTS:
+        if not builder.is_valid(face):
+            return 0, 0
+        return returnGridCost(builder, face, stage)
+    return DETAIL_STAGE_COST[stage]
+
+class Budget:
+    # Keeps a build within the entry's max_verts/max_faces (0 is no limit).
+    # A hull segment, asymmetry segment or detailed face is only added if
+    # the worst case it could add still fits, so the limit holds whatever
+    # the random draws are, and the decision only depends on the seed and
+    # the budget. Each allowed symmetry axis can double the mesh afterwards,
+    # so halves the budget, and a symmetrize whose result would still break
+    # the limit (it also adds the vertices it cuts) is left out.
+    def __init__(self, entry):
+        divisor = 1
+        if entry.allow_horizontal_symmetry:
+            divisor *= 2
+        if entry.allow_vertical_symmetry:
+            divisor *= 2
+        self.limit_verts = max(0, entry.max_verts)
+        self.limit_faces = max(0, entry.max_faces)
+        self.max_verts = max(1, self.limit_verts // divisor) if self.limit_verts > 0 else 0
+        self.max_faces = max(1, self.limit_faces // divisor) if self.limit_faces > 0 else 0
+        self.limited = self.max_verts > 0 or self.max_faces > 0
+        self.skipped = 0
+
+    def allows(self, builder, cost, max_verts, max_faces):
+        verts, faces = builder.counts()
+        if max_verts > 0 and verts + cost[0] > max_verts:
+            return False
+        if max_faces > 0 and faces + cost[1] > max_faces:
+            return False
+        return True
+
+    def fits(self, builder, cost):
+        # cost is the worst case (verts, faces) about to be added.
+        if not self.limited:
+            return True
+        return self.allows(builder, cost, self.max_verts, self.max_faces)
+
+    def symmetrize(self, builder, direction):
+        # Mirrors the mesh unless the result breaks the entry's limit, then
+        # the mesh is put back as it was. Returns whether it was mirrored.
+        if not self.limited:
+            builder.symmetrize(direction)
+            return True
+        snapshot = builder.fork()
+        builder.symmetrize(direction)
+        if self.allows(builder, (0, 0), self.limit_verts, self.limit_faces):
+            return True
+        builder.restore(snapshot)
+        return False
+
+############################################################################
+# Levels of detail.
+############################################################################
+class LodLevel:
+    # How much face detail one level of detail keeps. Cone segments are
+    # scaled by segment_scale, icospheres capped at max_subdivisions and
+    # the detail stages in skipped_stages left out.
+    def __init__(self, segment_scale=1.0, max_subdivisions=None, skipped_stages=()):
+        self.segment_scale = segment_scale
+        self.max_subdivisions = max_subdivisions
+        self.skipped_stages = skipped_stages
+
+LOD_LEVELS = (
+    LodLevel(),
+    LodLevel(0.5, 2, ("antenna",)),
+    LodLevel(0.25, 1, ("antenna", "grid")),
+)
+
+# Builder method adding the detail of each stage, in the order they run.
+DETAIL_METHODS = {
+    "exhaust": "add_exhaust",
+    "grid": "add_grid",
+    "antenna": "add_surface_antenna",
+    "weapons": "add_weapons",
+    "sphere": "add_sphere",
+    "disc": "add_disc",
+    "cylinders": "add_cylinders",
+}
+
+############################################################################
+# Random streams.
+############################################################################
+class RandomStreams:
+    # Hands out the random.Random every stage and face draws from. With
+    # independent set, each stage and each face of a stage gets its own
+    # stream derived from the seed, so skipping, caching or reordering one
+    # of them leaves the draws of the others alone. Otherwise everything
+    # shares one stream drawn in build order, which reproduces the ships of
+    # the original script.
+    def __init__(self, seed, independent=False):
+        self.seed = seed
+        self.independent = independent
+        self.shared = Random(seed)
+
+    def derive(self, *parts):
+        text = ":".join(str(part) for part in (self.seed,) + parts)
+        return int(hashlib.sha1(text.encode("utf-8")).hexdigest()[:16], 16)
+
+    def stage(self, name):
+        if not self.independent:
+            return self.shared
+        return Random(self.derive(name))
+
+    def face(self, stage, row):
+        if not self.independent:
+            return self.shared
+        return Random(self.face_seed(stage, row))
+
+    def face_seed(self, stage, row):
+        # Seed of the independent stream of one face.
+        return self.derive(stage, row)
+
+    def getstate(self):
+        return self.shared.getstate()
+
+    def setstate(self, state):
+        self.shared.setstate(state)
+
+############################################################################
+# Stage checkpoints.
+############################################################################
+# The parameters each checkpointed stage depends on. The hull is also
+# decided by the seed and the budget, the asymmetry pass carries on from
+# the hull.
+HULL_PARAMETERS = ("random_seed",
+                   "independent_streams",
+                   "num_hull_segments_min",
+                   "num_hull_segments_max",
+                   "rnd_normal_chance",
+                   "rnd_extrusion_chance",
+                   "rnd_extrusion_deviation_chance",
+                   "rnd_scaling_chance",
+                   "rnd_side_trans_chance",
+                   "rnd_roty_chance",
+                   "max_verts",
+                   "max_faces",
+                   "allow_horizontal_symmetry",
+                   "allow_vertical_symmetry")
+ASYMMETRY_PARAMETERS = HULL_PARAMETERS + ("create_asymmetry_segments",
+                                          "num_asymmetry_segments_min",
+                                          "num_asymmetry_segments_max")
+
+# Deepest stage first.
+CHECKPOINT_STAGES = (("asymmetry", ASYMMETRY_PARAMETERS),
+                     ("hull", HULL_PARAMETERS))
+
+class CheckpointStore:
+    # Builder snapshots (see builder.fork) and random states taken after
+    # the hull and asymmetry stages, least recently used first. A snapshot
+    # is only ever copied from, so one can be resumed any number of times.
+    def __init__(self, capacity=8):
+        self.capacity = capacity
+        self.entries = OrderedDict()    # key -> (builder snapshot, random state)
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, stage, builder, entry):
+        names = dict(CHECKPOINT_STAGES)[stage]
+        return (stage, type(builder).__name__) + tuple(getattr(entry, name) for name in names)
+
+    def save(self, stage, builder, entry, streams):
+        if self.capacity <= 0:
+            return
+        self.entries[self.key(stage, builder, entry)] = (builder.fork(), streams.getstate())
+        while len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+
+    def resume(self, builder, entry, streams):
+        # Loads the deepest checkpoint matching entry into builder and
+        # streams and returns its stage, or None when there is nothing to
+        # resume.
+        for stage, names in CHECKPOINT_STAGES:
+            key = self.key(stage, builder, entry)
+            item = self.entries.get(key)
+            if item != None:
+                self.entries.move_to_end(key)
+                builder.restore(item[0])
+                streams.setstate(item[1])
+                self.hits += 1
+                return stage
+        self.misses += 1
+        return None
+
+    def clear(self):
+        self.entries.clear()
+
+    def stats(self):
+        return {"entries": len(self.entries),
+                "capacity": self.capacity,
+                "hits": self.hits,
+                "misses": self.misses}
+
+############################################################################
+# Generation.
+############################################################################
+# Adds the face detail chosen by the categorization to the builder's mesh.
+# detail is a sequence of (stage, rows), rows indexing builder.faces().
+# states holds the shared random state at the start of every stage: the
+# first level records it, replay restores it so the other levels draw the
+# same.
+def addFaceDetail(builder, level, detail, budget, profile, streams, states=None, replay=False):
+    builder.set_level(level)
+    faces = builder.faces()
+    for stage, rows in detail:
+        if replay:
+            streams.setstate(states[stage])
+        elif states != None:
+            states[stage] = streams.getstate()
+        if stage in level.skipped_stages:
+            continue
+        if streams.independent and not budget.limited and \
+                builder.add_details(stage, [faces[row] for row in rows],
+                                    [streams.face_seed(stage, row) for row in rows]):
+            processed = len(rows)
+        else:
+            add_detail = getattr(builder, DETAIL_METHODS[stage])
+            processed = 0
+            for row in rows:
+                if budget.limited and not budget.fits(builder, returnDetailCost(builder, faces[row], stage)):
+                    # Out of budget, leave the rest of this stage plain.
+                    budget.skipped += len(rows) - processed
+                    break
+                add_detail(faces[row], streams.face(stage, row))
+                processed += 1
+        # Primitives placed by the stage are written into the mesh in one go.
+        builder.place_primitives()
+        profile.mark(stage, processed)
+
+# Extrudes out the hull of a freshly seeded build.
+def buildHull(entry, builder, streams, budget):
+    num_hull_segments_min = entry.num_hull_segments_min
+    num_hull_segments_max = entry.num_hull_segments_max
+
+    # Let's start with a unit cube scaled randomly
+    rng = streams.stage("hull")
+    scale_vector = (rng.uniform(0.75, 2.0), rng.uniform(0.75, 2.0), rng.uniform(0.75, 2.0))
+    builder.create_cube(scale_vector)
+
+    # Extrude out the hull along the X axis, adding some semi-random perturbations
+    hull_faces = builder.faces()
+    for row, face in enumerate(hull_faces):
+        if abs(builder.normal(face)[0]) > entry.rnd_normal_chance:
+            rng = streams.face("hull", row)
+            hull_segment_length = rng.uniform(0.3, 1)
+            num_hull_segments = rng.randrange(num_hull_segments_min, num_hull_segments_max)
+            hull_segment_range = range(num_hull_segments)
+            for i in hull_segment_range:
+                is_last_hull_segment = i == hull_segment_range[-1]
+                val = rng.random()
+                cost = HULL_SEGMENT_COST if val > entry.rnd_extrusion_chance else RIBBED_SEGMENT_COST
+                if not budget.fits(builder, cost):
+                    # Out of budget, end this part of the hull here.
+                    break
+                if val > entry.rnd_extrusion_chance:
+                    # Most of the time, extrude out the face with some random deviations
+                    face = builder.extrude(face, hull_segment_length)
+                    if rng.random() > entry.rnd_extrusion_deviation_chance:
+                        face = builder.extrude(face, hull_segment_length * 0.25)
+
+                    # Maybe apply some scaling
+                    if rng.random() > entry.rnd_scaling_chance:
+                        sy = rng.uniform(1.2, 1.5)
+                        sz = rng.uniform(1.2, 1.5)
+                        if is_last_hull_segment or rng.random() > 0.5:
+                            sy = 1 / sy
+                            sz = 1 / sz
+                        builder.scale(face, 1, sy, sz)
+
+                    # Maybe apply some sideways translation
+                    if rng.random() > entry.rnd_side_trans_chance:
+                        sideways_translation = rng.uniform(0.1, 0.4) * scale_vector[2] * hull_segment_length
+                        if rng.random() > 0.5:
+                            sideways_translation = -sideways_translation
+                        builder.translate(face, (0, 0, sideways_translation))
+
+                    # Maybe add some rotation around Y axis
+                    if rng.random() > entry.rnd_roty_chance:
+                        angle = 5
+                        if rng.random() > 0.5:
+                            angle = -angle
+                        builder.rotate_y(face, angle)
+                else:
+                    # Rarely, create a ribbed section of the hull
+                    rib_scale = rng.uniform(0.75, 0.95)
+                    face = builder.ribbed_extrude(face, hull_segment_length, rng.randint(2, 4), rib_scale)
+    return len(hull_faces)
+
+# Add some large asynmmetrical sections of the hull that stick out.
+def addAsymmetrySegments(entry, builder, streams, budget):
+    num_asymmetry_segments_min = entry.num_asymmetry_segments_min
+    num_asymmetry_segments_max = entry.num_asymmetry_segments_max
+
+    # Extruding a face never moves the others, so measure them all up front.
+    faces = builder.faces()
+    aspect = builder.face_metrics(faces).aspect.tolist()
+    for row, face in enumerate(faces):
+        # Skip any long thin faces as it'll probably look stupid
+        if aspect[row] > 4:
+            continue
+        rng = streams.face("asymmetry", row)
+        if rng.random() > 0.85:
+            hull_piece_length = rng.uniform(0.1, 0.4)
+            for i in range(rng.randrange(num_asymmetry_segments_min, num_asymmetry_segments_max)):
+                if not budget.fits(builder, ASYMMETRY_SEGMENT_COST):
+                    break
+                face = builder.extrude(face, hull_piece_length)
+
+                # Maybe apply some scaling
+                if rng.random() > 0.25:
+                    s = 1 / rng.uniform(1.1, 1.5)
+                    builder.scale(face, s, s, s)
+    return len(faces)
+
+# Builds a spaceship once per level of detail, sharing the hull, and returns
+# the list of builder.finish() results, most detailed first. Takes any
+# object with the cls_AnimSpacGen generation attributes, and optionally a
+# GenerationProfile to record each stage in and a CheckpointStore to
+# resume from.
+def buildSpaceshipLods(entry, builder, levels=None, profile=NO_PROFILE, checkpoints=None):
+    if levels == None:
+        levels = LOD_LEVELS
+
+    create_asymmetry_segments = entry.create_asymmetry_segments
+    create_face_detail = entry.create_face_detail
+    allow_horizontal_symmetry = entry.allow_horizontal_symmetry
+    allow_vertical_symmetry = entry.allow_vertical_symmetry
+    budget = Budget(entry)
+    streams = RandomStreams(entry.random_seed, entry.independent_streams)
+
+    # Pick up from the deepest stage already built with these parameters.
+    resumed = None
+    if checkpoints != None:
+        resumed = checkpoints.resume(builder, entry, streams)
+        if resumed != None:
+            profile.mark("resume_" + resumed, 0)
+
+    if resumed == None:
+        profile.mark("hull", buildHull(entry, builder, streams, budget))
+        if checkpoints != None:
+            checkpoints.save("hull", builder, entry, streams)
+
+    if resumed != "asymmetry":
+        if create_asymmetry_segments:
+            profile.mark("asymmetry", addAsymmetrySegments(entry, builder, streams, budget))
+        if checkpoints != None:
+            checkpoints.save("asymmetry", builder, entry, streams)
+
+    # Now the basic hull shape is built, let's categorize + add detail to all the faces
+    if create_face_detail:
+        engine_rows = []
+        grid_rows = []
+        antenna_rows = []
+        weapon_rows = []
+        sphere_rows = []
+        disc_rows = []
+        cylinder_rows = []
+        faces = builder.faces()
+        metrics = builder.face_metrics(faces)
+        aspect = metrics.aspect.tolist()
+        orientation = metrics.orientation.tolist()
+        outward = metrics.outward.tolist()
+        rng = streams.stage("categorize")
+        for row, face in enumerate(faces):
+            # Skip any long thin faces as it'll probably look stupid
+            if aspect[row] > 3:
+                continue
+
+            # Spin the wheel! Let's categorize + assign some materials
+            val = rng.random()
+            kind = orientation[row]
+            if kind == FACE_REAR:  # rear face
+                if not engine_rows or val > 0.75:
+                    engine_rows.append(row)
+                elif val > 0.5:
+                    cylinder_rows.append(row)
+                elif val > 0.25:
+                    grid_rows.append(row)
+                else:
+                    builder.set_material(face, Material.hull_lights)
+            elif kind == FACE_FRONT:  # front face
+                if outward[row] and val > 0.7:
+                    antenna_rows.append(row)  # front facing antenna
+                    builder.set_material(face, Material.hull_lights)
+                elif val > 0.4:
+                    grid_rows.append(row)
+                else:
+                    builder.set_material(face, Material.hull_lights)
+            elif kind == FACE_TOP:  # top face
+                if outward[row] and val > 0.7:
+                    antenna_rows.append(row)  # top facing antenna
+                elif val > 0.6:
+                    grid_rows.append(row)
+                elif val > 0.3:
+                    cylinder_rows.append(row)
+            elif kind == FACE_BOTTOM:  # bottom face
+                if val > 0.75:
+                    disc_rows.append(row)
+                elif val > 0.5:
+                    grid_rows.append(row)
+                elif val > 0.25:
+                    weapon_rows.append(row)
+            elif kind == FACE_SIDE:  # side face
+                if not weapon_rows or val > 0.75:
+                    weapon_rows.append(row)
+                elif val > 0.6:
+                    grid_rows.append(row)
+                elif val > 0.4:
+                    sphere_rows.append(row)
+                else:
+                    builder.set_material(face, Material.hull_lights)
+        profile.mark("categorize", len(faces))
+
+        # Now we've categorized, let's actually add the detail.
+        detail = (("exhaust", engine_rows),
+                  ("grid", grid_rows),
+                  ("antenna", antenna_rows),
+                  ("weapons", weapon_rows),
+                  ("sphere", sphere_rows),
+                  ("disc", disc_rows),
+                  ("cylinders", cylinder_rows))
+    else:
+        detail = ()
+
+    # Lower levels of detail carry on from a copy of the categorized hull.
+    forks = [builder.fork() for level in levels[1:]]
+    states = {} if forks else None
+    addFaceDetail(builder, levels[0], detail, budget, profile, streams, states)
+
+    # Apply horizontal symmetry sometimes
+    rng = streams.stage("symmetry")
+    horizontal_symmetry = allow_horizontal_symmetry and rng.random() > 0.5
+    if horizontal_symmetry and budget.symmetrize(builder, 1):
+        profile.mark("symmetrize")
+
+    # Apply vertical symmetry sometimes - this can cause spaceship "islands", so disabled by default
+    vertical_symmetry = allow_vertical_symmetry and rng.random() > 0.5
+    if vertical_symmetry and budget.symmetrize(builder, 2):
+        profile.mark("symmetrize")
+
+    results = [builder.finish()]
+    profile.mark("finish", counted=False)
+
+    # Every level replays the detail draws of the first one and takes the
+    # same symmetry, so only the amount of detail changes between levels.
+    for index, (level, fork) in enumerate(zip(levels[1:], forks), 1):
+        fork.set_level(level)
+        fork_budget = Budget(entry)
+        addFaceDetail(fork, level, detail, fork_budget, NO_PROFILE, streams, states, replay=True)
+        if horizontal_symmetry:
+            fork_budget.symmetrize(fork, 1)
+        if vertical_symmetry:
+            fork_budget.symmetrize(fork, 2)
+        results.append(fork.finish())
+        profile.mark("lod%i" % index, counted=False)
+    return results
+
+# Builds a spaceship with the passed builder and returns builder.finish().
+# Takes any object with the cls_AnimSpacGen generation attributes, and
+# optionally a GenerationProfile and a CheckpointStore as above.
+def buildSpaceship(entry, builder, profile=NO_PROFILE, checkpoints=None):
+    return buildSpaceshipLods(entry, builder, LOD_LEVELS[:1], profile, checkpoints)[0]
@@ -0,0 +1,42 @@
+# AddOn AnimSpacGen (c) 2016 Michael Davies, Atom
+# Animated Spaceship Generator 1.0.1
+# Manages and animates generated geometry.
+# https://github.com/a1studmuffin/SpaceshipGenerator/blob/master/README.md
+# Last Revision 06-27-2016
+
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# Pytest plugin, loaded through pytest.ini. The add-on's __init__ imports
+# bpy, so register its folder as a bare package before pytest collects the
+# test modules next to it. They then import the add-on modules relatively:
+#
+#   python -m pytest
+#   blender -b --python-expr "import sys, pytest; sys.exit(pytest.main(['<add-on folder>']))"
+#
+# Inside Blender, with the add-on enabled, the real package is used.
+
+import os, sys, types
+
+ADDON_DIR = os.path.dirname(os.path.abspath(__file__))
+PACKAGE_NAME = os.path.basename(ADDON_DIR)
+
+if PACKAGE_NAME not in sys.modules:
+    package = types.ModuleType(PACKAGE_NAME)
+    package.__path__ = [ADDON_DIR]
+    sys.modules[PACKAGE_NAME] = package
@@ -0,0 +1,1390 @@
+# AddOn AnimSpacGen (c) 2016 Michael Davies, Atom
+# Animated Spaceship Generator 1.0.1
+# Manages and animates generated geometry.
+# https://github.com/a1studmuffin/SpaceshipGenerator/blob/master/README.md
+# Last Revision 06-27-2016
+
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# Array backed mesh kernel. Mirrors the bmesh operations the generator
+# uses on plain numpy arrays so ships can be built without a running
+# Blender. Nothing in here may import bpy, bmesh or mathutils.
+#
+# Faces live in slots that are reused last-freed-first, the same way
+# BMesh's memory pool hands them out, so iterating faces() visits them
+# in the order bm.faces[:] would and the random draws line up.
+
+import numpy as np
+from math import radians, sqrt, sin, cos, pi
+from random import Random
+from collections import deque
+
+from .generator import Material
+from .generator import FACE_OTHER, FACE_REAR, FACE_FRONT, FACE_TOP, FACE_BOTTOM, FACE_SIDE
+from .generator import Parameters, buildSpaceshipLods, LOD_LEVELS
+
+# Vertices closer than this to the symmetry plane are welded onto it.
+SYMMETRIZE_DIST = 1e-4
+
+# Faces per job sent to the worker pool by ArrayBuilder.add_details.
+DETAIL_CHUNK_SIZE = 8
+
+############################################################################
+# Small matrix helpers (stand-ins for mathutils).
+############################################################################
+def rotation(angle, axis):
+    # 4x4 rotation of angle degrees around 'X', 'Y' or 'Z'.
+    c = cos(radians(angle))
+    s = sin(radians(angle))
+    mat = np.identity(4)
+    if axis == 'X':
+        mat[1:3, 1:3] = ((c, -s), (s, c))
+    elif axis == 'Y':
+        mat[0, 0], mat[0, 2], mat[2, 0], mat[2, 2] = c, s, -s, c
+    else:
+        mat[0:2, 0:2] = ((c, -s), (s, c))
+    return mat
+
+def translation(vec):
+    mat = np.identity(4)
+    mat[0:3, 3] = vec
+    return mat
+
+def transform(mat, co):
+    # Applies a 4x4 matrix to an (n, 3) array of points.
+    return co.dot(mat[0:3, 0:3].T) + mat[0:3, 3]
+
+def lerp(a, b, t):
+    return a + (b - a) * t
+
+def normalized(vec):
+    length = sqrt(vec.dot(vec))
+    if length == 0.0:
+        return vec
+    return vec / length
+
+def polygon_normals(co):
+    # Normals of an (m, n, 3) stack of n-gons, using the same formulas
+    # BMesh uses for tris, quads and ngons.
+    n = co.shape[1]
+    if n == 3:
+        vec = np.cross(co[:, 0] - co[:, 1], co[:, 1] - co[:, 2])
+    elif n == 4:
+        vec = np.cross(co[:, 0] - co[:, 2], co[:, 1] - co[:, 3])
+    else:
+        nxt = np.roll(co, -1, axis=1)
+        vec = np.stack((
+            ((co[:, :, 1] - nxt[:, :, 1]) * (co[:, :, 2] + nxt[:, :, 2])).sum(axis=1),
+            ((co[:, :, 2] - nxt[:, :, 2]) * (co[:, :, 0] + nxt[:, :, 0])).sum(axis=1),
+            ((co[:, :, 0] - nxt[:, :, 0]) * (co[:, :, 1] + nxt[:, :, 1])).sum(axis=1)), axis=1)
+    length = np.sqrt(np.square(vec).sum(axis=1))
+    length[length == 0.0] = 1.0
+    return vec / length[:, None]
+
+def polygon_normal(co):
+    return polygon_normals(co[None])[0]
+
+############################################################################
+# Bulk face metrics.
+############################################################################
+class FaceMetrics:
+    # Per-face normals, bounds centers and first two edge lengths for a
+    # list of faces, plus the values the generator derives from them.
+    # Row i describes the i-th face of the list the metrics were taken for.
+    def __init__(self, normals, centers, edge_lengths):
+        self.normals = normals
+        self.centers = centers
+        self.edge_lengths = edge_lengths
+
+        # Rough aspect ratio, always >= 1 (see get_aspect_ratio).
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ratio = np.maximum(0.01, edge_lengths[:, 0] / edge_lengths[:, 1])
+        self.aspect = np.where(ratio < 1.0, 1.0 / ratio, ratio)
+
+        # Does the face point away from the origin?
+        self.outward = (normals * centers).sum(axis=1) > 0
+
+        # Same precedence as the if/elif chain in the categorization pass.
+        nx, ny, nz = normals[:, 0], normals[:, 1], normals[:, 2]
+        orientation = np.full(len(normals), FACE_OTHER, dtype=np.int8)
+        orientation[np.abs(ny) > 0.9] = FACE_SIDE
+        orientation[nz < -0.9] = FACE_BOTTOM
+        orientation[nz > 0.9] = FACE_TOP
+        orientation[nx > 0.9] = FACE_FRONT
+        orientation[nx < -0.95] = FACE_REAR
+        self.orientation = orientation
+
+def ortho_bases(normals):
+    # Two vectors perpendicular to each of the (n, 3) normals, picked the
+    # way Blender's ortho_basis_v3v3_v3 does.
+    x, y, z = normals[:, 0], normals[:, 1], normals[:, 2]
+    f = x * x + y * y
+    flat = f > 1.1920929e-07
+    d = np.where(flat, 1.0 / np.sqrt(np.where(flat, f, 1.0)), 0.0)
+    base1 = np.stack((y * d, -x * d, np.zeros_like(x)), axis=1)
+    base2 = np.stack((-z * base1[:, 1], z * base1[:, 0], x * base1[:, 1] - y * base1[:, 0]), axis=1)
+    base1[~flat] = (1.0, 0.0, 0.0)
+    base1[~flat & (z < 0.0), 0] = -1.0
+    base2[~flat] = (0.0, 1.0, 0.0)
+    return base1, base2
+
+############################################################################
+# Fractal noise (port of the Blender noise subdivide_edges uses).
+############################################################################
+# Blender's noise permutation table, repeated so lookups can run past 255.
+NOISE_HASH = np.array((
+    0xA2, 0xA0, 0x19, 0x3B, 0xF8, 0xEB, 0xAA, 0xEE, 0xF3, 0x1C, 0x67, 0x28, 0x1D, 0xED, 0x00, 0xDE,
+    0x95, 0x2E, 0xDC, 0x3F, 0x3A, 0x82, 0x35, 0x4D, 0x6C, 0xBA, 0x36, 0xD0, 0xF6, 0x0C, 0x79, 0x32,
+    0xD1, 0x59, 0xF4, 0x08, 0x8B, 0x63, 0x89, 0x2F, 0xB8, 0xB4, 0x97, 0x83, 0xF2, 0x8F, 0x18, 0xC7,
+    0x51, 0x14, 0x65, 0x87, 0x48, 0x20, 0x42, 0xA8, 0x80, 0xB5, 0x40, 0x13, 0xB2, 0x22, 0x7E, 0x57,
+    0xBC, 0x7F, 0x6B, 0x9D, 0x86, 0x4C, 0xC8, 0xDB, 0x7C, 0xD5, 0x25, 0x4E, 0x5A, 0x55, 0x74, 0x50,
+    0xCD, 0xB3, 0x7A, 0xBB, 0xC3, 0xCB, 0xB6, 0xE2, 0xE4, 0xEC, 0xFD, 0x98, 0x0B, 0x96, 0xD3, 0x9E,
+    0x5C, 0xA1, 0x64, 0xF1, 0x81, 0x61, 0xE1, 0xC4, 0x24, 0x72, 0x49, 0x8C, 0x90, 0x4B, 0x84, 0x34,
+    0x38, 0xAB, 0x78, 0xCA, 0x1F, 0x01, 0xD7, 0x93, 0x11, 0xC1, 0x58, 0xA9, 0x31, 0xF9, 0x44, 0x6D,
+    0xBF, 0x33, 0x9C, 0x5F, 0x09, 0x94, 0xA3, 0x85, 0x06, 0xC6, 0x9A, 0x1E, 0x7B, 0x46, 0x15, 0x30,
+    0x27, 0x2B, 0x1B, 0x71, 0x3C, 0x5B, 0xD6, 0x6F, 0x62, 0xAC, 0x4F, 0xC2, 0xC0, 0x0E, 0xB1, 0x23,
+    0xA7, 0xDF, 0x47, 0xB0, 0x77, 0x69, 0x05, 0xE9, 0xE6, 0xE7, 0x76, 0x73, 0x0F, 0xFE, 0x6E, 0x9B,
+    0x56, 0xEF, 0x12, 0xA5, 0x37, 0xFC, 0xAE, 0xD9, 0x03, 0x8E, 0xDD, 0x10, 0xB9, 0xCE, 0xC9, 0x8D,
+    0xDA, 0x2A, 0xBD, 0x68, 0x17, 0x9F, 0xBE, 0xD4, 0x0A, 0xCC, 0xD2, 0xE8, 0x43, 0x3D, 0x70, 0xB7,
+    0x02, 0x7D, 0x99, 0xD8, 0x0D, 0x60, 0x8A, 0x04, 0x2C, 0x3E, 0x92, 0xE5, 0xAF, 0x53, 0x07, 0xE0,
+    0x29, 0xA6, 0xC5, 0xE3, 0xF5, 0xF7, 0x4A, 0x41, 0x26, 0x6A, 0x16, 0x5E, 0x52, 0x2D, 0x21, 0xAD,
+    0xF0, 0x91, 0xFF, 0xEA, 0x54, 0xFA, 0x66, 0x1A, 0x45, 0x39, 0xCF, 0x75, 0xA4, 0x88, 0xFB, 0x5D,
+) * 2, dtype=np.int64)
+
+# subdivide_edges moves the noise lookup by three floats drawn from
+# Blender's RNG seeded with the operator's seed, which is never set here.
+FRACTAL_OFFSET = np.array((58.76612854003906, 100.17371368408203, 68.22747802734375), dtype=np.float32)
+
+# Octaves of turbulence subdivide_edges asks for.
+FRACTAL_OCTAVES = 15
+
+def noise_grad(hashes, x, y, z):
+    h = hashes & 15
+    u = np.where(h < 8, x, y)
+    v = np.where(h < 4, y, np.where((h == 12) | (h == 14), x, z))
+    return np.where(h & 1, -u, u) + np.where(h & 2, -v, v)
+
+def perlin_noise(x, y, z):
+    # Improved Perlin noise in [-1, 1] (Blender's newPerlin) of arrays of
+    # coordinates. Blender computes in single precision, so does this.
+    fx, fy, fz = np.floor(x), np.floor(y), np.floor(z)
+    hx = fx.astype(np.int64) & 255
+    hy = fy.astype(np.int64) & 255
+    hz = fz.astype(np.int64) & 255
+    x, y, z = x - fx, y - fy, z - fz
+    u = x * x * x * (x * (x * 6.0 - 15.0) + 10.0)
+    v = y * y * y * (y * (y * 6.0 - 15.0) + 10.0)
+    w = z * z * z * (z * (z * 6.0 - 15.0) + 10.0)
+    a = NOISE_HASH[hx] + hy
+    aa = NOISE_HASH[a] + hz
+    ab = NOISE_HASH[a + 1] + hz
+    b = NOISE_HASH[hx + 1] + hy
+    ba = NOISE_HASH[b] + hz
+    bb = NOISE_HASH[b + 1] + hz
+    x1, y1, z1 = x - 1.0, y - 1.0, z - 1.0
+    return lerp(lerp(lerp(noise_grad(NOISE_HASH[aa], x, y, z), noise_grad(NOISE_HASH[ba], x1, y, z), u),
+                     lerp(noise_grad(NOISE_HASH[ab], x, y1, z), noise_grad(NOISE_HASH[bb], x1, y1, z), u), v),
+                lerp(lerp(noise_grad(NOISE_HASH[aa + 1], x, y, z1), noise_grad(NOISE_HASH[ba + 1], x1, y, z1), u),
+                     lerp(noise_grad(NOISE_HASH[ab + 1], x, y1, z1), noise_grad(NOISE_HASH[bb + 1], x1, y1, z1), u), v), w)
+
+def turbulence(x, y, z, octaves=FRACTAL_OCTAVES):
+    # Blender's BLI_gTurbulence with noise size 1, soft noise and the
+    # improved Perlin basis, in [0, 1].
+    total = np.zeros_like(x)
+    amp = 1.0
+    scale = 1.0
+    for i in range(octaves + 1):
+        total += (0.5 + 0.5 * perlin_noise(x * scale, y * scale, z * scale)) * amp
+        amp *= 0.5
+        scale *= 2.0
+    return total * (float(1 << octaves) / float((1 << (octaves + 1)) - 1))
+
+def fractal_offsets(co, fac, normals):
+    # Moves subdivide_edges gives the points co, cuts and edge ends alike,
+    # when fractal is set. fac is fractal times the length of the edge cut
+    # and normals the mean (not normalized) of its vertex normals.
+    co2 = (co.astype(np.float32) + FRACTAL_OFFSET) * np.float32(10.0)
+    x, y, z = co2[:, 0], co2[:, 1], co2[:, 2]
+    t0 = fac * (turbulence(x, y, z) - 0.5)
+    t1 = fac * (turbulence(y, x, z) - 0.5)
+    t2 = fac * (turbulence(y, z, x) - 0.5)
+    base1, base2 = ortho_bases(normals)
+    return normals * t0[:, None] + base1 * t1[:, None] + base2 * t2[:, None]
+
+############################################################################
+# Mesh storage.
+############################################################################
+class MeshArrays:
+    # Compact result of a build: vertex coordinates plus polygons stored
+    # as a flat loop array, ready for foreach_set / from_pydata.
+    def __init__(self, verts, loops, loop_starts, loop_totals, materials):
+        self.verts = verts
+        self.loops = loops
+        self.loop_starts = loop_starts
+        self.loop_totals = loop_totals
+        self.materials = materials
+
+    @property
+    def num_verts(self):
+        return len(self.verts)
+
+    @property
+    def num_faces(self):
+        return len(self.loop_starts)
+
+    def face_lists(self):
+        loops = self.loops.tolist()
+        return [loops[start:start + total] for start, total in
+                zip(self.loop_starts.tolist(), self.loop_totals.tolist())]
+
+class ArrayMesh:
+    def __init__(self):
+        self.verts = np.zeros((256, 3))
+        self.num_verts = 0
+        self.face_verts = []    # slot -> tuple of vertex indices, None when free
+        self.face_mat = []      # slot -> material index
+        self.face_id = []       # slot -> id of the face in that slot
+        self.free_slots = []
+        self.slot_of = {}       # face id -> slot
+        self.next_id = 0
+        self.vert_slots = None  # vertex -> set of slots using it, built by index_verts
+        self.edges = {}         # (low, high) vertex pair -> (rank, first vertex)
+        self.next_rank = 0
+        self.moved = {}         # vertex -> position at the last operator, see vert_normals
+        self.primitives = PrimitiveBatch()
+
+    def copy(self):
+        # Same faces under the same ids, with an empty primitive batch.
+        other = ArrayMesh()
+        other.verts = self.verts.copy()
+        other.num_verts = self.num_verts
+        other.face_verts = list(self.face_verts)
+        other.face_mat = list(self.face_mat)
+        other.face_id = list(self.face_id)
+        other.free_slots = list(self.free_slots)
+        other.slot_of = dict(self.slot_of)
+        other.next_id = self.next_id
+        other.edges = dict(self.edges)
+        other.next_rank = self.next_rank
+        other.moved = dict(self.moved)
+        return other
+
+    def index_slot(self, slot, verts):
+        # Keeps vert_slots up to date once split_edge has built it.
+        if self.vert_slots != None:
+            for v in verts:
+                self.vert_slots.setdefault(v, set()).add(slot)
+
+    def unindex_slot(self, slot, verts):
+        if self.vert_slots != None:
+            for v in verts:
+                self.vert_slots[v].discard(slot)
+
+    def add_verts(self, co):
+        co = np.asarray(co, dtype=float).reshape(-1, 3)
+        start = self.num_verts
+        end = start + len(co)
+        if end > len(self.verts):
+            grown = np.zeros((max(end, len(self.verts) * 2), 3))
+            grown[:start] = self.verts[:start]
+            self.verts = grown
+        self.verts[start:end] = co
+        self.num_verts = end
+        return list(range(start, end))
+
+    # BMesh walks edges in the order they were created, and subdivide_edges
+    # works through them in that order, so the hull's edges are ranked by
+    # creation. A new edge runs from a to b.
+    def add_edge(self, a, b):
+        key = (a, b) if a < b else (b, a)
+        if key not in self.edges:
+            self.edges[key] = (self.next_rank, a)
+            self.next_rank += 1
+
+    def edge(self, a, b):
+        # Returns (rank, first vertex, second vertex) of edge a-b.
+        rank, first = self.edges[(a, b) if a < b else (b, a)]
+        return rank, first, b if first == a else a
+
+    def add_face(self, vert_indices, material=0):
+        # Missing edges are created like BMesh does, the closing one first.
+        verts = tuple(vert_indices)
+        prev = verts[-1]
+        for v in verts:
+            self.add_edge(prev, v)
+            prev = v
+        if self.free_slots:
+            slot = self.free_slots.pop()
+            self.face_verts[slot] = verts
+            self.face_mat[slot] = material
+            self.face_id[slot] = self.next_id
+        else:
+            slot = len(self.face_verts)
+            self.face_verts.append(verts)
+            self.face_mat.append(material)
+            self.face_id.append(self.next_id)
+        self.index_slot(slot, verts)
+        self.slot_of[self.next_id] = slot
+        self.next_id += 1
+        return self.next_id - 1
+
+    def add_faces(self, faces, materials):
+        # Appends many faces at once; only falls back to add_face while
+        # there are freed slots to fill first. Used for primitives, which
+        # are never subdivided, so their edges are not ranked.
+        result = []
+        faces = deque(tuple(face) for face in faces)
+        materials = deque(materials)
+        while self.free_slots and faces:
+            result.append(self.add_face(faces.popleft(), materials.popleft()))
+        first_id = self.next_id
+        first_slot = len(self.face_verts)
+        count = len(faces)
+        self.face_verts.extend(faces)
+        self.face_mat.extend(materials)
+        if self.vert_slots != None:
+            for slot, verts in enumerate(faces, first_slot):
+                self.index_slot(slot, verts)
+        self.face_id.extend(range(first_id, first_id + count))
+        self.slot_of.update(zip(range(first_id, first_id + count), range(first_slot, first_slot + count)))
+        self.next_id += count
+        result.extend(range(first_id, first_id + count))
+        return result
+
+    def remove_face(self, face):
+        slot = self.slot_of.pop(face)
+        self.unindex_slot(slot, self.face_verts[slot])
+        self.face_verts[slot] = None
+        self.free_slots.append(slot)
+
+    def faces(self):
+        return [self.face_id[slot] for slot, verts in enumerate(self.face_verts) if verts != None]
+
+    def is_valid(self, face):
+        return face in self.slot_of
+
+    def verts_of(self, face):
+        return self.face_verts[self.slot_of[face]]
+
+    def co_of(self, face):
+        return self.verts[list(self.verts_of(face))]
+
+    def set_verts(self, face, vert_indices):
+        slot = self.slot_of[face]
+        self.unindex_slot(slot, self.face_verts[slot])
+        self.face_verts[slot] = tuple(vert_indices)
+        self.index_slot(slot, self.face_verts[slot])
+
+    def material(self, face):
+        return self.face_mat[self.slot_of[face]]
+
+    def set_material(self, face, material):
+        self.face_mat[self.slot_of[face]] = int(material)
+
+    def normal(self, face):
+        return polygon_normal(self.co_of(face))
+
+    def center(self, face):
+        co = self.co_of(face)
+        return (co.min(axis=0) + co.max(axis=0)) * 0.5
+
+    def area(self, face):
+        co = self.co_of(face)
+        nxt = np.roll(co, -1, axis=0)
+        return sqrt(np.square(np.cross(co, nxt).sum(axis=0)).sum()) * 0.5
+
+    def face_metrics(self, faces):
+        # One vectorized pass per face size instead of a python loop per face.
+        count = len(faces)
+        normals = np.zeros((count, 3))
+        centers = np.zeros((count, 3))
+        edge_lengths = np.zeros((count, 2))
+        by_size = {}
+        for row, face in enumerate(faces):
+            verts = self.verts_of(face)
+            rows, indices = by_size.setdefault(len(verts), ([], []))
+            rows.append(row)
+            indices.append(verts)
+        for rows, indices in by_size.values():
+            co = self.verts[np.array(indices)]
+            normals[rows] = polygon_normals(co)
+            centers[rows] = (co.min(axis=1) + co.max(axis=1)) * 0.5
+            edge_lengths[rows, 0] = np.sqrt(np.square(co[:, 1] - co[:, 0]).sum(axis=1))
+            edge_lengths[rows, 1] = np.sqrt(np.square(co[:, 2] - co[:, 1]).sum(axis=1))
+        return FaceMetrics(normals, centers, edge_lengths)
+
+    def index_verts(self):
+        # Builds the vertex -> slots index on first use.
+        if self.vert_slots == None:
+            self.vert_slots = {}
+            for slot, verts in enumerate(self.face_verts):
+                if verts != None:
+                    self.index_slot(slot, verts)
+
+    def neighbour_sizes(self, face):
+        # Vertex counts of the faces across each edge of face, one per
+        # edge a face shares with it.
+        self.index_verts()
+        verts = self.verts_of(face)
+        own = self.slot_of[face]
+        sizes = []
+        for a, b in zip(verts, verts[1:] + verts[:1]):
+            for slot in self.vert_slots[a] & self.vert_slots[b]:
+                if slot != own:
+                    sizes.append(len(self.face_verts[slot]))
+        return sizes
+
+    def vert_normals(self, verts):
+        # Normals of verts as BMesh computes them: the normals of the faces
+        # around the vertex weighted by the face's angle at it, falling
+        # back to the vertex position when those cancel out. Operators
+        # update the normals when they finish, so vertices moved directly
+        # since count at their old position.
+        self.index_verts()
+        normals = np.zeros((len(verts), 3))
+        for row, v in enumerate(verts):
+            for slot in self.vert_slots.get(v, ()):
+                face = self.face_verts[slot]
+                co = self.verts[list(face)]
+                if self.moved:
+                    co = np.array([self.moved.get(u, c) for u, c in zip(face, co)])
+                i = face.index(v)
+                prev = normalized(co[i - 1] - co[i])
+                nxt = normalized(co[(i + 1) % len(face)] - co[i])
+                angle = np.arccos(np.clip(prev.dot(nxt), -1.0, 1.0))
+                normals[row] += polygon_normal(co) * angle
+            if not normals[row].any():
+                normals[row] = self.moved.get(v, self.verts[v])
+            normals[row] = normalized(normals[row])
+        return normals
+
+    def move_verts(self, verts, co):
+        # Moves verts outside of an operator, see vert_normals.
+        for v in verts:
+            if v not in self.moved:
+                self.moved[v] = self.verts[v].copy()
+        self.verts[verts] = co
+
+    def split_edge(self, a, b, new_verts):
+        # Inserts new_verts (ordered a to b) into every face using edge a-b.
+        # Only faces sharing both vertices are looked at, found through the
+        # vertex -> slots index. Like BM_edge_split, the edge keeps its rank
+        # for the piece at b and the other pieces are new edges from a on,
+        # so a must be the edge's first vertex.
+        rank = self.edges.pop((a, b) if a < b else (b, a))[0]
+        prev = a
+        for v in new_verts:
+            self.add_edge(prev, v)
+            prev = v
+        self.edges[(prev, b) if prev < b else (b, prev)] = (rank, prev)
+        self.index_verts()
+        slots = self.vert_slots.get(a, set()) & self.vert_slots.get(b, set())
+        for slot in slots:
+            verts = self.face_verts[slot]
+            n = len(verts)
+            for i in range(n):
+                if verts[i] == a and verts[(i + 1) % n] == b:
+                    self.face_verts[slot] = verts[:i + 1] + tuple(new_verts) + verts[i + 1:]
+                    break
+                if verts[i] == b and verts[(i + 1) % n] == a:
+                    self.face_verts[slot] = verts[:i + 1] + tuple(reversed(new_verts)) + verts[i + 1:]
+                    break
+            else:
+                continue
+            self.index_slot(slot, new_verts)
+
+    def to_arrays(self):
+        # Drops unused vertices and packs the faces into flat arrays.
+        faces = [verts for verts in self.face_verts if verts != None]
+        materials = [mat for verts, mat in zip(self.face_verts, self.face_mat) if verts != None]
+        totals = np.array([len(verts) for verts in faces], dtype=np.int32)
+        loops = np.array([i for verts in faces for i in verts], dtype=np.int32)
+        used = np.zeros(self.num_verts, dtype=bool)
+        used[loops] = True
+        remap = np.cumsum(used, dtype=np.int32) - 1
+        starts = np.zeros(len(faces), dtype=np.int32)
+        if len(faces) > 1:
+            starts[1:] = np.cumsum(totals)[:-1]
+        return MeshArrays(self.verts[:self.num_verts][used].astype(np.float32),
+                          remap[loops].astype(np.int32),
+                          starts,
+                          totals,
+                          np.array(materials, dtype=np.int32))
+
+############################################################################
+# Operations (array versions of the bmesh.ops calls in events.py).
+############################################################################
+def create_cube(mesh, size=1.0):
+    # Same vertex and face order as bmesh.ops.create_cube.
+    off = size * 0.5
+    co = [(x * off, y * off, z * off) for x in (-1, 1) for y in (-1, 1) for z in (-1, 1)]
+    verts = mesh.add_verts(co)
+    for quad in ((1, 3, 2, 0), (3, 7, 6, 2), (7, 5, 4, 6), (5, 1, 0, 4), (0, 2, 6, 4), (5, 7, 3, 1)):
+        mesh.add_face([verts[i] for i in quad])
+    return verts
+
+def translate_verts(mesh, verts, vec):
+    mesh.moved.clear()
+    mesh.verts[list(verts)] += vec
+
+def transform_verts(mesh, verts, mat):
+    mesh.moved.clear()
+    verts = list(verts)
+    mesh.verts[verts] = transform(mat, mesh.verts[verts])
+
+# Like bmesh.ops.extrude_discrete_faces on a single face. Returns the new
+# cap face. As with bmesh, only the cap is reported back; the side faces
+# take the original face's material.
+def extrude_discrete_face(mesh, face):
+    return extrude_discrete_faces(mesh, [face])[0]
+
+# Like bmesh.ops.extrude_discrete_faces on a list of faces. Every face gets
+# its cap and side faces before the originals are deleted, in slot order,
+# so their slots are only handed out again by later operations. Returns
+# the caps in the order of faces.
+def extrude_discrete_faces(mesh, faces):
+    mesh.moved.clear()
+    caps = []
+    for face in faces:
+        old = mesh.verts_of(face)
+        material = mesh.material(face)
+        new = mesh.add_verts(mesh.verts[list(old)])
+        n = len(old)
+        # BM_face_copy creates the cap's edges in loop order, backwards.
+        for i in range(n):
+            mesh.add_edge(new[(i + 1) % n], new[i])
+        caps.append(mesh.add_face(new, material))
+        for i in range(n):
+            j = (i + 1) % n
+            mesh.add_face((old[j], new[j], new[i], old[i]), material)
+    for face in sorted(faces, key=lambda face: mesh.slot_of[face]):
+        mesh.remove_face(face)
+    return caps
+
+# Extrudes each face like extrude_face, then scales the new cap about its
+# centre, for a whole set of faces at once. A uniform scale in face space
+# is a scale about the centre, so no face matrices are needed. Returns the
+# caps in the order of faces.
+def extrude_and_inset_faces(mesh, faces, translate_forwards, scale):
+    caps = extrude_discrete_faces(mesh, faces)
+    by_size = {}
+    for cap in caps:
+        verts = mesh.verts_of(cap)
+        by_size.setdefault(len(verts), []).append(verts)
+    for verts in by_size.values():
+        verts = np.array(verts)
+        co = mesh.verts[verts]
+        offset = polygon_normals(co) * translate_forwards
+        center = (co.min(axis=1) + co.max(axis=1)) * 0.5
+        mesh.move_verts(verts.ravel(), ((center + offset)[:, None] + (co - center[:, None]) * scale).reshape(-1, 3))
+    return caps
+
+############################################################################
+# Primitive library.
+############################################################################
+# Every cone, cylinder, disc and sphere the detailers add is one of a few
+# canonical shapes placed with a matrix. The topology and unit geometry of
+# each shape is built once per session and kept here.
+PRIMITIVE_TEMPLATES = {}
+
+def cone_template(segments, cap_ends, tips=(False, False)):
+    # Unit ring directions, faces (indices into bottom ring + top ring) and
+    # vertex count matching bmesh.ops.create_cone (diameter is really the
+    # radius in 2.7x). create_cone removes doubles, so a ring of radius 0
+    # (tips[0] for the bottom, tips[1] for the top) is a single vertex,
+    # its quads are triangles and it has no cap.
+    key = ("cone", segments, cap_ends, tips)
+    if key not in PRIMITIVE_TEMPLATES:
+        phi = np.arange(segments) * (2.0 * pi / segments)
+        ring = np.stack((-np.sin(phi), np.cos(phi)), axis=1)
+        bottom = [0] * segments if tips[0] else list(range(segments))
+        start = len(set(bottom))
+        top = [start] * segments if tips[1] else list(range(start, start + segments))
+        faces = []
+        for a in range(segments):
+            b = (a + 1) % segments
+            quad = (bottom[b], top[b], top[a], bottom[a])
+            faces.append(tuple(v for i, v in enumerate(quad) if v != quad[i - 1]))
+        if cap_ends:
+            if not tips[0]:
+                faces.append(tuple(bottom))
+            if not tips[1]:
+                faces.append(tuple(reversed(top)))
+        PRIMITIVE_TEMPLATES[key] = (ring, faces, start + len(set(top)))
+    return PRIMITIVE_TEMPLATES[key]
+
+def icosphere_template(subdivisions):
+    # Unit icosahedron, subdivided and projected onto the sphere as needed.
+    # Oriented like bmesh.ops.create_icosphere's: poles on Z, a ring of five
+    # vertices either side at z = -+1/sqrt(5), the upper one starting on +X
+    # and the lower one turned half a step from it.
+    key = ("icosphere", subdivisions)
+    if key in PRIMITIVE_TEMPLATES:
+        return PRIMITIVE_TEMPLATES[key]
+    z, r = 1.0 / sqrt(5.0), 2.0 / sqrt(5.0)
+    co = [(0.0, 0.0, -1.0)]
+    co += [(r * cos(radians(a)), r * sin(radians(a)), -z) for a in (-36, -108, 180, 108, 36)]
+    co += [(r * cos(radians(a)), r * sin(radians(a)), z) for a in (-72, -144, 144, 72, 0)]
+    co += [(0.0, 0.0, 1.0)]
+    # Bottom cap, lower band, upper band and top cap, wound outwards.
+    tris = []
+    for i in range(5):
+        j = (i + 1) % 5
+        tris.append((0, 1 + i, 1 + j))
+        tris.append((1 + i, 6 + i, 1 + j))
+        tris.append((6 + i, 6 + j, 1 + j))
+        tris.append((11, 6 + j, 6 + i))
+    # Like create_icosphere, cut every edge 2^(subdivisions-1)-1 times and
+    # grid fill the triangles, the grid lines running between the edge
+    # cuts. Every new point is projected onto the sphere, so the cuts on a
+    # grid line are spaced between projected points.
+    cuts = (1 << (subdivisions - 1)) - 1 if subdivisions > 1 else 0
+    if cuts > 0:
+        co = [np.array(point) for point in co]
+        edge_points = {}
+        def edge_point(a, b, k):
+            # The k-th of cuts + 2 points running from a to b.
+            if k == 0:
+                return a
+            if k == cuts + 1:
+                return b
+            if (b, a) in edge_points:
+                return edge_points[b, a][cuts + 1 - k]
+            if (a, b) not in edge_points:
+                points = [a]
+                for i in range(1, cuts + 1):
+                    co.append(normalized(lerp(co[a], co[b], i / (cuts + 1.0))))
+                    points.append(len(co) - 1)
+                edge_points[a, b] = points + [b]
+            return edge_points[a, b][k]
+        refined = []
+        for a, b, c in tris:
+            rows = [[a]]
+            for r in range(1, cuts + 2):
+                left, right = edge_point(a, b, r), edge_point(a, c, r)
+                if r == cuts + 1:
+                    row = [edge_point(b, c, i) for i in range(r + 1)]
+                else:
+                    row = [left]
+                    for i in range(1, r):
+                        co.append(normalized(lerp(co[left], co[right], i / float(r))))
+                        row.append(len(co) - 1)
+                    row.append(right)
+                rows.append(row)
+            for r in range(cuts + 1):
+                for i in range(r + 1):
+                    refined.append((rows[r][i], rows[r + 1][i], rows[r + 1][i + 1]))
+                    if i < r:
+                        refined.append((rows[r][i], rows[r + 1][i + 1], rows[r][i + 1]))
+        tris = refined
+    PRIMITIVE_TEMPLATES[key] = (np.array(co), tris)
+    return PRIMITIVE_TEMPLATES[key]
+
+def transform_many(matrices, co):
+    # Applies a (k, 4, 4) stack of matrices to a (k, n, 3) stack of points.
+    return np.einsum('kij,knj->kni', matrices[:, 0:3, 0:3], co) + matrices[:, None, 0:3, 3]
+
+def stamp_faces(faces, count, stride, offset):
+    # Template faces repeated for count copies, stride verts apart.
+    result = []
+    for k in range(count):
+        base = offset + k * stride
+        result.extend(tuple(base + i for i in face) for face in faces)
+    return result
+
+class PrimitiveBatch:
+    # Primitive placements collected during a detail stage, written into
+    # the mesh with a single append once the stage is done.
+    def __init__(self):
+        self.cones = {}     # (segments, cap_ends, tips) -> list of (radius1, radius2, depth, matrix, material)
+        self.spheres = {}   # subdivisions -> list of (radius, matrix, material)
+        self.segment_scale = 1.0
+        self.max_subdivisions = None
+
+    def set_level(self, level):
+        # Coarser primitives for a generator.LodLevel.
+        self.segment_scale = level.segment_scale
+        self.max_subdivisions = level.max_subdivisions
+
+    def __len__(self):
+        return sum(len(items) for items in self.cones.values()) + \
+               sum(len(items) for items in self.spheres.values())
+
+    def counts(self):
+        # (verts, faces) the batch will add once placed.
+        verts = faces = 0
+        for key, items in self.cones.items():
+            ring, template, count = cone_template(*key)
+            verts += len(items) * count
+            faces += len(items) * len(template)
+        for subdivisions, items in self.spheres.items():
+            unit, template = icosphere_template(subdivisions)
+            verts += len(items) * len(unit)
+            faces += len(items) * len(template)
+        return verts, faces
+
+    def add_cone(self, cap_ends, segments, diameter1, diameter2, depth, matrix, material=Material.hull):
+        segments = int(segments)
+        if self.segment_scale != 1.0:
+            segments = max(3, int(segments * self.segment_scale))
+        key = (segments, bool(cap_ends), (diameter1 == 0, diameter2 == 0))
+        self.cones.setdefault(key, []).append(
+            (diameter1, diameter2, depth, np.asarray(matrix, dtype=float), int(material)))
+
+    def add_icosphere(self, subdivisions, diameter, matrix, material=Material.hull):
+        if self.max_subdivisions != None:
+            subdivisions = min(subdivisions, self.max_subdivisions)
+        self.spheres.setdefault(subdivisions, []).append(
+            (diameter, np.asarray(matrix, dtype=float), int(material)))
+
+    def build_groups(self):
+        # Returns a (key, verts, materials) group per primitive shape, in
+        # placement order, and empties the batch. key is ("cone", segments,
+        # cap_ends, tips) or ("sphere", subdivisions); materials holds one entry
+        # per face and the faces themselves follow from the key (see
+        # primitive_faces).
+        groups = []
+        for (segments, cap_ends, tips), items in sorted(self.cones.items()):
+            ring, template, count = cone_template(segments, cap_ends, tips)
+            radius1 = np.array([item[0] for item in items])
+            radius2 = np.array([item[1] for item in items])
+            depth = np.array([item[2] for item in items])
+            start = 1 if tips[0] else segments
+            local = np.zeros((len(items), count, 3))
+            local[:, :start, 0:2] = radius1[:, None, None] * ring[:start]
+            local[:, start:, 0:2] = radius2[:, None, None] * ring[:count - start]
+            local[:, :start, 2] = (-depth * 0.5)[:, None]
+            local[:, start:, 2] = (depth * 0.5)[:, None]
+            verts = transform_many(np.array([item[3] for item in items]), local).reshape(-1, 3)
+            materials = []
+            for item in items:
+                materials += [item[4]] * len(template)
+            groups.append((("cone", segments, cap_ends, tips), verts, materials))
+        for subdivisions, items in sorted(self.spheres.items()):
+            unit, template = icosphere_template(subdivisions)
+            radius = np.array([item[0] for item in items])
+            local = radius[:, None, None] * unit[None]
+            verts = transform_many(np.array([item[1] for item in items]), local).reshape(-1, 3)
+            materials = []
+            for item in items:
+                materials += [item[2]] * len(template)
+            groups.append((("sphere", subdivisions), verts, materials))
+        self.cones.clear()
+        self.spheres.clear()
+        return groups
+
+    def build(self, offset=0):
+        # Returns (verts, faces, materials) for everything collected, with
+        # vertex indices starting at offset, and empties the batch.
+        return stamp_groups(self.build_groups(), offset)
+
+def primitive_faces(key):
+    # Template faces and vertex count of one primitive of a group key.
+    if key[0] == "cone":
+        ring, template, count = cone_template(*key[1:])
+        return template, count
+    unit, template = icosphere_template(key[1])
+    return template, len(unit)
+
+def stamp_groups(groups, offset=0):
+    # Joins build_groups() output into (verts, faces, materials), with
+    # vertex indices starting at offset.
+    verts = []
+    faces = []
+    materials = []
+    count = offset
+    for key, group_verts, group_materials in groups:
+        template, stride = primitive_faces(key)
+        faces += stamp_faces(template, len(group_verts) // stride, stride, count)
+        verts.append(group_verts)
+        materials += group_materials
+        count += len(group_verts)
+    if verts:
+        verts = np.concatenate(verts)
+    else:
+        verts = np.zeros((0, 3))
+    return verts, faces, materials
+
+def merge_groups(results):
+    # Merges the build_groups() output of several batches, filled one
+    # after the other, into the groups a single batch holding all their
+    # primitives would have built.
+    merged = {}
+    for groups in results:
+        for key, verts, materials in groups:
+            parts = merged.setdefault(key, ([], []))
+            parts[0].append(verts)
+            parts[1].extend(materials)
+    return [(key, np.concatenate(merged[key][0]), merged[key][1]) for key in sorted(merged)]
+
+def place_groups(mesh, groups):
+    # Stamps build_groups() output into the mesh in one append.
+    if not groups:
+        return []
+    verts, faces, materials = stamp_groups(groups, mesh.num_verts)
+    mesh.moved.clear()
+    mesh.add_verts(verts)
+    return mesh.add_faces(faces, materials)
+
+def place_primitives(mesh, primitives):
+    # Stamps every collected primitive into the mesh in one append.
+    if len(primitives) == 0:
+        return []
+    return place_groups(mesh, primitives.build_groups())
+
+def create_cone(mesh, cap_ends, segments, diameter1, diameter2, depth, matrix, material=Material.hull):
+    # Like bmesh.ops.create_cone, placing a single library cone.
+    primitives = PrimitiveBatch()
+    primitives.add_cone(cap_ends, segments, diameter1, diameter2, depth, matrix, material)
+    return place_primitives(mesh, primitives)
+
+def create_icosphere(mesh, subdivisions, diameter, matrix, material=Material.hull):
+    primitives = PrimitiveBatch()
+    primitives.add_icosphere(subdivisions, diameter, matrix, material)
+    return place_primitives(mesh, primitives)
+
+# Like bmesh.ops.subdivide_edges on all edges of one face with
+# use_grid_fill=True. Edges are shared, so neighbouring faces receive the
+# new edge vertices too. Only quads are grid filled, matching the bmesh
+# patterns; other faces just get their edges split. Returns the faces
+# bmesh reports in 'geom': the grid cells and every face that had one of
+# its edges cut, in iteration order.
+def subdivide_face_grid(mesh, face, cuts, fractal):
+    corners = mesh.verts_of(face)
+    n = len(corners)
+    normal_of = dict(zip(corners, mesh.vert_normals(corners)))
+    mesh.moved.clear()
+
+    # BMesh cuts the edges in the order they were created, each from its
+    # first vertex on.
+    edges = sorted(mesh.edge(corners[i], corners[(i + 1) % n]) for i in range(n))
+    ends = np.array([(first, second) for rank, first, second in edges])
+    co_a = mesh.verts[ends[:, 0]]
+    co_b = mesh.verts[ends[:, 1]]
+    no_a = np.array([normal_of[v] for v in ends[:, 0]])
+    no_b = np.array([normal_of[v] for v in ends[:, 1]])
+    fac = fractal * np.sqrt(np.square(co_b - co_a).sum(axis=1))
+    mean = (no_a + no_b) * 0.5
+
+    # Cuts sit where they would without the fractal, then move by the
+    # noise scaled to their edge. The edge's ends move by it as well, the
+    # edge cut last winning for corners shared by two.
+    t = (np.arange(cuts) + 1.0) / (cuts + 1)
+    co = (co_a[:, None] + (co_b - co_a)[:, None] * t[:, None]).reshape(-1, 3)
+    side_normals = (no_a[:, None] + (no_b - no_a)[:, None] * t[:, None]).reshape(-1, 3)
+    side_normals /= np.sqrt(np.square(side_normals).sum(axis=1))[:, None]
+    new_verts = mesh.add_verts(co + fractal_offsets(co, np.repeat(fac, cuts), np.repeat(mean, cuts, axis=0)))
+    offsets = fractal_offsets(np.concatenate((co_a, co_b)), np.tile(fac, 2), np.tile(mean, (2, 1)))
+    for k, (a, b) in enumerate(ends):
+        mesh.verts[a] = co_a[k] + offsets[k]
+        mesh.verts[b] = co_b[k] + offsets[n + k]
+    normal_of.update(zip(new_verts, side_normals))
+    path = {}
+    for k, (a, b) in enumerate(ends):
+        cut = new_verts[k * cuts:(k + 1) * cuts]
+        mesh.split_edge(a, b, cut)
+        path[a, b] = [a] + cut + [b]
+        path[b, a] = path[a, b][::-1]
+    touched = set(slot for v in new_verts for slot in mesh.vert_slots[v])
+    if n != 4:
+        return [mesh.face_id[slot] for slot in sorted(touched)]
+    sides = [path[corners[i], corners[(i + 1) % 4]] for i in range(4)]
+
+    # Grid points, i runs along the first edge and j along the last one.
+    size = cuts + 2
+    grid = [[None] * size for i in range(size)]
+    for i in range(size):
+        grid[i][0] = sides[0][i]
+        grid[i][size - 1] = sides[2][size - 1 - i]
+    for j in range(size):
+        grid[0][j] = sides[3][size - 1 - j]
+        grid[size - 1][j] = sides[1][j]
+
+    # The inner points cut lines running from the first edge to the third
+    # one, which have already been moved by the noise.
+    lines = np.array([(grid[i][0], grid[i][size - 1]) for i in range(1, size - 1)])
+    co_a = mesh.verts[lines[:, 0]]
+    co_b = mesh.verts[lines[:, 1]]
+    co = (co_a[:, None] + (co_b - co_a)[:, None] * t[:, None]).reshape(-1, 3)
+    fac = np.repeat(fractal * np.sqrt(np.square(co_b - co_a).sum(axis=1)), cuts)
+    mean = np.repeat([(normal_of[a] + normal_of[b]) * 0.5 for a, b in lines], cuts, axis=0)
+    inner = mesh.add_verts(co + fractal_offsets(co, fac, mean))
+    for i in range(1, size - 1):
+        grid[i][1:size - 1] = inner[(i - 1) * cuts:i * cuts]
+        mesh.add_edge(grid[i][0], grid[i][size - 1])
+        mesh.split_edge(grid[i][0], grid[i][size - 1], grid[i][1:size - 1])
+    for i in range(1, size):
+        for j in range(1, size - 1):
+            mesh.add_edge(grid[i][j], grid[i - 1][j])
+
+    # BMesh splits the face so that it ends up as the cell in the far
+    # corner. The other cells are created along the last row first, then
+    # row by row.
+    material = mesh.material(face)
+    last = size - 2
+    order = [(i, last) for i in range(last)] + [(i, j) for i in range(last + 1) for j in range(last)]
+    def cell(i, j):
+        return (grid[i][j], grid[i + 1][j], grid[i + 1][j + 1], grid[i][j + 1])
+    mesh.set_verts(face, cell(last, last))
+    for i, j in order:
+        mesh.add_face(cell(i, j), material)
+    # Every cell has an inner point.
+    touched.update(slot for v in inner for slot in mesh.vert_slots[v])
+    return [mesh.face_id[slot] for slot in sorted(touched)]
+
+# Like bmesh.ops.symmetrize: cuts the mesh along the axis plane, keeps
+# one half and mirrors it across, welding the vertices on the plane.
+def symmetrize(mesh, direction):
+    mesh.moved.clear()
+    axis = direction % 3
+    sign = -1.0 if direction < 3 else 1.0
+    side = mesh.verts[:mesh.num_verts, axis] * sign
+    on_plane = np.abs(side) < SYMMETRIZE_DIST
+    mesh.verts[:mesh.num_verts][on_plane, axis] = 0.0
+    side[on_plane] = 0.0
+
+    # Cut every face along the plane, dropping the outer part. Like
+    # bisect_plane, only faces cut in two places are split; one cut more
+    # often (a concave face) goes with its outer vertices.
+    cuts = {}
+    def cut(a, b):
+        key = (min(a, b), max(a, b))
+        if key not in cuts:
+            t = side[a] / (side[a] - side[b])
+            point = lerp(mesh.verts[a], mesh.verts[b], t)
+            point[axis] = 0.0
+            cuts[key] = mesh.add_verts(point)[0]
+        return cuts[key]
+    for face in mesh.faces():
+        verts = mesh.verts_of(face)
+        if all(side[v] >= 0.0 for v in verts):
+            continue
+        kept = []
+        crossings = 0
+        n = len(verts)
+        for i in range(n):
+            a = verts[i]
+            b = verts[(i + 1) % n]
+            if side[a] >= 0.0:
+                kept.append(a)
+            if (side[a] >= 0.0) != (side[b] >= 0.0):
+                crossings += 1
+            if (side[a] > 0.0 and side[b] < 0.0) or (side[a] < 0.0 and side[b] > 0.0):
+                kept.append(cut(a, b))
+        if len(kept) < 3 or crossings > 2:
+            mesh.remove_face(face)
+        else:
+            mesh.set_verts(face, kept)
+        # Cut vertices were appended after side was taken.
+        side = np.append(side, np.zeros(mesh.num_verts - len(side)))
+
+    # Mirror the kept half, sharing the vertices that sit on the plane. A
+    # face lying in the plane would be welded back onto itself, so it is
+    # not copied.
+    mirrored = {}
+    def mirror(v):
+        if side[v] == 0.0:
+            return v
+        if v not in mirrored:
+            point = mesh.verts[v].copy()
+            point[axis] = -point[axis]
+            mirrored[v] = mesh.add_verts(point)[0]
+        return mirrored[v]
+    for face in mesh.faces():
+        verts = mesh.verts_of(face)
+        if any(side[v] != 0.0 for v in verts):
+            mesh.add_face([mirror(v) for v in reversed(verts)], mesh.material(face))
+
+############################################################################
+# Generation helpers (array versions of those in events.py).
+# The random draws must stay in exactly the same order as the originals.
+############################################################################
+def extrude_face(mesh, face, translate_forwards=0.0, extruded_face_list=None):
+    new_face = extrude_discrete_face(mesh, face)
+    if extruded_face_list != None:
+        extruded_face_list.append(new_face)
+    translate_verts(mesh, mesh.verts_of(new_face), mesh.normal(new_face) * translate_forwards)
+    return new_face
+
+def ribbed_extrude_face(mesh, face, translate_forwards, num_ribs=3, rib_scale=0.9):
+    translate_forwards_per_rib = translate_forwards / float(num_ribs)
+    new_face = face
+    for i in range(num_ribs):
+        new_face = extrude_face(mesh, new_face, translate_forwards_per_rib * 0.25)
+        new_face = extrude_face(mesh, new_face, 0.0)
+        scale_face(mesh, new_face, rib_scale, rib_scale, rib_scale)
+        new_face = extrude_face(mesh, new_face, translate_forwards_per_rib * 0.5)
+        new_face = extrude_face(mesh, new_face, 0.0)
+        scale_face(mesh, new_face, 1 / rib_scale, 1 / rib_scale, 1 / rib_scale)
+        new_face = extrude_face(mesh, new_face, translate_forwards_per_rib * 0.25)
+    return new_face
+
+def scale_face(mesh, face, scale_x, scale_y, scale_z):
+    face_space = get_face_matrix(mesh, face)
+    mat = face_space.dot(np.diag((scale_x, scale_y, scale_z, 1.0))).dot(np.linalg.inv(face_space))
+    transform_verts(mesh, set(mesh.verts_of(face)), mat)
+
+def get_face_matrix(mesh, face, pos=None):
+    co = mesh.co_of(face)
+    x_axis = normalized(co[1] - co[0])
+    z_axis = -mesh.normal(face)
+    y_axis = np.cross(z_axis, x_axis)
+    if pos is None:
+        pos = mesh.center(face)
+    mat = np.identity(4)
+    mat[0:3, 0] = x_axis
+    mat[0:3, 1] = y_axis
+    mat[0:3, 2] = z_axis
+    mat[0:3, 3] = pos
+    return mat
+
+def get_face_width_and_height(mesh, face):
+    if not mesh.is_valid(face) or len(mesh.verts_of(face)) < 4:
+        return -1, -1
+    co = mesh.co_of(face)
+    width = sqrt((co[0] - co[1]).dot(co[0] - co[1]))
+    height = sqrt((co[2] - co[1]).dot(co[2] - co[1]))
+    return width, height
+
+def get_aspect_ratio(mesh, face):
+    if not mesh.is_valid(face):
+        return 1.0
+    co = mesh.co_of(face)
+    edge0 = co[1] - co[0]
+    edge1 = co[2] - co[1]
+    face_aspect_ratio = max(0.01, sqrt(edge0.dot(edge0)) / sqrt(edge1.dot(edge1)))
+    if face_aspect_ratio < 1.0:
+        face_aspect_ratio = 1.0 / face_aspect_ratio
+    return face_aspect_ratio
+
+def is_rear_face(mesh, face):
+    return mesh.normal(face)[0] < -0.95
+
+def add_exhaust_to_face(mesh, face, rng):
+    if not mesh.is_valid(face):
+        return
+
+    # The more square the face is, the more grid divisions it might have
+    num_cuts = rng.randint(1, int(4 - get_aspect_ratio(mesh, face)))
+    cells = subdivide_face_grid(mesh, face, num_cuts, 0.02)
+
+    exhaust_length = rng.uniform(0.1, 0.2)
+    scale_outer = 1 / rng.uniform(1.3, 1.6)
+    scale_inner = 1 / rng.uniform(1.05, 1.1)
+    cells = [cell for cell in cells if is_rear_face(mesh, cell)]
+    for cell in cells:
+        mesh.set_material(cell, Material.hull_dark)
+    caps = extrude_and_inset_faces(mesh, cells, exhaust_length, scale_outer)
+    caps = extrude_and_inset_faces(mesh, caps, -exhaust_length * 0.9, scale_inner)
+    for cap in caps:
+        mesh.set_material(cap, Material.exhaust_burn)
+
+def add_grid_to_face(mesh, face, rng):
+    if not mesh.is_valid(face):
+        return
+    cells = subdivide_face_grid(mesh, face, rng.randint(2, 4), 0.02)
+    grid_length = rng.uniform(0.025, 0.15)
+    scale = 0.8
+    materials = [Material.hull_lights if rng.random() > 0.5 else Material.hull for cell in cells]
+    caps = extrude_and_inset_faces(mesh, cells, grid_length, scale)
+    for cap, material_index in zip(caps, materials):
+        if abs(mesh.normal(cap)[2]) < 0.707: # side face
+            mesh.set_material(cap, material_index)
+
+# Yields the interior grid positions used to place cylinders, turrets and antennas.
+def face_grid_positions(mesh, face, horizontal_step, vertical_step):
+    co = mesh.co_of(face)
+    for h in range(horizontal_step):
+        top = lerp(co[0], co[1], (h + 1) / float(horizontal_step + 1))
+        bottom = lerp(co[3], co[2], (h + 1) / float(horizontal_step + 1))
+        for v in range(vertical_step):
+            yield lerp(top, bottom, (v + 1) / float(vertical_step + 1))
+
+def add_cylinders_to_face(mesh, face, rng):
+    if not mesh.is_valid(face) or len(mesh.verts_of(face)) < 4:
+        return
+    horizontal_step = rng.randint(1, 3)
+    vertical_step = rng.randint(1, 3)
+    num_segments = rng.randint(6, 12)
+    face_width, face_height = get_face_width_and_height(mesh, face)
+    cylinder_depth = 1.3 * min(face_width / (horizontal_step + 2),
+                               face_height / (vertical_step + 2))
+    cylinder_size = cylinder_depth * 0.5
+    for pos in face_grid_positions(mesh, face, horizontal_step, vertical_step):
+        cylinder_matrix = get_face_matrix(mesh, face, pos).dot(rotation(90, 'X'))
+        mesh.primitives.add_cone(True, num_segments, cylinder_size, cylinder_size,
+                                 cylinder_depth, cylinder_matrix)
+
+def add_weapons_to_face(mesh, face, rng):
+    if not mesh.is_valid(face) or len(mesh.verts_of(face)) < 4:
+        return
+    horizontal_step = rng.randint(1, 2)
+    vertical_step = rng.randint(1, 2)
+    num_segments = 16
+    face_width, face_height = get_face_width_and_height(mesh, face)
+    weapon_size = 0.5 * min(face_width / (horizontal_step + 2),
+                            face_height / (vertical_step + 2))
+    weapon_depth = weapon_size * 0.2
+    normal = mesh.normal(face)
+    for pos in face_grid_positions(mesh, face, horizontal_step, vertical_step):
+        face_matrix = get_face_matrix(mesh, face, pos + normal * weapon_depth * 0.5).dot(
+            rotation(rng.uniform(0, 90), 'Z'))
+
+        # Turret foundation
+        mesh.primitives.add_cone(True, num_segments, weapon_size * 0.9, weapon_size,
+                                 weapon_depth, face_matrix)
+
+        # Turret left guard
+        left_guard_mat = face_matrix.dot(rotation(90, 'Y')).dot(
+            translation((0, 0, weapon_size * 0.6)))
+        mesh.primitives.add_cone(True, num_segments, weapon_size * 0.6, weapon_size * 0.5,
+                                 weapon_depth * 2, left_guard_mat)
+
+        # Turret right guard
+        right_guard_mat = face_matrix.dot(rotation(90, 'Y')).dot(
+            translation((0, 0, weapon_size * -0.6)))
+        mesh.primitives.add_cone(True, num_segments, weapon_size * 0.5, weapon_size * 0.6,
+                                 weapon_depth * 2, right_guard_mat)
+
+        # Turret housing
+        upward_angle = rng.uniform(0, 45)
+        turret_house_mat = face_matrix.dot(rotation(upward_angle, 'X')).dot(
+            translation((0, weapon_size * -0.4, 0)))
+        mesh.primitives.add_cone(True, 8, weapon_size * 0.4, weapon_size * 0.4,
+                                 weapon_depth * 5, turret_house_mat)
+
+        # Turret barrels L + R
+        mesh.primitives.add_cone(True, 8, weapon_size * 0.1, weapon_size * 0.1, weapon_depth * 6,
+                                 turret_house_mat.dot(translation((weapon_size * 0.2, 0, -weapon_size))))
+        mesh.primitives.add_cone(True, 8, weapon_size * 0.1, weapon_size * 0.1, weapon_depth * 6,
+                                 turret_house_mat.dot(translation((weapon_size * -0.2, 0, -weapon_size))))
+
+def add_sphere_to_face(mesh, face, rng):
+    if not mesh.is_valid(face):
+        return
+    face_width, face_height = get_face_width_and_height(mesh, face)
+    sphere_size = rng.uniform(0.4, 1.0) * min(face_width, face_height)
+    sphere_matrix = get_face_matrix(mesh, face,
+                                    mesh.center(face) - mesh.normal(face) * \
+                                    rng.uniform(0, sphere_size * 0.5))
+    mesh.primitives.add_icosphere(3, sphere_size, sphere_matrix, Material.hull)
+
+def add_surface_antenna_to_face(mesh, face, rng):
+    if not mesh.is_valid(face) or len(mesh.verts_of(face)) < 4:
+        return
+    horizontal_step = rng.randint(4, 10)
+    vertical_step = rng.randint(4, 10)
+    normal = mesh.normal(face)
+    for pos in face_grid_positions(mesh, face, horizontal_step, vertical_step):
+        if rng.random() > 0.9:
+            face_size = sqrt(mesh.area(face))
+            depth = rng.uniform(0.1, 1.5) * face_size
+            depth_short = depth * rng.uniform(0.02, 0.15)
+            base_diameter = rng.uniform(0.005, 0.05)
+
+            material_index = Material.hull if rng.random() > 0.5 else Material.hull_dark
+
+            # Spire
+            num_segments = rng.uniform(3, 6)
+            mesh.primitives.add_cone(False, num_segments, 0, base_diameter, depth,
+                                     get_face_matrix(mesh, face, pos + normal * depth * 0.5),
+                                     material_index)
+
+            # Base
+            diameter1 = base_diameter * rng.uniform(1, 1.5)
+            diameter2 = base_diameter * rng.uniform(1.5, 2)
+            mesh.primitives.add_cone(True, num_segments, diameter1, diameter2, depth_short,
+                                     get_face_matrix(mesh, face, pos + normal * depth_short * 0.45),
+                                     material_index)
+
+def add_disc_to_face(mesh, face, rng):
+    if not mesh.is_valid(face):
+        return
+    face_width, face_height = get_face_width_and_height(mesh, face)
+    depth = 0.125 * min(face_width, face_height)
+    center = mesh.center(face)
+    normal = mesh.normal(face)
+    mesh.primitives.add_cone(True, 32, depth * 3, depth * 4, depth,
+                             get_face_matrix(mesh, face, center + normal * depth * 0.5))
+    mesh.primitives.add_cone(False, 32, depth * 1.25, depth * 2.25, 0.0,
+                             get_face_matrix(mesh, face, center + normal * depth * 1.05),
+                             Material.glow_disc)
+
+############################################################################
+# Parallel face detail.
+############################################################################
+# Helpers of the detail stages that only read their face and queue
+# primitives, so their faces can be detailed in any order and in other
+# processes. Exhaust and grid split edges shared with the neighbouring
+# faces and always run in the builder's process.
+PARALLEL_DETAIL = {
+    "antenna": add_surface_antenna_to_face,
+    "weapons": add_weapons_to_face,
+    "sphere": add_sphere_to_face,
+    "disc": add_disc_to_face,
+    "cylinders": add_cylinders_to_face,
+}
+
+def detail_faces_job(job):
+    # Runs in a worker: details a chunk of faces, passed as their corner
+    # coordinates, on a scratch mesh and returns the primitive groups.
+    stage, segment_scale, max_subdivisions, corners, seeds = job
+    mesh = ArrayMesh()
+    mesh.primitives.segment_scale = segment_scale
+    mesh.primitives.max_subdivisions = max_subdivisions
+    add_detail = PARALLEL_DETAIL[stage]
+    for co, face_seed in zip(corners, seeds):
+        face = mesh.add_face(mesh.add_verts(co))
+        add_detail(mesh, face, Random(face_seed))
+    return mesh.primitives.build_groups()
+
+############################################################################
+# Builder for generator.buildSpaceship.
+############################################################################
+class ArrayBuilder:
+    # pool is an optional multiprocessing.Pool for add_details.
+    def __init__(self, pool=None):
+        self.mesh = ArrayMesh()
+        self.pool = pool
+
+    def create_cube(self, scale):
+        create_cube(self.mesh, size=1)
+        self.mesh.verts[:self.mesh.num_verts] *= scale
+
+    def faces(self):
+        return self.mesh.faces()
+
+    def is_valid(self, face):
+        return self.mesh.is_valid(face)
+
+    def normal(self, face):
+        return self.mesh.normal(face)
+
+    def center(self, face):
+        return self.mesh.center(face)
+
+    def aspect_ratio(self, face):
+        return get_aspect_ratio(self.mesh, face)
+
+    def face_metrics(self, faces):
+        return self.mesh.face_metrics(faces)
+
+    def neighbourhood(self, face):
+        return len(self.mesh.verts_of(face)), self.mesh.neighbour_sizes(face)
+
+    def set_material(self, face, index):
+        self.mesh.set_material(face, index)
+
+    def extrude(self, face, distance):
+        return extrude_face(self.mesh, face, distance)
+
+    def ribbed_extrude(self, face, distance, num_ribs, rib_scale):
+        return ribbed_extrude_face(self.mesh, face, distance, num_ribs, rib_scale)
+
+    def scale(self, face, scale_x, scale_y, scale_z):
+        scale_face(self.mesh, face, scale_x, scale_y, scale_z)
+
+    def translate(self, face, vec):
+        translate_verts(self.mesh, self.mesh.verts_of(face), vec)
+
+    def rotate_y(self, face, angle):
+        transform_verts(self.mesh, self.mesh.verts_of(face), rotation(angle, 'Y'))
+
+    def add_exhaust(self, face, rng):
+        add_exhaust_to_face(self.mesh, face, rng)
+
+    def add_grid(self, face, rng):
+        add_grid_to_face(self.mesh, face, rng)
+
+    def add_surface_antenna(self, face, rng):
+        add_surface_antenna_to_face(self.mesh, face, rng)
+
+    def add_weapons(self, face, rng):
+        add_weapons_to_face(self.mesh, face, rng)
+
+    def add_sphere(self, face, rng):
+        add_sphere_to_face(self.mesh, face, rng)
+
+    def add_disc(self, face, rng):
+        add_disc_to_face(self.mesh, face, rng)
+
+    def add_cylinders(self, face, rng):
+        add_cylinders_to_face(self.mesh, face, rng)
+
+    def add_details(self, stage, faces, seeds):
+        # Details faces in the worker pool, faces[i] drawing from
+        # Random(seeds[i]), and places everything that comes back in one
+        # append, in the order the add_* methods would have. Returns False
+        # without a pool or for a stage that has to run here.
+        if self.pool == None or stage not in PARALLEL_DETAIL:
+            return False
+        mesh = self.mesh
+        primitives = mesh.primitives
+        jobs = []
+        corners = []
+        chunk_seeds = []
+        for face, face_seed in zip(faces, seeds):
+            if not mesh.is_valid(face):
+                continue
+            corners.append(mesh.co_of(face))
+            chunk_seeds.append(face_seed)
+            if len(corners) == DETAIL_CHUNK_SIZE:
+                jobs.append((stage, primitives.segment_scale, primitives.max_subdivisions, corners, chunk_seeds))
+                corners = []
+                chunk_seeds = []
+        if corners:
+            jobs.append((stage, primitives.segment_scale, primitives.max_subdivisions, corners, chunk_seeds))
+        place_groups(mesh, merge_groups(self.pool.map(detail_faces_job, jobs)))
+        return True
+
+    def place_primitives(self):
+        place_primitives(self.mesh, self.mesh.primitives)
+
+    def symmetrize(self, direction):
+        symmetrize(self.mesh, direction)
+
+    def fork(self):
+        # An independent builder carrying on from the current mesh.
+        other = ArrayBuilder(self.pool)
+        other.mesh = self.mesh.copy()
+        return other
+
+    def restore(self, snapshot):
+        # Carries on from a copy of another builder's mesh.
+        self.mesh = snapshot.mesh.copy()
+
+    def set_level(self, level):
+        self.mesh.primitives.set_level(level)
+
+    def counts(self):
+        # Includes primitives queued but not yet placed.
+        verts, faces = self.mesh.primitives.counts()
+        return self.mesh.num_verts + verts, len(self.mesh.slot_of) + faces
+
+    def finish(self):
+        return self.mesh.to_arrays()
+
+############################################################################
+# Background builds.
+############################################################################
+def build_spaceship_job(job):
+    # Runs in a worker: builds the first num_levels levels of detail of a
+    # ship from a dict of cls_AnimSpacGen parameters, see prefetch.py.
+    parameters, num_levels = job
+    return buildSpaceshipLods(Parameters(**parameters), ArrayBuilder(), LOD_LEVELS[:num_levels])
@@ -0,0 +1,163 @@
+# AddOn AnimSpacGen (c) 2016 Michael Davies, Atom
+# Animated Spaceship Generator 1.0.1
+# Manages and animates generated geometry.
+# https://github.com/a1studmuffin/SpaceshipGenerator/blob/master/README.md
+# Last Revision 06-27-2016
+
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# Logging for the add-on, on top of the standard logging module. Every
+# module logs through a child of the package logger:
+#
+#   log = logging.getLogger(__name__)
+#   log.debug("Regenerating [%s] on frame %i.", ob.name, frame)
+#
+# Importing this module gives the package logger its two handlers, once
+# per session however often the add-on is reloaded: the console, and a
+# ring buffer of recent records that dumpLog writes out on demand. The
+# console prints a module's records from its level in MODULE_LOG_LEVELS,
+# LOG_LEVEL for the others, the ring buffer keeps everything from
+# TRACE_LEVEL. The package logger drops records below all of these, so a
+# call nothing wants costs one compare. The buffer keeps records
+# unformatted, so pass plain values (names, numbers) as arguments, not
+# Blender data.
+#
+# From Blender's Python console, with the add-on's folder name as the
+# package, e.g. "AnimSpacGen":
+#
+#   from AnimSpacGen.log import setLogLevel, DEBUG
+#   setLogLevel(DEBUG)              # every module
+#   setLogLevel(DEBUG, "events")    # one module
+#
+# Kept free of bpy so the kernel and tools can log too.
+
+import sys, logging
+from logging import DEBUG, INFO, WARNING, ERROR
+from collections import deque
+
+LOG_LEVEL = INFO            # Default level printed to the console.
+MODULE_LOG_LEVELS = {}      # Console level per module name, e.g. {"events": DEBUG}.
+TRACE_LEVEL = DEBUG         # Level kept in the ring buffer.
+TRACE_CAPACITY = 2000       # Records kept in the ring buffer.
+LOG_PREFIX = "asg=#> "
+
+# Handler names, to find the ones an earlier import of this module added.
+CONSOLE_HANDLER_NAME = "asg_console"
+TRACE_HANDLER_NAME = "asg_trace"
+
+package_log = logging.getLogger(__package__)
+
+class ConsoleFormatter(logging.Formatter):
+    def format(self, record):
+        text = record.getMessage()
+        if record.levelno >= WARNING:
+            text = "%s: %s" % (record.levelname, text)
+        return LOG_PREFIX + text
+
+class ConsoleFilter(logging.Filter):
+    # Passes records at or above the console level of their module.
+    def __init__(self, level=LOG_LEVEL):
+        logging.Filter.__init__(self)
+        self.level = level
+        self.module_levels = dict(MODULE_LOG_LEVELS)
+
+    def filter(self, record):
+        module = record.name.rpartition(".")[2]
+        return record.levelno >= self.module_levels.get(module, self.level)
+
+    def lowestLevel(self):
+        return min([self.level] + list(self.module_levels.values()))
+
+class TraceHandler(logging.Handler):
+    # Keeps the most recent records in memory.
+    def __init__(self, capacity=TRACE_CAPACITY):
+        logging.Handler.__init__(self)
+        self.records = deque(maxlen=capacity)
+
+    def emit(self, record):
+        self.records.append(record)
+
+    def lines(self):
+        formatter = logging.Formatter("%(asctime)s.%(msecs)03d %(levelname)-7s %(module)-10s %(message)s", "%H:%M:%S")
+        return [formatter.format(record) for record in list(self.records)]
+
+def returnHandler(name):
+    for handler in package_log.handlers:
+        if handler.get_name() == name:
+            return handler
+    return None
+
+def returnConsoleFilter():
+    console = returnHandler(CONSOLE_HANDLER_NAME)
+    for console_filter in console.filters:
+        if hasattr(console_filter, "module_levels"):
+            return console_filter
+    return None
+
+def updatePackageLevel():
+    # Records below every console level and the trace level are dropped
+    # by the package logger, before anything is built for them.
+    package_log.setLevel(min(returnConsoleFilter().lowestLevel(),
+                             returnHandler(TRACE_HANDLER_NAME).level))
+
+def setupLogging():
+    # Levels set from the console live on the handlers and survive reloads.
+    console = returnHandler(CONSOLE_HANDLER_NAME)
+    if console == None:
+        console = logging.StreamHandler(sys.stdout)
+        console.set_name(CONSOLE_HANDLER_NAME)
+        console.setFormatter(ConsoleFormatter())
+        package_log.addHandler(console)
+    if returnConsoleFilter() == None:
+        console.addFilter(ConsoleFilter())
+    if returnHandler(TRACE_HANDLER_NAME) == None:
+        trace = TraceHandler()
+        trace.set_name(TRACE_HANDLER_NAME)
+        trace.setLevel(TRACE_LEVEL)
+        package_log.addHandler(trace)
+    package_log.propagate = False
+    updatePackageLevel()
+
+setupLogging()
+
+def setLogLevel(level, name=None):
+    # Console level of one module, or of all of them.
+    console_filter = returnConsoleFilter()
+    if name == None:
+        console_filter.level = level
+        console_filter.module_levels.clear()
+    else:
+        console_filter.module_levels[name] = level
+    updatePackageLevel()
+
+def setTraceLevel(level):
+    returnHandler(TRACE_HANDLER_NAME).setLevel(level)
+    updatePackageLevel()
+
+def dumpLog(path=None):
+    # Writes the ring buffer to path, or to stdout without one. Returns the
+    # number of records written.
+    trace = returnHandler(TRACE_HANDLER_NAME)
+    lines = trace.lines() if trace != None else []
+    if path == None:
+        sys.stdout.write("\n".join(lines) + "\n")
+    else:
+        with open(path, "w") as f:
+            f.write("\n".join(lines) + "\n")
+    return len(lines)
@@ -0,0 +1,185 @@
+# AddOn AnimSpacGen (c) 2016 Michael Davies, Atom
+# Animated Spaceship Generator 1.0.1
+# Manages and animates generated geometry.
+# https://github.com/a1studmuffin/SpaceshipGenerator/blob/master/README.md
+# Last Revision 06-27-2016
+
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+import bpy, os, logging
+from colorsys import hls_to_rgb
+from random import Random
+
+from .util import MATERIAL_PREFIX
+
+from .generator import Material
+
+# Custom property stamped on every datablock the registry creates, holding
+# its role, so a user's datablock that happens to share the name is never
+# taken for ours.
+MATERIAL_PROPERTY = "asg_material"
+
+TEXTURE_DIRECTORY = os.path.join(os.path.dirname(__file__), "textures")
+LIGHTS_DIFFUSE_IMAGE = "hull_lights_diffuse.png"
+LIGHTS_EMIT_IMAGE = "hull_lights_emit.png"
+
+log = logging.getLogger(__name__)
+
+############################################################################
+# Shared material registry.
+############################################################################
+class MaterialRegistry:
+    # The five materials of generator.Material, their textures and the two
+    # window images exist once per .blend file and every generated mesh
+    # links to them, however many ships or regenerations there are.
+    # Datablocks are held by name and re-fetched on every lookup because undo
+    # and file loads invalidate any python reference to them. Materials saved
+    # with a file are found again by their property after it is loaded.
+    def __init__(self):
+        self.names = {}     # (id type, role) -> datablock name
+        self.created = 0
+
+    def lookup(self, collection, kind, role):
+        name = self.names.get((kind, role))
+        if name != None:
+            item = collection.get(name)
+            if item != None and item.get(MATERIAL_PROPERTY) == role:
+                return item
+        for item in collection:
+            if item.get(MATERIAL_PROPERTY) == role:
+                self.names[(kind, role)] = item.name
+                return item
+        return None
+
+    def stamp(self, item, kind, role):
+        item[MATERIAL_PROPERTY] = role
+        self.names[(kind, role)] = item.name
+        self.created += 1
+        return item
+
+    def returnImage(self, filename, use_alpha=True):
+        image = self.lookup(bpy.data.images, "image", filename)
+        if image == None:
+            image = bpy.data.images.load(os.path.join(TEXTURE_DIRECTORY, filename))
+            image.use_alpha = use_alpha
+            self.stamp(image, "image", filename)
+        return image
+
+    def returnTexture(self, role, tex_type, filename=None, use_alpha=True):
+        tex = self.lookup(bpy.data.textures, "texture", role)
+        if tex == None:
+            tex = self.stamp(bpy.data.textures.new(MATERIAL_PREFIX + role, tex_type), "texture", role)
+            if filename != None:
+                tex.image = self.returnImage(filename, use_alpha)
+        return tex
+
+    def returnMaterials(self):
+        # Returns the materials in generator.Material order, creating the
+        # whole set the first time.
+        result = [self.lookup(bpy.data.materials, "material", m.name) for m in Material]
+        if None in result:
+            result = self.createMaterials()
+        return result
+
+    def createMaterials(self):
+        # Missing materials are made again, ones that survived are left as
+        # they are in case the user edited them.
+        result = []
+        rng = Random()
+        # Choose a base color for the spaceship hull and a glow color for the
+        # exhaust and glow discs.
+        hull_base_color = hls_to_rgb(rng.random(), rng.uniform(0.05, 0.5), rng.uniform(0, 0.25))
+        window_color = hls_to_rgb(rng.random(), rng.uniform(0.5, 1), rng.uniform(0, 0.5))
+        glow_color = hls_to_rgb(rng.random(), rng.uniform(0.5, 1), 1)
+        for m in Material:
+            mat = self.lookup(bpy.data.materials, "material", m.name)
+            if mat == None:
+                mat = self.stamp(bpy.data.materials.new(MATERIAL_PREFIX + m.name), "material", m.name)
+                if m == Material.hull or m == Material.hull_lights:
+                    self.setHullBasics(mat, hull_base_color)
+                elif m == Material.hull_dark:
+                    self.setHullBasics(mat, [0.3 * x for x in hull_base_color])
+                else:
+                    mat.diffuse_color = glow_color
+                    mat.emit = 1.0
+                if m == Material.hull_lights:
+                    self.addWindows(mat, window_color)
+                log.debug("Created shared material [%s].", mat.name)
+            result.append(mat)
+        return result
+
+    def setHullBasics(self, mat, color):
+        mat.specular_intensity = 0.1
+        mat.diffuse_color = color
+        # Clouds texture for a subtle hull normal map.
+        colortex = self.returnTexture("hull_normal", 'CLOUDS')
+        colortex.noise_scale = 0.3
+        colortex.noise_depth = 8
+        mtex = mat.texture_slots.add()
+        mtex.texture = colortex
+        mtex.texture_coords = 'GLOBAL'
+        mtex.mapping = 'CUBE'
+        mtex.use_map_color_diffuse = False
+        mtex.use_map_normal = True
+        mtex.normal_factor = 1
+        mtex.bump_method = 'BUMP_BEST_QUALITY'
+
+    def addWindows(self, mat, color):
+        # Diffuse layer that sets the window color.
+        mtex = mat.texture_slots.add()
+        mtex.texture = self.returnTexture("lights_diffuse", 'IMAGE', LIGHTS_DIFFUSE_IMAGE)
+        mtex.texture_coords = 'GLOBAL'
+        mtex.mapping = 'CUBE'
+        mtex.blend_type = 'ADD'
+        mtex.use_map_color_diffuse = True
+        mtex.use_rgb_to_intensity = True
+        mtex.color = color
+        # Emissive layer that lights up the windows.
+        mtex = mat.texture_slots.add()
+        mtex.texture = self.returnTexture("lights_emit", 'IMAGE', LIGHTS_EMIT_IMAGE, use_alpha=False)
+        mtex.texture_coords = 'GLOBAL'
+        mtex.mapping = 'CUBE'
+        mtex.use_map_emit = True
+        mtex.emit_factor = 2.0
+        mtex.blend_type = 'ADD'
+        mtex.use_map_color_diffuse = False
+
+    def clear(self):
+        # Forget the names, e.g. after loading another file.
+        self.names.clear()
+
+    def stats(self):
+        return {"known": len(self.names),
+                "created": self.created}
+
+material_registry = MaterialRegistry()
+
+# Links the shared materials into the mesh's slots, or empties them when
+# the entry does not assign materials. Meshes that are already linked, e.g.
+# cached or pooled ones, are left alone.
+def linkMaterials(me, assign=True):
+    materials = material_registry.returnMaterials() if assign else []
+    slots = me.materials
+    if len(slots) == len(materials) and all(a == b for a, b in zip(slots, materials)):
+        return me
+    while len(slots) > 0:
+        slots.pop(0)
+    for mat in materials:
+        slots.append(mat)
+    return me
@@ -22,13 +22,26 @@
 #
 # ##### END GPL LICENSE BLOCK #####
 
-import bpy, random
+import bpy, os, random, logging
+from bpy_extras.io_utils import ExportHelper
 
 from .events import reviewAnimSpacGen
+from .events import generateSpaceshipArrays
+from .profiler import exportGenerationProfiles
+from .bake import bakeAnimSpacGen
+from .bake import clearBake
+from .scatter import scatterFleet
+from .cache import returnEntryParameters
+from .catalog import SeedCatalog
+from .catalog import buildCatalog
+from .catalog import returnCatalogSeed
+from .catalog import CATALOG_FILE_NAME
 
-from .util import to_console
+from .log import dumpLog
 from .util import returnNameDroppedPrefix
 from .util import returnObjectNamesLike
+from .util import registerManagedObject
+from .util import unregisterManagedObject
 from .util import removeObjectFromMemory
 from .util import returnRandomColor
 from .util import randFloat
@@ -41,6 +54,11 @@ from .util import MATERIAL_PREFIX
 from .util import MAX_NAME_SIZE
 
 from .util import isBusy
+from .util import CATALOG_WORKERS
+from .util import USE_ARRAY_KERNEL
+from .util import canStartWorkers
+
+log = logging.getLogger(__name__)
 
 ############################################################################
 # Operator code.
@@ -61,9 +79,11 @@ class OBJECT_OT_rename_to_AnimSpacGen(bpy.types.Operator):
 			ob_source = bpy.data.objects.get(AnimSpacGen_name)
 			if ob_source != None:
 				# Hmm...already and object named like this.
-				to_console ("Already an object named like [" + AnimSpacGen_name + "] rename manualy.")
+				log.warning("Already an object named like [%s] rename manualy.", AnimSpacGen_name)
 			else:
+				unregisterManagedObject(ob.name)
 				ob.name = AnimSpacGen_name
+				registerManagedObject(ob)
 		return {'FINISHED'}
 
 # Create operator to add or remove entries to/from the Collection   
@@ -90,14 +110,189 @@ class OBJECT_OT_add_remove_String_Items(bpy.types.Operator):
 					index = ob.AnimSpacGen_List_Index
 					collection.remove(index)
 				else:
-					to_console ("Can not remove last item.")
+					log.warning("Can not remove last item.")
+		return {'FINISHED'}
+
+# Create operator to write the recorded generation profiles to a JSON file.
+class OBJECT_OT_export_AnimSpacGen_profiles(bpy.types.Operator, ExportHelper):
+	bl_label = "Export Generation Profiles"
+	bl_idname = "op.export_animspacgen_profiles"
+	bl_description = "Write the per-stage generation timings recorded for every AnimSpacGen object to a JSON file."
+	filename_ext = ".json"
+	filter_glob = bpy.props.StringProperty(default="*.json", options={'HIDDEN'})
+	
+	def execute(self, context):
+		exportGenerationProfiles(self.filepath)
 		return {'FINISHED'}
 		
+# Create operator to write the trace buffer of recent log messages to a text file.
+class OBJECT_OT_dump_AnimSpacGen_log(bpy.types.Operator, ExportHelper):
+	bl_label = "Dump Log"
+	bl_idname = "op.dump_animspacgen_log"
+	bl_description = "Write the most recent AnimSpacGen log messages to a text file."
+	filename_ext = ".txt"
+	filter_glob = bpy.props.StringProperty(default="*.txt", options={'HIDDEN'})
+	
+	def execute(self, context):
+		count = dumpLog(self.filepath)
+		self.report({'INFO'}, "Wrote %i log messages." % count)
+		return {'FINISHED'}
+		
+# Create operator to bake the ship of every animated frame to a file next to the .blend.
+class OBJECT_OT_bake_AnimSpacGen(bpy.types.Operator):
+	bl_label = "Bake Animation"
+	bl_idname = "op.bake_animspacgen"
+	bl_description = "Generate the ship of every frame in this object's animated range and save them next to the .blend file. Playback and renders then load the baked meshes instead of generating."
+	
+	def execute(self, context):
+		ob = context.object
+		if ob == None or len(ob.AnimSpacGen_List) == 0:
+			return {'CANCELLED'}
+		if bpy.data.filepath == "":
+			self.report({'ERROR'}, "Save the .blend file first, the bake is stored next to it.")
+			return {'CANCELLED'}
+		frames, meshes = bakeAnimSpacGen(ob, context.scene, generateSpaceshipArrays)
+		self.report({'INFO'}, "Baked %i frames (%i distinct meshes)." % (frames, meshes))
+		reviewAnimSpacGen(context.scene)
+		return {'FINISHED'}
+
+# Create operator to go back to generating a baked object live.
+class OBJECT_OT_clear_AnimSpacGen_bake(bpy.types.Operator):
+	bl_label = "Clear Bake"
+	bl_idname = "op.clear_animspacgen_bake"
+	bl_description = "Stop playing back the bake file of this object and generate its ship from the parameters again. The file itself is kept."
+	
+	def execute(self, context):
+		ob = context.object
+		if ob != None:
+			clearBake(ob)
+			reviewAnimSpacGen(context.scene)
+		return {'FINISHED'}
+		
+# Create operator to fill the scene with background ships built from a few variants.
+class OBJECT_OT_scatter_AnimSpacGen_fleet(bpy.types.Operator):
+	bl_label = "Scatter Fleet"
+	bl_idname = "op.scatter_animspacgen_fleet"
+	bl_description = "Generate a few ship variants from a seed range with this object's parameters and scatter many linked copies of them around it."
+	bl_options = {'REGISTER', 'UNDO'}
+
+	seed_min = bpy.props.IntProperty(name="Seed Min", description="First seed variants are picked from", default=-420, min=-420, max=420)
+	seed_max = bpy.props.IntProperty(name="Seed Max", description="Last seed variants are picked from", default=420, min=-420, max=420)
+	variants = bpy.props.IntProperty(name="Variants", description="Distinct ships generated, every scattered ship links one of them", default=8, min=1, max=256)
+	count = bpy.props.IntProperty(name="Ships", description="Ships scattered", default=200, min=1, max=100000)
+	radius = bpy.props.FloatProperty(name="Radius", description="Radius of the disc the ships are scattered over", default=500.0, min=0.0, max=100000.0)
+	height = bpy.props.FloatProperty(name="Height", description="Thickness of that disc", default=50.0, min=0.0, max=100000.0)
+	placement_seed = bpy.props.IntProperty(name="Placement Seed", description="Seed for picking variants and placing ships", default=0)
+	scale_variation = bpy.props.FloatProperty(name="Scale Variation", description="Ships are scaled by up to this fraction either way", default=0.3, min=0.0, max=0.95)
+	rotation_variation = bpy.props.FloatProperty(name="Rotation Variation", description="Most a ship turns away from the fleet heading", default=0.2, min=0.0, max=3.14159, subtype='ANGLE')
+
+	def execute(self, context):
+		ob = context.object
+		entry = None
+		if ob != None and len(ob.AnimSpacGen_List) > 0:
+			entry = ob.AnimSpacGen_List[0]
+		location = ob.location.copy() if ob != None else context.scene.cursor_location.copy()
+		fleet, meshes = scatterFleet(context.scene, entry, location,
+									 self.seed_min, self.seed_max, self.variants, self.count,
+									 self.radius, self.height, self.placement_seed,
+									 self.scale_variation, self.rotation_variation)
+		self.report({'INFO'}, "Scattered %i ships from %i variants." % (self.count, len(meshes)))
+		return {'FINISHED'}
+
+# The seed catalog in Blender's user config directory, loaded on first use.
+# Measured on the ships of the builder the add-on generates with.
+seed_catalog = None
+
+def returnSeedCatalog():
+	global seed_catalog
+	if seed_catalog == None:
+		directory = bpy.utils.user_resource('CONFIG', path="animspacgen", create=True)
+		builder = "array" if USE_ARRAY_KERNEL else "bmesh"
+		seed_catalog = SeedCatalog(os.path.join(directory, CATALOG_FILE_NAME), builder)
+	return seed_catalog
+
+# Create operator to catalog every seed of this object's parameters.
+class OBJECT_OT_build_AnimSpacGen_catalog(bpy.types.Operator):
+	bl_label = "Build Seed Catalog"
+	bl_idname = "op.build_animspacgen_catalog"
+	bl_description = "Generate every seed with this object's other parameters once (in background processes with the array kernel) and record their size, detail and build time for Find Seed. Seeds already cataloged are skipped."
+	
+	def execute(self, context):
+		ob = context.object
+		if ob == None or len(ob.AnimSpacGen_List) == 0:
+			return {'CANCELLED'}
+		# One process when workers would start Blender again.
+		workers = CATALOG_WORKERS if canStartWorkers() else 1
+		added = buildCatalog(returnSeedCatalog(), returnEntryParameters(ob.AnimSpacGen_List[0]), workers=workers)
+		self.report({'INFO'}, "Cataloged %i new seeds." % added)
+		return {'FINISHED'}
+
+# Create operator to step through the cataloged seeds matching some limits.
+class OBJECT_OT_find_AnimSpacGen_seed(bpy.types.Operator):
+	bl_label = "Find Seed"
+	bl_idname = "op.find_animspacgen_seed"
+	bl_description = "Switch to the next cataloged seed whose ship fits the limits. Zero leaves a limit out."
+	bl_options = {'REGISTER', 'UNDO'}
+
+	min_length = bpy.props.FloatProperty(name="Min Length", default=0.0, min=0.0)
+	max_length = bpy.props.FloatProperty(name="Max Length", default=0.0, min=0.0)
+	max_width = bpy.props.FloatProperty(name="Max Width", default=0.0, min=0.0)
+	max_height = bpy.props.FloatProperty(name="Max Height", default=0.0, min=0.0)
+	max_faces = bpy.props.IntProperty(name="Max Faces", default=0, min=0)
+	min_engines = bpy.props.IntProperty(name="Min Engines", description="Rear faces with engines", default=0, min=0)
+	min_turrets = bpy.props.IntProperty(name="Min Turrets", default=0, min=0)
+	min_antennas = bpy.props.IntProperty(name="Min Antennas", default=0, min=0)
+
+	def invoke(self, context, event):
+		return context.window_manager.invoke_props_dialog(self)
+
+	def execute(self, context):
+		ob = context.object
+		if ob == None or len(ob.AnimSpacGen_List) == 0:
+			return {'CANCELLED'}
+		entry = ob.AnimSpacGen_List[0]
+		parameters = returnEntryParameters(entry)
+		catalog = returnSeedCatalog()
+		if len(catalog.returnSeeds(parameters)) == 0:
+			self.report({'ERROR'}, "No seeds cataloged with these parameters, build the seed catalog first.")
+			return {'CANCELLED'}
+		limits = {}
+		for name in ("min_length", "max_length", "max_width", "max_height", "max_faces", "min_engines", "min_turrets", "min_antennas"):
+			value = getattr(self, name)
+			if value > 0:
+				limits[name] = value
+		seeds = catalog.query(parameters, **limits)
+		if len(seeds) == 0:
+			self.report({'WARNING'}, "No cataloged seed fits.")
+			return {'CANCELLED'}
+		# Step to the next match after the current seed, wrapping around.
+		# A seed that is not cataloged itself counts as the one that is.
+		current = returnCatalogSeed(parameters, entry.random_seed)
+		later = [seed for seed in seeds if seed > current]
+		seed = later[0] if later else seeds[0]
+		entry.random_seed = seed
+		self.report({'INFO'}, "Seed %i, match %i of %i." % (seed, seeds.index(seed) + 1, len(seeds)))
+		return {'FINISHED'}
+
 def register():
 	bpy.utils.register_class(OBJECT_OT_rename_to_AnimSpacGen)
 	bpy.utils.register_class(OBJECT_OT_add_remove_String_Items)
+	bpy.utils.register_class(OBJECT_OT_export_AnimSpacGen_profiles)
+	bpy.utils.register_class(OBJECT_OT_dump_AnimSpacGen_log)
+	bpy.utils.register_class(OBJECT_OT_bake_AnimSpacGen)
+	bpy.utils.register_class(OBJECT_OT_clear_AnimSpacGen_bake)
+	bpy.utils.register_class(OBJECT_OT_scatter_AnimSpacGen_fleet)
+	bpy.utils.register_class(OBJECT_OT_build_AnimSpacGen_catalog)
+	bpy.utils.register_class(OBJECT_OT_find_AnimSpacGen_seed)
 
 def unregister():
 	bpy.utils.unregister_class(OBJECT_OT_rename_to_AnimSpacGen)
 	bpy.utils.unregister_class(OBJECT_OT_add_remove_String_Items)
+	bpy.utils.unregister_class(OBJECT_OT_export_AnimSpacGen_profiles)
+	bpy.utils.unregister_class(OBJECT_OT_dump_AnimSpacGen_log)
+	bpy.utils.unregister_class(OBJECT_OT_bake_AnimSpacGen)
+	bpy.utils.unregister_class(OBJECT_OT_clear_AnimSpacGen_bake)
+	bpy.utils.unregister_class(OBJECT_OT_scatter_AnimSpacGen_fleet)
+	bpy.utils.unregister_class(OBJECT_OT_build_AnimSpacGen_catalog)
+	bpy.utils.unregister_class(OBJECT_OT_find_AnimSpacGen_seed)
 
@@ -0,0 +1,243 @@
+# AddOn AnimSpacGen (c) 2016 Michael Davies, Atom
+# Animated Spaceship Generator 1.0.1
+# Manages and animates generated geometry.
+# https://github.com/a1studmuffin/SpaceshipGenerator/blob/master/README.md
+# Last Revision 06-27-2016
+
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+import bpy, struct, multiprocessing, logging
+from bpy.app.handlers import persistent
+from collections import OrderedDict
+
+from .util import returnManagedObjectNames
+from .util import canStartWorkers
+from .util import USE_ARRAY_KERNEL
+from .util import RENDER_PREFETCH_FRAMES
+from .util import RENDER_PREFETCH_WORKERS
+
+from .cache import mesh_cache
+from .cache import returnEntryKey
+from .cache import returnEntryParameters
+from .cache import returnParametersKey
+from .cache import returnLodKey
+
+from .generator import LOD_LEVELS
+from .kernel import build_spaceship_job
+
+from . import events
+from .events import meshFromArrays
+from .events import cacheLodMeshes
+from .events import returnLodLevel
+from .events import reviewAnimSpacGen
+
+from .bake import isBaked
+
+log = logging.getLogger(__name__)
+
+############################################################################
+# Animated parameters.
+############################################################################
+# Returns the entry's parameters as returnEntryParameters will read them
+# once the object's action has been evaluated at frame. Drivers and NLA
+# strips are not evaluated, frames that depend on them miss the prefetch.
+def returnEntryParametersAt(ob, entry, frame):
+    values = dict(returnEntryParameters(entry))
+    animation_data = ob.animation_data
+    if animation_data != None and animation_data.action != None:
+        prefix = entry.path_from_id() + "."
+        for fcurve in animation_data.action.fcurves:
+            if fcurve.mute or not fcurve.data_path.startswith(prefix):
+                continue
+            name = fcurve.data_path[len(prefix):]
+            if name in values:
+                values[name] = castAnimatedValue(values[name], fcurve.evaluate(frame))
+    return sorted(values.items())
+
+# Blender truncates animated ints and bools and stores floats in single precision.
+def castAnimatedValue(current, value):
+    if isinstance(current, bool):
+        return bool(int(value))
+    if isinstance(current, int):
+        return int(value)
+    if isinstance(current, float):
+        return struct.unpack("f", struct.pack("f", value))[0]
+    return current
+
+############################################################################
+# Render prefetch.
+############################################################################
+# While an animation renders, the ships of the next frames are built ahead
+# in worker processes with the array kernel. The frame handler then only
+# turns a finished build into a mesh and swaps it in. A frame whose ship
+# is not ready falls back in this order:
+#   1. Its build is still running: wait for that build to finish.
+#   2. Nothing was prefetched for it (the first frame, a failed build or
+#      parameters that could not be predicted): generate it in Blender's
+#      process, as without prefetching.
+# Either way the frame renders the ship its parameters ask for.
+# While a render is active this handler takes over from the playback
+# handler events.frameChangeAnimSpacGen, so every frame is reviewed once.
+# Prefetching requires the array kernel: the workers build with it and
+# their meshes are cached under the keys live generation uses, so it only
+# starts when live generation uses the kernel too (util.USE_ARRAY_KERNEL).
+# With the bmesh builder every frame is generated in-process. It also
+# needs workers that fork off Blender's process, see util.canStartWorkers.
+class RenderPrefetcher:
+    def __init__(self, lookahead=RENDER_PREFETCH_FRAMES, workers=RENDER_PREFETCH_WORKERS):
+        self.lookahead = lookahead
+        self.workers = workers
+        self.pool = None
+        self.enabled = False
+        self.frames = []                # frames of the running render, empty when idle
+        self.pending = OrderedDict()    # entry key -> AsyncResult of its build
+        self.ready = 0
+        self.waited = 0
+        self.missed = 0
+
+    def begin(self, scene):
+        self.end()
+        step = max(1, scene.frame_step)
+        self.frames = list(range(scene.frame_start, scene.frame_end + 1, step))
+        self.enabled = self.lookahead > 0 and self.workers > 0
+        events.isPrefetching = True
+        if self.enabled and not USE_ARRAY_KERNEL:
+            log.warning("Render prefetch disabled, it requires util.USE_ARRAY_KERNEL.")
+            self.enabled = False
+        if self.enabled and not canStartWorkers():
+            log.warning("Render prefetch disabled, worker processes would start Blender again. "
+                        "Use the fork start method or multiprocessing.set_executable().")
+            self.enabled = False
+
+    def end(self):
+        if self.pool != None:
+            self.pool.terminate()
+            self.pool.join()
+            self.pool = None
+        self.pending.clear()
+        self.enabled = False
+        self.frames = []
+        events.isPrefetching = False
+
+    def isActive(self):
+        return len(self.frames) > 0
+
+    def returnEntries(self, scene):
+        result = []
+        for name in returnManagedObjectNames(scene):
+            ob = bpy.data.objects.get(name)
+            if ob != None and len(ob.AnimSpacGen_List) > 0 and not isBaked(ob):
+                result.append((ob, ob.AnimSpacGen_List[0]))
+        return result
+
+    def collect(self, scene):
+        # Caches the meshes of builds matching the current parameters.
+        for ob, entry in self.returnEntries(scene):
+            key = returnEntryKey(entry)
+            level = returnLodLevel(ob, entry, scene)
+            result = self.pending.pop(key, None)
+            if result == None:
+                if returnLodKey(key, level) not in mesh_cache.entries:
+                    self.missed += 1
+                continue
+            if result.ready():
+                self.ready += 1
+            else:
+                self.waited += 1
+            try:
+                arrays = result.get()
+            except Exception as e:
+                log.error("Prefetched build of [%s] failed: %s", ob.name, e)
+                self.missed += 1
+                continue
+            cacheLodMeshes(key, [meshFromArrays(a) for a in arrays], level)
+
+    def schedule(self, scene, frame):
+        # Starts builds for the render frames following frame.
+        if not self.enabled:
+            return
+        if self.pool == None:
+            self.pool = multiprocessing.Pool(self.workers)
+        upcoming = [f for f in self.frames if f > frame][:self.lookahead]
+        wanted = set()
+        for ob, entry in self.returnEntries(scene):
+            for f in upcoming:
+                parameters = returnEntryParametersAt(ob, entry, f)
+                key = returnParametersKey(parameters)
+                wanted.add(key)
+                if key in self.pending or key in mesh_cache.entries:
+                    continue
+                parameters = dict(parameters)
+                num_levels = len(LOD_LEVELS) if parameters["use_lod"] else 1
+                self.pending[key] = self.pool.apply_async(build_spaceship_job, ((parameters, num_levels),))
+        # Builds for frames already rendered are of no use anymore.
+        for key in list(self.pending.keys()):
+            if key not in wanted:
+                del self.pending[key]
+
+    def stats(self):
+        return {"pending": len(self.pending),
+                "ready": self.ready,
+                "waited": self.waited,
+                "missed": self.missed}
+
+render_prefetcher = RenderPrefetcher()
+
+def reportRenderPrefetch():
+    log.info("Render prefetch: %(pending)i pending, %(ready)i ready, "
+             "%(waited)i waited for, %(missed)i generated in-process.", render_prefetcher.stats())
+
+############################################################################
+# Event logic.
+############################################################################
+@persistent
+def render_init_prefetch(scene):
+    render_prefetcher.begin(scene)
+
+@persistent
+def render_end_prefetch(scene):
+    reportRenderPrefetch()
+    render_prefetcher.end()
+
+@persistent
+def frame_change_post_prefetch(scene):
+    # Runs after animation is evaluated, so the entries hold this frame's
+    # values. Still renders never change frame and never start the pool.
+    if scene == None or not render_prefetcher.isActive():
+        return
+    render_prefetcher.collect(scene)
+    reviewAnimSpacGen(scene)
+    render_prefetcher.schedule(scene, scene.frame_current)
+
+def register():
+    handlers = bpy.app.handlers
+    handlers.render_init.append(render_init_prefetch)
+    handlers.render_complete.append(render_end_prefetch)
+    handlers.render_cancel.append(render_end_prefetch)
+    handlers.frame_change_post.append(frame_change_post_prefetch)
+
+def unregister():
+    render_prefetcher.end()
+    handlers = bpy.app.handlers
+    for handler_list, handler in ((handlers.render_init, render_init_prefetch),
+                                  (handlers.render_complete, render_end_prefetch),
+                                  (handlers.render_cancel, render_end_prefetch),
+                                  (handlers.frame_change_post, frame_change_post_prefetch)):
+        if handler in handler_list:
+            handler_list.remove(handler)
@@ -0,0 +1,105 @@
+# AddOn AnimSpacGen (c) 2016 Michael Davies, Atom
+# Animated Spaceship Generator 1.0.1
+# Manages and animates generated geometry.
+# https://github.com/a1studmuffin/SpaceshipGenerator/blob/master/README.md
+# Last Revision 06-27-2016
+
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+import time, json, logging
+from collections import deque
+
+from .util import PROFILE_GENERATION
+from .util import PROFILE_HISTORY
+
+from .generator import GenerationProfile
+from .generator import NO_PROFILE
+
+log = logging.getLogger(__name__)
+
+############################################################################
+# Generation profiles.
+############################################################################
+class ProfileRecorder:
+    # Keeps the last few stage profiles of every controller object.
+    # When disabled, begin() hands out the shared no-op profile and
+    # record() returns straight away.
+    def __init__(self, enabled=PROFILE_GENERATION, history=PROFILE_HISTORY):
+        self.enabled = enabled
+        self.history = history
+        self.records = {}   # object name -> deque of profile dicts, oldest first
+
+    def begin(self, builder):
+        if self.enabled:
+            return GenerationProfile(builder)
+        return NO_PROFILE
+
+    def record(self, name, profile, **info):
+        if profile is NO_PROFILE:
+            return None
+        item = profile.as_dict()
+        item.update(info)
+        item["object"] = name
+        item["time"] = time.time()
+        buffer = self.records.get(name)
+        if buffer == None:
+            buffer = self.records[name] = deque(maxlen=self.history)
+        buffer.append(item)
+        return item
+
+    def latest(self, name):
+        buffer = self.records.get(name)
+        if buffer:
+            return buffer[-1]
+        return None
+
+    def setHistory(self, history):
+        # Resize every ring buffer, keeping the newest profiles.
+        self.history = history
+        for name, buffer in self.records.items():
+            self.records[name] = deque(buffer, maxlen=history)
+
+    def clear(self, name=None):
+        if name == None:
+            self.records.clear()
+        else:
+            self.records.pop(name, None)
+
+    def as_dict(self, names=None):
+        if names == None:
+            names = sorted(self.records.keys())
+        return dict((name, list(self.records[name])) for name in names if name in self.records)
+
+profile_recorder = ProfileRecorder()
+
+def exportGenerationProfiles(path, names=None):
+    # Writes the recorded profiles as JSON, keyed by object name.
+    with open(path, "w") as f:
+        json.dump(profile_recorder.as_dict(names), f, indent=1, sort_keys=True)
+    log.info("Exported generation profiles to [%s].", path)
+
+def reportGenerationProfile(name):
+    item = profile_recorder.latest(name)
+    if item == None:
+        log.warning("No generation profile recorded for [%s].", name)
+        return
+    log.info("Generation profile for [%s]: %.4f s, %i verts, %i faces.",
+             name, item["seconds"], item["verts"], item["faces"])
+    for stage in item["stages"]:
+        log.info("  %(stage)-10s %(seconds)8.4f s  %(verts)+7i verts  %(faces)+7i faces  %(processed)5i processed", stage)
@@ -22,10 +22,14 @@
 #
 # ##### END GPL LICENSE BLOCK #####
 
-import bpy
+import bpy, logging
 
-from .events import reviewAnimSpacGen
-from .util import to_console
+from .events import markAnimSpacGenDirty
+from .events import reviewDirtyAnimSpacGen
+from .scheduler import regen_queue
+from .util import REGEN_USE_QUEUE
+
+log = logging.getLogger(__name__)
 
 ############################################################################
 # Parameter Definitiions That Can Be Animated And Appear In Panels
@@ -36,9 +40,14 @@ def updateAnimSpacGenParameter(self,context):
 	except:
 		scene = None
 	if scene != None:
-		result = "updateAnimSpacGenParameter: [%s]" % self.name
-		to_console(result)
-		reviewAnimSpacGen(scene)
+		log.debug("updateAnimSpacGenParameter: [%s]", self.name)
+		# Only the object owning this entry needs to be rebuilt.
+		markAnimSpacGenDirty(self.id_data, self)
+		if REGEN_USE_QUEUE == True:
+			# Wait for the slider to settle, then build only the latest state.
+			regen_queue.push(self.id_data.name)
+		else:
+			reviewDirtyAnimSpacGen([self.id_data.name])
 
 class cls_AnimSpacGen(bpy.types.PropertyGroup):
 	#z_count = bpy.props.IntProperty(name="Z Count", description="Count for Z axis.", default = 0, min = 0, max = 256, update=updateAnimSpacGenParameter)
@@ -53,6 +62,12 @@ class cls_AnimSpacGen(bpy.types.PropertyGroup):
 	num_asymmetry_segments_min = bpy.props.IntProperty(name="Sym Seg Min", description="Min. Asymmetry Segments", default = 1, min = 1, max = 24, update=updateAnimSpacGenParameter)
 	num_asymmetry_segments_max = bpy.props.IntProperty(name="Sym Seg Max", description="Max. Asymmetry Segments", default = 5, min = 1, max = 24, update=updateAnimSpacGenParameter)
 
+	max_verts = bpy.props.IntProperty(name="Vertex Budget", description="Stop growing the hull and adding face detail before the ship could exceed this many vertices, 0 for no limit", default = 0, min = 0, max = 10000000, update=updateAnimSpacGenParameter)
+	max_faces = bpy.props.IntProperty(name="Face Budget", description="Stop growing the hull and adding face detail before the ship could exceed this many faces, 0 for no limit", default = 0, min = 0, max = 10000000, update=updateAnimSpacGenParameter)
+
+	use_lod = bpy.props.BoolProperty(name="Use Levels Of Detail", description="Generate coarser versions of the ship too and show the one that suits the distance to the active camera", default=False, options={'ANIMATABLE'}, subtype='NONE', update=updateAnimSpacGenParameter)
+	independent_streams = bpy.props.BoolProperty(name="Independent Random Streams", description="Give every stage and face its own random stream so changing one stage leaves the others alone. Seeds then give different ships than the original script. With the array kernel and DETAIL_WORKERS set in util.py, face detail is then built in worker processes", default=False, options={'ANIMATABLE'}, subtype='NONE', update=updateAnimSpacGenParameter)
+
 	create_asymmetry_segments = bpy.props.BoolProperty(name="Create Asymmetry Segments", default=True, options={'ANIMATABLE'}, subtype='NONE', update=updateAnimSpacGenParameter)
 	create_face_detail = bpy.props.BoolProperty(name="Create Face Detail", default=True, options={'ANIMATABLE'}, subtype='NONE', update=updateAnimSpacGenParameter)
 	allow_horizontal_symmetry = bpy.props.BoolProperty(name="Allow Horizontal Symmetry", default=True, options={'ANIMATABLE'}, subtype='NONE', update=updateAnimSpacGenParameter)
@@ -63,7 +78,6 @@ class cls_AnimSpacGen(bpy.types.PropertyGroup):
 	rnd_normal_chance = bpy.props.FloatProperty(name="Rnd Normal Chance", default=0.5, min=0.0001, max=1.0, update=updateAnimSpacGenParameter)
 	rnd_extrusion_chance = bpy.props.FloatProperty(name="Rnd Extrusion Chance", default=0.1, min=0.0001, max=1.0, update=updateAnimSpacGenParameter)
 	rnd_extrusion_deviation_chance = bpy.props.FloatProperty(name="Rnd Extrusion Chance", default=0.75, min=0.0001, max=1.0, update=updateAnimSpacGenParameter)
-	rnd_hull_extrude_chance = bpy.props.FloatProperty(name="Rnd Hull Extrude Chance", default=0.5, min=0.0001, max=1.0, update=updateAnimSpacGenParameter)
 	rnd_scaling_chance = bpy.props.FloatProperty(name="Rnd Scaling Chance", default=0.5, min=0.0001, max=1.0, update=updateAnimSpacGenParameter)
 	rnd_side_trans_chance = bpy.props.FloatProperty(name="Rnd Sideways Translate Chance", default=0.5, min=0.0001, max=1.0, update=updateAnimSpacGenParameter)
 	rnd_roty_chance = bpy.props.FloatProperty(name="Rnd Rotate Y Axis Chance", default=0.5, min=0.0001, max=1.0, update=updateAnimSpacGenParameter)
@@ -0,0 +1,119 @@
+# AddOn AnimSpacGen (c) 2016 Michael Davies, Atom
+# Animated Spaceship Generator 1.0.1
+# Manages and animates generated geometry.
+# https://github.com/a1studmuffin/SpaceshipGenerator/blob/master/README.md
+# Last Revision 06-27-2016
+
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+import bpy, logging
+from math import cos, sin, pi, sqrt
+from random import Random
+from mathutils import Euler, Vector
+
+from .util import ANIMSPACGEN_OB_PREFIX
+from .util import USE_ARRAY_KERNEL
+
+from .cache import mesh_cache
+from .cache import returnEntryParameters
+from .cache import returnParametersKey
+from .materials import linkMaterials
+
+from .generator import Parameters
+from .generator import DEFAULT_PARAMETERS
+from .generator import buildSpaceship
+from .kernel import ArrayBuilder
+
+from .events import BMeshBuilder
+from .events import meshFromArrays
+from .events import checkpoint_store
+
+FLEET_NAME = ANIMSPACGEN_OB_PREFIX + "fleet"
+FLEET_SHIP_NAME = ANIMSPACGEN_OB_PREFIX + "fleet_ship"
+
+log = logging.getLogger(__name__)
+
+############################################################################
+# Variant meshes.
+############################################################################
+# Returns the mesh of a sorted list of (identifier, value) pairs, as
+# returnEntryParameters gives them, generating it on a cache miss. The key
+# is the one a controller with the same parameters uses, so both share it.
+def returnParametersMesh(parameters):
+    key = returnParametersKey(parameters)
+    me = mesh_cache.get(key)
+    if me == None:
+        entry = Parameters(**dict(parameters))
+        if USE_ARRAY_KERNEL:
+            me = meshFromArrays(buildSpaceship(entry, ArrayBuilder(), checkpoints=checkpoint_store))
+        else:
+            me = buildSpaceship(entry, BMeshBuilder(), checkpoints=checkpoint_store)
+        mesh_cache.put(key, me)
+    return linkMaterials(me, dict(parameters)["assign_materials"])
+
+# Picks variants distinct seeds from seed_min..seed_max and returns their
+# meshes. Every other parameter comes from the passed entry, or the
+# defaults without one.
+def returnVariantMeshes(entry, seed_min, seed_max, variants, rng):
+    if entry != None:
+        base = dict(returnEntryParameters(entry))
+    else:
+        base = dict(DEFAULT_PARAMETERS)
+    # Fleet ships are never looked at closely enough for levels of detail.
+    base["use_lod"] = False
+    seeds = range(min(seed_min, seed_max), max(seed_min, seed_max) + 1)
+    result = []
+    for seed in rng.sample(seeds, min(variants, len(seeds))):
+        base["random_seed"] = seed
+        result.append(returnParametersMesh(sorted(base.items())))
+    return result
+
+############################################################################
+# Scattering.
+############################################################################
+# Scatters count ships over a disc of the passed radius and height around
+# location, all facing +X, the way ships are built, give or take
+# rotation_variation radians. Each one is an object linking one of the
+# variant meshes, so memory and generation time grow with the number of
+# variants, not of ships. The ships are parented to one empty to move or
+# delete the fleet as a whole.
+# The same placement_seed always scatters the same fleet.
+def scatterFleet(scene, entry, location, seed_min=-420, seed_max=420, variants=8, count=200,
+                 radius=500.0, height=50.0, placement_seed=0,
+                 scale_variation=0.3, rotation_variation=0.2):
+    rng = Random(placement_seed)
+    meshes = returnVariantMeshes(entry, seed_min, seed_max, variants, rng)
+
+    fleet = bpy.data.objects.new(FLEET_NAME, None)
+    fleet.location = location
+    scene.objects.link(fleet)
+    for i in range(count):
+        # Uniform over the disc, not bunched up at its center.
+        r = radius * sqrt(rng.random())
+        a = rng.uniform(0.0, 2.0 * pi)
+        ob = bpy.data.objects.new(FLEET_SHIP_NAME, meshes[rng.randrange(len(meshes))])
+        ob.parent = fleet
+        ob.location = Vector((r * cos(a), r * sin(a), rng.uniform(-0.5, 0.5) * height))
+        ob.rotation_euler = Euler((rng.uniform(-0.25, 0.25) * rotation_variation,
+                                   rng.uniform(-0.25, 0.25) * rotation_variation,
+                                   rng.uniform(-1.0, 1.0) * rotation_variation))
+        ob.scale = [rng.uniform(1.0 - scale_variation, 1.0 + scale_variation)] * 3
+        scene.objects.link(ob)
+    log.info("Scattered %i ships from %i variant meshes around [%s].", count, len(meshes), fleet.name)
+    return fleet, meshes
@@ -0,0 +1,124 @@
+# AddOn AnimSpacGen (c) 2016 Michael Davies, Atom
+# Animated Spaceship Generator 1.0.1
+# Manages and animates generated geometry.
+# https://github.com/a1studmuffin/SpaceshipGenerator/blob/master/README.md
+# Last Revision 06-27-2016
+
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+import bpy, time, logging
+from bpy.app.handlers import persistent
+from collections import OrderedDict
+
+from .util import REGEN_IDLE_TIME
+
+from .events import reviewDirtyAnimSpacGen
+
+log = logging.getLogger(__name__)
+
+############################################################################
+# Debounced regeneration queue.
+############################################################################
+# Slider drags fire the update callback for every intermediate value.
+# Requests are merged per object and only run once the object has been
+# left alone for REGEN_IDLE_TIME seconds, so only the latest state is built.
+# Everything here runs on the main thread, driven by a timer when Blender
+# has one (bpy.app.timers) and by the scene_update_post handler otherwise.
+class RegenQueue:
+    def __init__(self, idle_time=REGEN_IDLE_TIME):
+        self.idle_time = idle_time
+        self.pending = OrderedDict()    # object name -> time of latest request
+        self.requested = 0
+        self.dropped = 0
+        self.processed = 0
+        self.isFlushing = False
+
+    def push(self, name):
+        self.requested += 1
+        if name in self.pending:
+            # The earlier request is superseded by this one.
+            self.dropped += 1
+            del self.pending[name]
+        self.pending[name] = time.time()
+        startQueueTimer()
+
+    def depth(self):
+        return len(self.pending)
+
+    def flush(self, force=False):
+        # Run every request that has been idle long enough, or all of them.
+        if self.isFlushing or not self.pending:
+            return
+        self.isFlushing = True
+        try:
+            deadline = time.time() - self.idle_time
+            ready = [name for name, stamp in self.pending.items() if force or stamp <= deadline]
+            for name in ready:
+                del self.pending[name]
+            if ready:
+                self.processed += len(ready)
+                reviewDirtyAnimSpacGen(ready)
+        finally:
+            self.isFlushing = False
+
+    def stats(self):
+        return {"depth": self.depth(),
+                "requested": self.requested,
+                "dropped": self.dropped,
+                "processed": self.processed}
+
+regen_queue = RegenQueue()
+
+def reportRegenQueue():
+    log.info("Regeneration queue: depth %(depth)i, %(requested)i requested, "
+             "%(dropped)i dropped, %(processed)i processed.", regen_queue.stats())
+
+############################################################################
+# Timer code.
+############################################################################
+def queueTimer():
+    regen_queue.flush()
+    if regen_queue.depth() > 0:
+        return regen_queue.idle_time * 0.5
+    # Nothing left, stop the timer until the next request.
+    return None
+
+def startQueueTimer():
+    timers = getattr(bpy.app, "timers", None)
+    if timers != None and not timers.is_registered(queueTimer):
+        timers.register(queueTimer, first_interval=regen_queue.idle_time)
+
+@persistent
+def scene_update_regen_queue(scene):
+    # Fallback for Blender versions without bpy.app.timers.
+    if regen_queue.pending:
+        regen_queue.flush()
+
+def register():
+    if getattr(bpy.app, "timers", None) == None:
+        bpy.app.handlers.scene_update_post.append(scene_update_regen_queue)
+
+def unregister():
+    regen_queue.flush(force=True)
+    timers = getattr(bpy.app, "timers", None)
+    if timers != None:
+        if timers.is_registered(queueTimer):
+            timers.unregister(queueTimer)
+    elif scene_update_regen_queue in bpy.app.handlers.scene_update_post:
+        bpy.app.handlers.scene_update_post.remove(scene_update_regen_queue)
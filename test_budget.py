@@ -0,0 +1,55 @@
+# AddOn AnimSpacGen (c) 2016 Michael Davies, Atom
+# Animated Spaceship Generator 1.0.1
+# Manages and animates generated geometry.
+# https://github.com/a1studmuffin/SpaceshipGenerator/blob/master/README.md
+# Last Revision 06-27-2016
+
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# The vertex/face budget holds for every seed, whatever the random draws.
+
+import pytest
+
+from . import generator
+from . import kernel
+
+BUDGET_SEEDS = range(-20, 21)
+
+@pytest.mark.parametrize("limit", (50, 300, 500, 2000))
+@pytest.mark.parametrize("vertical", (False, True))
+def test_budget_bounds_every_seed(limit, vertical):
+    for seed in BUDGET_SEEDS:
+        entry = generator.Parameters(random_seed=seed, max_verts=limit, max_faces=limit,
+                                     allow_vertical_symmetry=vertical)
+        arrays = generator.buildSpaceship(entry, kernel.ArrayBuilder())
+        assert arrays.num_verts <= limit, seed
+        assert arrays.num_faces <= limit, seed
+
+def test_budget_bounds_every_level():
+    entry = generator.Parameters(random_seed=-10, max_verts=500, max_faces=500)
+    for arrays in generator.buildSpaceshipLods(entry, kernel.ArrayBuilder()):
+        assert arrays.num_verts <= 500
+        assert arrays.num_faces <= 500
+
+def test_roomy_budget_leaves_ship_alone():
+    entry = generator.Parameters(random_seed=7)
+    plain = generator.buildSpaceship(entry, kernel.ArrayBuilder())
+    entry.max_verts = entry.max_faces = 1000000
+    unbounded = generator.buildSpaceship(entry, kernel.ArrayBuilder())
+    assert (plain.num_verts, plain.num_faces) == (unbounded.num_verts, unbounded.num_faces)
@@ -0,0 +1,53 @@
+# AddOn AnimSpacGen (c) 2016 Michael Davies, Atom
+# Animated Spaceship Generator 1.0.1
+# Manages and animates generated geometry.
+# https://github.com/a1studmuffin/SpaceshipGenerator/blob/master/README.md
+# Last Revision 06-27-2016
+
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# The catalog only keeps the positive seed of a mirrored pair, which is
+# right as long as seed and -seed build the same ship.
+
+import pytest
+
+from . import catalog
+from . import generator
+
+MIRRORED_SEEDS = range(1, 16)
+
+def returnStatsWithoutTime(parameters, seed):
+    stats = catalog.returnSeedStats(parameters, seed)
+    del stats["seconds"]
+    return stats
+
+@pytest.mark.parametrize("seed", MIRRORED_SEEDS)
+def test_mirrored_seeds_build_the_same_ship(seed):
+    parameters = sorted(generator.DEFAULT_PARAMETERS.items())
+    assert catalog.returnCatalogSeed(parameters, -seed) == seed
+    assert returnStatsWithoutTime(parameters, -seed) == returnStatsWithoutTime(parameters, seed)
+
+def test_independent_streams_keep_the_sign():
+    parameters = sorted(dict(generator.DEFAULT_PARAMETERS, independent_streams=True).items())
+    assert catalog.returnCatalogSeed(parameters, -7) == -7
+    assert len(catalog.returnCatalogSeeds(parameters)) == len(catalog.CATALOG_SEEDS)
+
+def test_compat_catalog_covers_positive_seeds():
+    parameters = sorted(generator.DEFAULT_PARAMETERS.items())
+    assert catalog.returnCatalogSeeds(parameters) == list(range(0, 421))
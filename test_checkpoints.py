@@ -0,0 +1,56 @@
+# AddOn AnimSpacGen (c) 2016 Michael Davies, Atom
+# Animated Spaceship Generator 1.0.1
+# Manages and animates generated geometry.
+# https://github.com/a1studmuffin/SpaceshipGenerator/blob/master/README.md
+# Last Revision 06-27-2016
+
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# Resuming from a hull or asymmetry checkpoint builds the same ship as a
+# full build.
+
+import numpy as np
+import pytest
+
+from . import generator
+from . import kernel
+
+CHECKPOINT_SEEDS = range(-20, 21)
+
+def assertSameShip(a, b):
+    np.testing.assert_array_equal(a.verts, b.verts)
+    np.testing.assert_array_equal(a.loops, b.loops)
+    np.testing.assert_array_equal(a.loop_totals, b.loop_totals)
+    np.testing.assert_array_equal(a.materials, b.materials)
+
+# The warm-up build differs in one parameter read after the stage, so the
+# second build resumes from that stage's checkpoint.
+@pytest.mark.parametrize("stage, warm_up", (("asymmetry", {"create_face_detail": False}),
+                                            ("hull", {"num_asymmetry_segments_max": 2})))
+@pytest.mark.parametrize("independent", (False, True))
+def test_resume_matches_full_build(stage, warm_up, independent):
+    for seed in CHECKPOINT_SEEDS:
+        checkpoints = generator.CheckpointStore()
+        entry = generator.Parameters(random_seed=seed, independent_streams=independent, **warm_up)
+        generator.buildSpaceship(entry, kernel.ArrayBuilder(), checkpoints=checkpoints)
+        entry = generator.Parameters(random_seed=seed, independent_streams=independent)
+        assert checkpoints.resume(kernel.ArrayBuilder(), entry, generator.RandomStreams(seed, independent)) == stage
+        resumed = generator.buildSpaceship(entry, kernel.ArrayBuilder(), checkpoints=checkpoints)
+        full = generator.buildSpaceship(entry, kernel.ArrayBuilder())
+        assertSameShip(resumed, full)
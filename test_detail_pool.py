@@ -0,0 +1,53 @@
+# AddOn AnimSpacGen (c) 2016 Michael Davies, Atom
+# Animated Spaceship Generator 1.0.1
+# Manages and animates generated geometry.
+# https://github.com/a1studmuffin/SpaceshipGenerator/blob/master/README.md
+# Last Revision 06-27-2016
+
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# Detail stages handed to a worker pool give the ship built in one process.
+
+import multiprocessing
+
+import numpy as np
+import pytest
+
+from . import generator
+from . import kernel
+
+POOL_SEEDS = range(-7, 8)
+
+@pytest.fixture(scope="module")
+def pool():
+    pool = multiprocessing.Pool(2)
+    yield pool
+    pool.close()
+    pool.join()
+
+@pytest.mark.parametrize("seed", POOL_SEEDS)
+def test_pool_matches_serial(pool, seed):
+    entry = generator.Parameters(random_seed=seed, independent_streams=True)
+    serial = generator.buildSpaceship(entry, kernel.ArrayBuilder())
+    pooled = generator.buildSpaceship(entry, kernel.ArrayBuilder(pool))
+    assert (pooled.num_verts, pooled.num_faces) == (serial.num_verts, serial.num_faces)
+    np.testing.assert_array_equal(pooled.verts, serial.verts)
+    np.testing.assert_array_equal(pooled.loops, serial.loops)
+    np.testing.assert_array_equal(pooled.loop_totals, serial.loop_totals)
+    np.testing.assert_array_equal(pooled.materials, serial.materials)
@@ -0,0 +1,50 @@
+# AddOn AnimSpacGen (c) 2016 Michael Davies, Atom
+# Animated Spaceship Generator 1.0.1
+# Manages and animates generated geometry.
+# https://github.com/a1studmuffin/SpaceshipGenerator/blob/master/README.md
+# Last Revision 06-27-2016
+
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# The modules fleet.py and benchmark.py run outside Blender must not pull
+# in bpy. Checked in a fresh interpreter, loading them the way fleet.py
+# does, since the one running the tests may be Blender's.
+
+import os, sys, subprocess
+
+import pytest
+
+ADDON_DIR = os.path.dirname(os.path.abspath(__file__))
+HEADLESS_MODULES = ("generator", "kernel", "catalog")
+
+IMPORT_CHECK = """
+import sys
+sys.path.insert(0, %r)
+import fleet, benchmark
+for name in %r:
+    fleet.importAddonModule(name)
+blender = sorted(name for name in ("bpy", "bmesh", "mathutils") if name in sys.modules)
+assert not blender, blender
+"""
+
+@pytest.mark.skipif(not os.path.basename(sys.executable).startswith("python"),
+                    reason="needs a plain Python interpreter")
+def test_headless_modules_import_without_bpy():
+    code = IMPORT_CHECK % (ADDON_DIR, HEADLESS_MODULES)
+    subprocess.check_call([sys.executable, "-c", code], cwd=ADDON_DIR)
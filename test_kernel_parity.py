@@ -0,0 +1,61 @@
+# AddOn AnimSpacGen (c) 2016 Michael Davies, Atom
+# Animated Spaceship Generator 1.0.1
+# Manages and animates generated geometry.
+# https://github.com/a1studmuffin/SpaceshipGenerator/blob/master/README.md
+# Last Revision 06-27-2016
+
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# Array kernel against the bmesh builder. Outside Blender only the kernel
+# checks run, the parity checks need bmesh (see headless.py to run them
+# under blender -b).
+
+import pytest
+import numpy as np
+
+from . import generator
+from . import kernel
+
+PARITY_SEEDS = range(-20, 21)
+
+def buildArrays(builder, seed, **parameters):
+    entry = generator.Parameters(random_seed=seed, **parameters)
+    return generator.buildSpaceship(entry, builder)
+
+@pytest.mark.parametrize("seed", PARITY_SEEDS)
+def test_kernel_ship_is_well_formed(seed):
+    arrays = buildArrays(kernel.ArrayBuilder(), seed)
+    assert arrays.num_verts > 0 and arrays.num_faces > 0
+    assert np.isfinite(arrays.verts).all()
+    assert (arrays.loop_totals >= 3).all()
+    assert arrays.loops.min() >= 0 and arrays.loops.max() < arrays.num_verts
+    # finish() drops the vertices no face uses.
+    assert len(np.unique(arrays.loops)) == arrays.num_verts
+
+@pytest.mark.parametrize("seed", PARITY_SEEDS)
+def test_kernel_matches_bmesh(seed):
+    pytest.importorskip("bmesh")
+    from . import events
+    expected = buildArrays(events.BMeshArraysBuilder(), seed)
+    arrays = buildArrays(kernel.ArrayBuilder(), seed)
+    # bisect_plane can leave loose vertices behind, the kernel drops them.
+    used = len(np.unique(expected.loops))
+    assert (arrays.num_verts, arrays.num_faces) == (used, expected.num_faces)
+    assert np.allclose(arrays.verts.min(axis=0), expected.verts.min(axis=0), atol=1e-4)
+    assert np.allclose(arrays.verts.max(axis=0), expected.verts.max(axis=0), atol=1e-4)
@@ -0,0 +1,51 @@
+# AddOn AnimSpacGen (c) 2016 Michael Davies, Atom
+# Animated Spaceship Generator 1.0.1
+# Manages and animates generated geometry.
+# https://github.com/a1studmuffin/SpaceshipGenerator/blob/master/README.md
+# Last Revision 06-27-2016
+
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# Levels of detail: level 0 is the plain ship and every level is lighter
+# than the one before.
+
+import numpy as np
+
+from . import generator
+from . import kernel
+
+LOD_SEEDS = range(-20, 21)
+
+def test_level_zero_matches_plain_build():
+    for seed in LOD_SEEDS:
+        entry = generator.Parameters(random_seed=seed, use_lod=True)
+        levels = generator.buildSpaceshipLods(entry, kernel.ArrayBuilder())
+        plain = generator.buildSpaceship(generator.Parameters(random_seed=seed), kernel.ArrayBuilder())
+        np.testing.assert_array_equal(levels[0].verts, plain.verts)
+        np.testing.assert_array_equal(levels[0].loops, plain.loops)
+        np.testing.assert_array_equal(levels[0].materials, plain.materials)
+
+def test_levels_shrink_monotonically():
+    for seed in LOD_SEEDS:
+        entry = generator.Parameters(random_seed=seed, use_lod=True)
+        levels = generator.buildSpaceshipLods(entry, kernel.ArrayBuilder())
+        assert len(levels) == len(generator.LOD_LEVELS)
+        for finer, coarser in zip(levels, levels[1:]):
+            assert coarser.num_verts <= finer.num_verts, seed
+            assert coarser.num_faces <= finer.num_faces, seed
@@ -22,17 +22,22 @@
 #
 # ##### END GPL LICENSE BLOCK #####
 
-import bpy
+import bpy, logging
 import threading, time
 from bpy_extras.object_utils import AddObjectHelper
 
 from .util import OBJECT_PREFIX
 from .util import ANIMSPACGEN_OB_PREFIX
 
-from .util import to_console
 from .util import returnNameDroppedPrefix
+from .util import registerManagedObject
 
 from .events import reviewAnimSpacGen
+from .profiler import profile_recorder
+from .bake import isBaked
+from .bake import BAKE_PROPERTY
+
+log = logging.getLogger(__name__)
 
 ############################################################################
 # Thread processing for parameters that are invalid to set in a DRAW context.
@@ -43,7 +48,7 @@ from .events import reviewAnimSpacGen
 ############################################################################
 def AnimSpacGen_new_source(lock, passedSourceName, passedSleepTime):
 	time.sleep(passedSleepTime) # Feel free to alter time in seconds as needed.   
-	to_console("AnimSpacGen threading: AnimSpacGen_new_source")
+	log.debug("AnimSpacGen threading: AnimSpacGen_new_source")
 	ob_source = bpy.data.objects.get(passedSourceName)
 	if ob_source !=None:
 			ob_source.show_name = True
@@ -54,9 +59,9 @@ def AnimSpacGen_new_source(lock, passedSourceName, passedSleepTime):
 			animspacgen_name = returnNameDroppedPrefix(ob_source)
 			collection[-1].name= ("%s-%i" % (animspacgen_name,l))
 			#collection[-1].name= (ENTRY_NAME + str(l))
-			to_console("AnimSpacGen threading: New entry established on [%s]." % passedSourceName)
+			log.debug("AnimSpacGen threading: New entry established on [%s].", passedSourceName)
 	else:
-		to_console("AnimSpacGen threading: Source not found [%s]." % passedSourceName) 
+		log.warning("AnimSpacGen threading: Source not found [%s].", passedSourceName) 
 
 ############################################################################
 # PANEL code.
@@ -126,10 +131,17 @@ class OBJECT_PT_AnimSpacGen(bpy.types.Panel):
 								# Parameters draw in this box.
 								box = box.box()
 								box.prop(entry, "random_seed")
+								row = box.row()
+								row.operator("op.find_animspacgen_seed", icon="VIEWZOOM")
+								row.operator("op.build_animspacgen_catalog", icon="FILE_REFRESH")
 								layout.separator()
 								box.prop(entry, "create_face_detail")
 								box.prop(entry, "num_hull_segments_min")
 								box.prop(entry, "num_hull_segments_max")
+								box.prop(entry, "max_verts")
+								box.prop(entry, "max_faces")
+								box.prop(entry, "use_lod")
+								box.prop(entry, "independent_streams")
 								layout.separator()
 								box.prop(entry, "create_asymmetry_segments")
 								box.prop(entry, "num_asymmetry_segments_min")
@@ -140,13 +152,33 @@ class OBJECT_PT_AnimSpacGen(bpy.types.Panel):
 								box.prop(entry, "rnd_normal_chance")
 								box.prop(entry, "rnd_extrusion_deviation_chance")
 								layout.separator()
-								#box.prop(entry, "rnd_hull_extrude_chance")
 								box.prop(entry, "rnd_scaling_chance")
 								box.prop(entry, "rnd_side_trans_chance")
 								box.prop(entry, "rnd_roty_chance")
 								
 								#box.prop(entry, "apply_bevel_modifier")
 								#box.prop(entry, "assign_materials")
+
+								# Baking to disk.
+								row = layout.row()
+								row.operator("op.bake_animspacgen", icon="FILE_TICK")
+								if isBaked(ob):
+									row.operator("op.clear_animspacgen_bake", icon="X")
+									layout.label("Playing back %s" % ob[BAKE_PROPERTY], icon='FILE')
+
+								layout.operator("op.scatter_animspacgen_fleet", icon="PARTICLES")
+
+								if ob.data != None and ob.data.users > 1:
+									# Duplicated controllers with identical parameters share their mesh.
+									layout.label("Mesh shared with %i other objects." % (ob.data.users - 1), icon='LINKED')
+
+								if profile_recorder.enabled == True:
+									# Stage timings of the last generation of this object.
+									item = profile_recorder.latest(ob.name)
+									if item != None:
+										layout.label("Last generation: %.3f s, %i verts, %i faces." % (item["seconds"], item["verts"], item["faces"]), icon='TIME')
+									layout.operator("op.export_animspacgen_profiles", icon="EXPORT")
+								layout.operator("op.dump_animspacgen_log", icon="TEXT")
 		
 							else:
 								# We have no collections so we have to add one.
@@ -165,10 +197,10 @@ class OBJECT_PT_AnimSpacGen(bpy.types.Panel):
 							layout.label("Not a AnimSpacGen object yet.",icon='INFO')  
 							layout.operator("op.rename_to_animspacgen", icon="SORTALPHA", text="(rename with '" + OBJECT_PREFIX +"' prefix to enable)")
 					else:
-						to_console("ERROR: Can not proceed..?")
+						log.error("Can not proceed..?")
 		else:
 			# This can happen sometimes after a render.
-			to_console ("AnimSpacGen was given an invalid context, imagine that..")
+			log.debug("AnimSpacGen was given an invalid context, imagine that..")
 			self.layout.label("AnimSpacGen was given an invalid context.",icon='HELP')
 
 ###########################################################################
@@ -180,6 +212,7 @@ def install_animspacgen(self, context):
 	if ob != None:
 		ob.show_axis = True
 		context.scene.objects.link(ob)
+		registerManagedObject(ob)
 		result = "AnimSpacGen [%s] added to the scene." % ob.name
 	else:
 		result = "Failed to create a new AnimSpacGen object." 
@@ -194,7 +227,7 @@ def install_animspacgen(self, context):
 	collection[-1].start = 0.1
 	collection[-1].stop = 0.9
 	#reviewAnimSpacGen(context.scene)
-	to_console(result)
+	log.info(result)
 	
 class OBJECT_OT_add_animspacgen(bpy.types.Operator, AddObjectHelper):
 	"""AnimSpacGen"""
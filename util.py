@@ -22,8 +22,10 @@
 #
 # ##### END GPL LICENSE BLOCK #####
 
-import bpy
-import os,sys,colorsys
+import bpy, bmesh
+import os,sys,colorsys,logging
+import multiprocessing, multiprocessing.spawn
+import numpy as np
 
 import mathutils
 from mathutils import Vector, Matrix
@@ -32,6 +34,7 @@ import random
 from random import randint, uniform
 
 
+
 #####################################################################
 # Globals.
 #####################################################################
@@ -39,7 +42,6 @@ from random import randint, uniform
 isBusy = False
 isRendering = False
 lastFrameUpdated = 0.0
-frameChangeCount = 0
       
 # Objects are managed by name prefix. Customize here...e.g. ReRing_Cube
 ANIMSPACGEN_OB_PREFIX = "asg_"        #For managed object naming.
@@ -60,18 +62,37 @@ MAX_NAME_SIZE = 42
 GLOBAL_ZERO_PADDING = 4             # The number of zeros to padd strings with when converting INTs to STRINGs.
 DELIMITER = ","
 
+MESH_CACHE_BUDGET = 64 * 1024 * 1024	# Bytes of generated meshes kept around for reuse.
+REGEN_USE_QUEUE = True				# Coalesce parameter edits instead of regenerating on every update.
+REGEN_IDLE_TIME = 0.15				# Seconds an object must be left alone before its queued regeneration runs.
+USE_ARRAY_KERNEL = False			# Build ships with the numpy kernel instead of bmesh.
+PROFILE_GENERATION = False			# Record per-stage timings of every generation (see profiler.py).
+PROFILE_HISTORY = 32				# Generation profiles kept per controller object.
+LOD_DISTANCES = (60.0, 200.0)		# Camera distances where levels of detail 1 and 2 take over.
+CHECKPOINT_CAPACITY = 8				# Hull/asymmetry snapshots kept to resume generation from.
+MESH_POOL_SIZE = 8					# Emptied mesh datablocks kept to generate into again.
+BMESH_BULK_WRITE = False			# Write bmesh ships through flat arrays instead of bm.to_mesh (compare with benchmark.py).
+DETAIL_WORKERS = 0					# Worker processes for the array kernel's detail stages of entries with independent streams, 0 to build in-process.
+RENDER_PREFETCH_FRAMES = 4			# Frames built ahead in worker processes while an animation renders.
+RENDER_PREFETCH_WORKERS = 0			# Worker processes for those builds, 0 to generate each frame in-process. Requires USE_ARRAY_KERNEL.
+CATALOG_WORKERS = 0					# Worker processes building the seed catalog, 0 for one per core.
+
 #####################################################################
-# Simple debug message control.
+# Leveled logging, see log.py for levels and the trace buffer.
 #####################################################################
-SHOW_MESSAGES = True
-MSG_PREFIX = "asg=#> "
-def to_console(passedItem):
-	if SHOW_MESSAGES == True:
-		if len(passedItem) == 0:
-			print("")
-		else:
-			s = str(passedItem)
-			print(MSG_PREFIX + s)
+log = logging.getLogger(__name__)
+
+#####################################################################
+# Worker processes.
+#####################################################################
+def canStartWorkers():
+	# Pools are only started when their workers fork off Blender's process,
+	# or multiprocessing.set_executable() named a Python interpreter for
+	# spawned ones. Spawning by default would launch Blender itself again.
+	if multiprocessing.get_start_method() == "fork":
+		return True
+	executable = multiprocessing.spawn.get_executable()
+	return os.path.realpath(executable) != os.path.realpath(bpy.app.binary_path)
 
 #####################################################################
 # Memory Management.
@@ -92,22 +113,71 @@ def removeCurveFromMemory (passedName):
 				try:
 					bpy.data.curves.remove(curve)
 					result = True
-					#to_console("removeCurveFromMemory: MESH [" + passedName + "] removed from memory.")
+					#log.debug("removeCurveFromMemory: MESH [%s] removed from memory.", passedName)
 				except:
 					result = False
-					to_console("removeCurveFromMemory: FAILED to remove [" + passedName + "] from memory.")
+					log.warning("removeCurveFromMemory: FAILED to remove [%s] from memory.", passedName)
 			else:
 				# Unable to clear users, something is holding a reference to it.
 				# Can't risk removing. Favor leaving it in memory instead of risking a crash.
-				to_console("removeCurveFromMemory: Unable to clear users for MESH, something is holding a reference to it.")
+				log.warning("removeCurveFromMemory: Unable to clear users for MESH, something is holding a reference to it.")
 				result = False
 		else:
-			to_console ("removeCurveFromMemory: Unable to remove CURVE because it still has [" + str(curve.users) + "] users.")
+			log.debug("removeCurveFromMemory: Unable to remove CURVE because it still has [%i] users.", curve.users)
 	else:
 		# We could not fetch it, it does not exist in memory, essentially removed.
 		result = True
 	return result
 	
+def clearMeshGeometry(passedMesh):
+	# Empties the mesh in place, keeping the datablock, its name and materials.
+	if hasattr(passedMesh, "clear_geometry"):
+		passedMesh.clear_geometry()
+	else:
+		bm = bmesh.new()
+		bm.to_mesh(passedMesh)
+		bm.free()
+
+def fillMeshFromArrays(passedMesh, arrays):
+	# Writes kernel.MeshArrays into an empty mesh, one bulk foreach_set per
+	# attribute instead of building python lists for from_pydata.
+	me = passedMesh
+	me.vertices.add(arrays.num_verts)
+	me.vertices.foreach_set("co", np.ascontiguousarray(arrays.verts, dtype=np.float32).ravel())
+	me.loops.add(len(arrays.loops))
+	me.loops.foreach_set("vertex_index", np.ascontiguousarray(arrays.loops, dtype=np.int32))
+	me.polygons.add(arrays.num_faces)
+	me.polygons.foreach_set("loop_start", np.ascontiguousarray(arrays.loop_starts, dtype=np.int32))
+	me.polygons.foreach_set("loop_total", np.ascontiguousarray(arrays.loop_totals, dtype=np.int32))
+	me.polygons.foreach_set("material_index", np.ascontiguousarray(arrays.materials, dtype=np.int32))
+	me.update(calc_edges=True)
+	return me
+
+def copyMeshGeometry(source, target):
+	# Refills target in place with a copy of source's geometry, keeping the
+	# target datablock, its name and materials.
+	clearMeshGeometry(target)
+	co = np.empty(len(source.vertices) * 3, dtype=np.float32)
+	source.vertices.foreach_get("co", co)
+	target.vertices.add(len(source.vertices))
+	target.vertices.foreach_set("co", co)
+	edges = np.empty(len(source.edges) * 2, dtype=np.int32)
+	source.edges.foreach_get("vertices", edges)
+	target.edges.add(len(source.edges))
+	target.edges.foreach_set("vertices", edges)
+	target.loops.add(len(source.loops))
+	for attribute in ("vertex_index", "edge_index"):
+		values = np.empty(len(source.loops), dtype=np.int32)
+		source.loops.foreach_get(attribute, values)
+		target.loops.foreach_set(attribute, values)
+	target.polygons.add(len(source.polygons))
+	for attribute in ("loop_start", "loop_total", "material_index"):
+		values = np.empty(len(source.polygons), dtype=np.int32)
+		source.polygons.foreach_get(attribute, values)
+		target.polygons.foreach_set(attribute, values)
+	target.update()
+	return target
+
 def removeMeshFromMemory (passedName):
 	# Extra test because this can crash Blender if not done correctly.
 	result = False
@@ -124,17 +194,17 @@ def removeMeshFromMemory (passedName):
 				try:
 					bpy.data.meshes.remove(mesh)
 					result = True
-					#to_console("removeMeshFromMemory: MESH [" + passedName + "] removed from memory.")
+					#log.debug("removeMeshFromMemory: MESH [%s] removed from memory.", passedName)
 				except:
 					result = False
-					to_console("removeMeshFromMemory: FAILED to remove [" + passedName + "] from memory.")
+					log.warning("removeMeshFromMemory: FAILED to remove [%s] from memory.", passedName)
 			else:
 				# Unable to clear users, something is holding a reference to it.
 				# Can't risk removing. Favor leaving it in memory instead of risking a crash.
-				to_console("removeMeshFromMemory: Unable to clear users for MESH, something is holding a reference to it.")
+				log.warning("removeMeshFromMemory: Unable to clear users for MESH, something is holding a reference to it.")
 				result = False
 		else:
-			to_console ("removeMeshFromMemory: Unable to remove MESH because it still has [" + str(mesh.users) + "] users.")
+			log.debug("removeMeshFromMemory: Unable to remove MESH because it still has [%i] users.", mesh.users)
 	else:
 		# We could not fetch it, it does not exist in memory, essentially removed.
 		result = True
@@ -161,10 +231,10 @@ def removeObjectFromMemory (passedName):
 			else:
 				# Unable to clear users, something is holding a reference to it.
 				# Can't risk removing. Favor leaving it in memory instead of risking a crash.
-				to_console("removeObjectFromMemory: Unable to clear users for OBJECT, something is holding a reference to it.")
+				log.warning("removeObjectFromMemory: Unable to clear users for OBJECT, something is holding a reference to it.")
 				result = False
 		else:
-			to_console ("removeObjectFromMemory: Unable to remove OBJECT because it still has [" + str(ob.users) + "] users.") 
+			log.debug("removeObjectFromMemory: Unable to remove OBJECT because it still has [%i] users.", ob.users)
 	else:
 		# We could not fetch it, it does not exist in memory, essentially removed.
 		result = True
@@ -192,6 +262,49 @@ def returnObjectNamesLike(passedScene, passedName):
 			result.append(name)
 	return result
 
+#####################################################################
+# Managed object registry.
+#####################################################################
+# Names of AnimSpacGen controller objects, maintained as objects are created,
+# renamed and deleted so lookups never have to scan every object in a scene.
+managedObjectNames = set()
+
+def isManagedName(passedName):
+	l = len(OBJECT_PREFIX)
+	return passedName[0:l] == OBJECT_PREFIX
+
+def registerManagedObject(ob):
+	# Returns True if the object is named like a controller and is now tracked.
+	result = isManagedName(ob.name)
+	if result == True:
+		managedObjectNames.add(ob.name)
+	return result
+
+def unregisterManagedObject(passedName):
+	managedObjectNames.discard(passedName)
+
+def rebuildManagedObjects():
+	# One full pass over bpy.data.objects, on file load and when the add-on
+	# is enabled. In between, events.scene_update_registry tracks new
+	# controllers and returnManagedObjectNames drops deleted ones.
+	managedObjectNames.clear()
+	for ob in bpy.data.objects:
+		registerManagedObject(ob)
+	log.debug("Managed object registry rebuilt with [%i] objects.", len(managedObjectNames))
+
+def returnManagedObjectNames(passedScene):
+	# Return registered controller objects linked to the passed scene.
+	# Deleted or renamed objects are dropped from the registry as they are found.
+	result = []
+	for name in list(managedObjectNames):
+		ob = bpy.data.objects.get(name)
+		if ob == None or isManagedName(ob.name) == False:
+			managedObjectNames.discard(name)
+		elif name in passedScene.objects:
+			result.append(name)
+	result.sort()
+	return result
+
 def returnNameForNumber(passedFrame):
     frame_number = str(passedFrame)
     post_fix = frame_number.zfill(GLOBAL_ZERO_PADDING)